@@ -6,6 +6,7 @@ pragma solidity 0.6.12;
 pragma experimental ABIEncoderV2;
 
 import "../interfaces/notional/NotionalProxy.sol";
+import "../interfaces/weth/IWETH.sol";
 
 
 // These are the core Yearn libraries
@@ -19,6 +20,7 @@ import {
     IERC20,
     Address
 } from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+import {Math} from "@openzeppelin/contracts/math/Math.sol";
 
 // Import interfaces for many popular DeFi projects, or add your own!
 //import "../interfaces/<protocol>/<Interface>.sol";
@@ -28,16 +30,227 @@ contract Strategy is BaseStrategy {
     using Address for address;
     using SafeMath for uint256;
 
-    NotionalProxy public immutable nProxy;
-    uint16 private immutable currencyID; 
+    // Notional's internal token precision (8 decimals)
+    uint256 private constant INTERNAL_TOKEN_PRECISION = 1e8;
+    // Notional's annualized rate precision and time constants (a year is 360 days)
+    uint256 private constant RATE_PRECISION = 1e9;
+    uint256 private constant YEAR = 360 days;
+    uint256 private constant FCASH_ASSET_TYPE = 1;
+    uint256 private constant MAX_POSITIONS = 8;
+    uint256 private constant MAX_BPS = 10_000;
+    // Most trades a rung is split into
+    uint256 private constant MAX_CHUNKS = 4;
+    uint256 private constant ETH_PRECISION = 1e18;
+    uint256 private constant ASSET_RATE_DECIMAL_DIFFERENCE = 1e10;
+    // Returned by ERC1155 receivers that accept a batch transfer
+    bytes4 private constant ERC1155_BATCH_ACCEPTED = 0xbc197c81;
+    // Notional's ETH currency lends WETH vaults' want once unwrapped
+    address private constant WETH = 0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2;
+
+    // Set once by the constructor or by initialize, clones can't use immutables.
+    // Packed in a single slot with the metadata of want's Notional currency, so
+    // hot paths never query getCurrency: its asset token type (NonMintable when
+    // the asset is want itself, cETH when want is WETH) and want's decimals
+    NotionalProxy public nProxy;
+    uint16 public currencyID;
+    bool public isOriginal = true;
+    TokenType private assetTokenType;
+    uint8 private wantDecimals;
+
+    // Notional's want/ETH Chainlink oracle (none when want is ETH), decoded once
+    // from its rate storage. ethToWant is amount * numerator / denominator scaled
+    // by the answer: multiplied when the oracle quotes ETH/want (mustInvert) and
+    // divided when it quotes want/ETH
+    AggregatorV2V3Interface private rateOracle;
+    bool private rateMustInvert;
+    uint256 private ethToWantNumerator;
+    uint256 private ethToWantDenominator;
+
+    // Minimum amount of want to lend, smaller amounts stay idle until the next harvest
+    uint256 public minAmountWant;
+
+    // Open fCash positions, kept contiguous and packed two per slot as
+    // uint32 maturity | uint32 impliedRate | uint64 fCashAmount (internal precision)
+    uint128[MAX_POSITIONS] private positions;
+    // When true, value fCash from Notional's portfolio at market oracle rates
+    // instead of the positions record (much more expensive)
+    bool public portfolioValuation;
+    // When true, cash a batch doesn't lend stays in Notional as asset cash and is
+    // lent by the next one, instead of being redeemed to want and minted back
+    bool public keepCashBalance;
+    // Whether the last batch left its cash balance in Notional
+    bool private hasCashBalance;
+    // Whether the strategy holds nTokens
+    bool private hasNTokens;
+    // NOTE, set when incentives are first claimed
+    IERC20 private noteToken;
+
+    // Lending ladder: each harvest lends into up to `ladderSize` markets (one
+    // rung per market) among the first `maxMarketIndex` ones, best rates first.
+    // A rung takes at most `maxMarketShareBPS` of its market's fCash liquidity
+    uint8 public ladderSize;
+    uint8 public maxMarketIndex;
+    uint16 public maxMarketShareBPS;
+    // Share of the assets (BPS) provided as liquidity through nTokens instead of
+    // lent as fCash. nTokens earn the markets' fees and NOTE incentives and are
+    // minted and redeemed at their present value, without moving the markets
+    uint16 public nTokenShareBPS;
+    // Lends trade at most this much (BPS of annualized rate) under their market's
+    // oracle rate, larger rungs are split into chunks priced one after the other
+    // and the chunks that would trade under the bound are not lent. Zero disables
+    // the bound, like Notional's zero minImpliedRate
+    uint16 public maxRateSlippageBPS;
+
+    // In memory description of a lend into one market
+    struct Lend {
+        uint8 marketIndex;
+        uint256 maturity;
+        uint256 cashAmount;
+        uint256 fCashAmount;
+        uint32 minImpliedRate;
+    }
+
+    // In memory description of fCash sold from one position
+    struct Exit {
+        uint256 positionIndex;
+        uint8 marketIndex;
+        uint256 fCashAmount;
+    }
+
+    event Cloned(address indexed clone);
 
     constructor(address _vault, NotionalProxy _nProxy) public BaseStrategy(_vault) {
         // You can set these parameters on deployment to whatever you want
         // maxReportDelay = 6300;
         // profitFactor = 100;
         // debtThreshold = 0;
-        currencyID = 2;
+        _initializeNotionalStrategy(_nProxy);
+    }
+
+    // Notional redeems cETH to ETH, it is wrapped back into want right away
+    receive() external payable {}
+
+    // Sets up a clone, reverts if the strategy is already initialized
+    function initialize(
+        address _vault,
+        address _strategist,
+        address _rewards,
+        address _keeper,
+        NotionalProxy _nProxy
+    ) external {
+        _initialize(_vault, _strategist, _rewards, _keeper);
+        _initializeNotionalStrategy(_nProxy);
+    }
+
+    // Deploys an EIP-1167 minimal proxy to this strategy and initializes it,
+    // so a single implementation serves every vault and currency
+    function cloneStrategy(
+        address _vault,
+        address _strategist,
+        address _rewards,
+        address _keeper,
+        NotionalProxy _nProxy
+    ) external returns (address payable newStrategy) {
+        require(isOriginal, "!clone");
+        bytes20 addressBytes = bytes20(address(this));
+        assembly {
+            let clone_code := mload(0x40)
+            mstore(clone_code, 0x3d602d80600a3d3981f3363d3d373d3d3d363d73000000000000000000000000)
+            mstore(add(clone_code, 0x14), addressBytes)
+            mstore(add(clone_code, 0x28), 0x5af43d82803e903d91602b57fd5bf30000000000000000000000000000000000)
+            newStrategy := create(0, clone_code, 0x37)
+        }
+
+        Strategy(newStrategy).initialize(_vault, _strategist, _rewards, _keeper, _nProxy);
+        emit Cloned(newStrategy);
+    }
+
+    function _initializeNotionalStrategy(NotionalProxy _nProxy) internal {
+        uint16 _currencyID = _getCurrencyID(_nProxy);
+        (Token memory assetToken, ) = _nProxy.getCurrency(_currencyID);
+        currencyID = _currencyID;
         nProxy = _nProxy;
+        assetTokenType = assetToken.tokenType;
+        uint8 _wantDecimals = uint8(vault.decimals());
+        wantDecimals = _wantDecimals;
+        uint256 _wantPrecision = uint256(10)**_wantDecimals;
+
+        (ETHRateStorage memory ethRate, ) = _nProxy.getRateStorage(_currencyID);
+        uint256 rateDecimals = uint256(10)**ethRate.rateDecimalPlaces;
+        rateOracle = ethRate.rateOracle;
+        // ETH has no oracle and is handled as an inverted answer of 1
+        bool mustInvert = ethRate.mustInvert || address(ethRate.rateOracle) == address(0);
+        rateMustInvert = mustInvert;
+        ethToWantNumerator = mustInvert ? _wantPrecision : rateDecimals.mul(_wantPrecision);
+        ethToWantDenominator = mustInvert && address(ethRate.rateOracle) != address(0)
+            ? rateDecimals.mul(ETH_PRECISION)
+            : ETH_PRECISION;
+        ladderSize = 1;
+        maxMarketIndex = 2;
+        maxMarketShareBPS = 1_000;
+        maxRateSlippageBPS = 50;
+
+        want.safeApprove(address(_nProxy), type(uint256).max);
+    }
+
+    // Notional's currency for want: getCurrencyId resolves tokens that are their own
+    // asset token (NonMintable), otherwise want has to be a currency's underlying
+    function _getCurrencyID(NotionalProxy _nProxy) internal view returns (uint16) {
+        try _nProxy.getCurrencyId(address(want)) returns (uint16 currencyId) {
+            return currencyId;
+        } catch {}
+
+        uint16 maxCurrencyId = _nProxy.getMaxCurrencyId();
+        for (uint16 i = 1; i <= maxCurrencyId; i++) {
+            (, Token memory underlyingToken) = _nProxy.getCurrency(i);
+            if (
+                underlyingToken.tokenAddress == address(want) ||
+                (underlyingToken.tokenType == TokenType.Ether && address(want) == _weth())
+            ) {
+                return i;
+            }
+        }
+        revert("!currency");
+    }
+
+    // The wrapped ETH a want of Notional's ETH currency has to be
+    function _weth() internal view virtual returns (address) {
+        return WETH;
+    }
+
+    function setMinAmountWant(uint256 _minAmountWant) external onlyAuthorized {
+        minAmountWant = _minAmountWant;
+    }
+
+    function setPortfolioValuation(bool _portfolioValuation) external onlyAuthorized {
+        portfolioValuation = _portfolioValuation;
+    }
+
+    function setKeepCashBalance(bool _keepCashBalance) external onlyAuthorized {
+        keepCashBalance = _keepCashBalance;
+    }
+
+    function setNTokenShare(uint16 _nTokenShareBPS) external onlyAuthorized {
+        require(_nTokenShareBPS <= MAX_BPS, "!nTokenShareBPS");
+        nTokenShareBPS = _nTokenShareBPS;
+    }
+
+    function setMaxRateSlippage(uint16 _maxRateSlippageBPS) external onlyAuthorized {
+        require(_maxRateSlippageBPS <= MAX_BPS, "!maxRateSlippageBPS");
+        maxRateSlippageBPS = _maxRateSlippageBPS;
+    }
+
+    function setLadder(
+        uint8 _ladderSize,
+        uint8 _maxMarketIndex,
+        uint16 _maxMarketShareBPS
+    ) external onlyAuthorized {
+        require(_ladderSize > 0 && _ladderSize <= MAX_POSITIONS, "!ladderSize");
+        require(_maxMarketIndex > 0 && _maxMarketIndex <= 7, "!maxMarketIndex");
+        require(_maxMarketShareBPS > 0 && _maxMarketShareBPS <= MAX_BPS, "!maxMarketShareBPS");
+        ladderSize = _ladderSize;
+        maxMarketIndex = _maxMarketIndex;
+        maxMarketShareBPS = _maxMarketShareBPS;
     }
 
     // ******** OVERRIDE THESE METHODS FROM BASE CONTRACT ************
@@ -48,14 +261,11 @@ contract Strategy is BaseStrategy {
     }
 
     function estimatedTotalAssets() public view override returns (uint256) {
-        // TODO: check value of lent amount (using Account)
-        // TODO: add want
-
         // OPTIONAL:
         // TODO: calculate how much would it cost to close NOW
-        // TODO: check value of profits (and decide if we want to include it here)
 
-        return want.balanceOf(address(this));
+        uint256 fCashValue = portfolioValuation ? _portfolioValue() : _positionsValue();
+        return balanceOfWant().add(_toWantPrecision(fCashValue.add(_cashBalance()).add(_nTokenValue())));
     }
 
     function prepareReturn(uint256 _debtOutstanding)
@@ -67,63 +277,320 @@ contract Strategy is BaseStrategy {
             uint256 _debtPayment
         )
     {
-        // TODO: Do stuff here to free up any returns back into `want`
-        // NOTE: Return `_profit` which is value generated by all positions, priced in `want`
-        // NOTE: Should try to free up at least `_debtOutstanding` of underlying position
+        if (hasNTokens) {
+            _claimIncentives();
+        }
 
-        // TODO: withdraw from past terms
+        uint256 totalAssets = estimatedTotalAssets();
+        uint256 totalDebt = vault.strategies(address(this)).totalDebt;
+        if (totalAssets >= totalDebt) {
+            _profit = totalAssets - totalDebt;
+        } else {
+            _loss = totalDebt - totalAssets;
+        }
+
+        uint256 amountRequired = _debtOutstanding.add(_profit);
+        uint256 wantBalance = balanceOfWant();
+        if (wantBalance < amountRequired && (hasCashBalance || _maturedCash() > 0)) {
+            // matured fCash and kept cash pay first, what is not needed is lent again in the same batch
+            _lendPositions(0, _toInternalPrecision(amountRequired - wantBalance));
+            wantBalance = balanceOfWant();
+        }
+        if (wantBalance < _debtOutstanding) {
+            // debt is repaid even if fCash has to be sold before maturity,
+            // profits wait for the positions to mature
+            (, uint256 liquidationLoss) = liquidatePosition(_debtOutstanding);
+            _loss = _loss.add(liquidationLoss);
+            wantBalance = balanceOfWant();
+        }
 
-        // TODO: calc assets (estimatedTotalAssets)
-        // TODO: calc debt vault.strategies(address(this)).totalDebt;
+        if (_loss > _profit) {
+            _loss = _loss - _profit;
+            _profit = 0;
+        } else {
+            _profit = _profit - _loss;
+            _loss = 0;
+        }
+        _debtPayment = Math.min(_debtOutstanding, wantBalance);
+        _profit = Math.min(_profit, wantBalance - _debtPayment);
+    }
 
-        // TODO: calc P&L: assets - debt ==> profit, loss
+    function adjustPosition(uint256 _debtOutstanding) internal override {
+        // nothing is lent again once liquidateAllPositions unwound everything
+        if (emergencyExit) {
+            return;
+        }
+        uint256 availableWantBalance = balanceOfWant();
+        availableWantBalance = availableWantBalance > _debtOutstanding ? availableWantBalance - _debtOutstanding : 0;
+        if (availableWantBalance < minAmountWant) {
+            availableWantBalance = 0;
+        }
+        if (availableWantBalance > 0 && nTokenShareBPS > 0) {
+            availableWantBalance = availableWantBalance.sub(_mintNTokens(availableWantBalance));
+        }
 
-        // TODO: how much do i need to return (amountRequired = debtOutstanding + profit)
-        // TODO: check if I have enough want to serve debtOutstanding
-        // TODO: amountToLiquidate (amountRequired - balanceOfWant)
-        // TODO: liquidatedAmount, loss = liquidatePosition(amountToLiquidate)
+        // matured positions are rolled over even when there is no want to lend
+        _lendPositions(availableWantBalance, 0);
+    }
 
+    // Mints nTokens with up to `_availableWant` until they reach their share of the
+    // assets, returns the want deposited
+    function _mintNTokens(uint256 _availableWant) internal returns (uint256 depositAmount) {
+        uint256 targetValue = estimatedTotalAssets().mul(nTokenShareBPS).div(MAX_BPS);
+        uint256 nTokenValue = _toWantPrecision(_nTokenValue());
+        if (targetValue <= nTokenValue) {
+            return 0;
+        }
+        depositAmount = Math.min(_availableWant, targetValue - nTokenValue);
+        // a zero quote means the nToken can't take deposits (markets not initialized)
+        if (depositAmount < minAmountWant || nProxy.calculateNTokensToMint(currencyID, uint88(depositAmount)) == 0) {
+            return 0;
+        }
 
-        // TODO: report loss, profit, debtPayment
+        BalanceActionWithTrades[] memory actions = new BalanceActionWithTrades[](1);
+        actions[0].actionType = assetTokenType == TokenType.NonMintable
+            ? DepositActionType.DepositAssetAndMintNToken
+            : DepositActionType.DepositUnderlyingAndMintNToken;
+        actions[0].currencyId = currencyID;
+        actions[0].depositActionAmount = depositAmount;
+        _executeBatch(actions);
+        if (!hasNTokens) {
+            hasNTokens = true;
+        }
     }
 
-    function adjustPosition(uint256 _debtOutstanding) internal override {
-        // TODO: check if we have invested in past terms
-        // probably we need to check if we have a previous term we can take funds from
+    // Lends `_wantAmount` of idle want together with the cash of matured positions
+    // (and any kept cash balance) in a single batch: Notional settles the matured
+    // fCash, the trades lend it again and whatever is left is withdrawn as want.
+    // With keepCashBalance only `_cashToWithdraw` (internal precision) is withdrawn
+    function _lendPositions(uint256 _wantAmount, uint256 _cashToWithdraw) internal {
+        uint256 maturedCash = _removeClosedPositions();
+        uint256 cashBalance = _cashBalance();
+        // settled asset cash may round below the notional, keep 1 BPS aside
+        uint256 lendableCash = maturedCash.add(cashBalance);
+        lendableCash = lendableCash.sub(lendableCash.div(MAX_BPS));
+        bool withdrawEntireCash = !keepCashBalance || _cashToWithdraw >= lendableCash;
+        lendableCash = lendableCash > _cashToWithdraw ? lendableCash - _cashToWithdraw : 0;
 
-        uint256 availableWantBalance = balanceOfWant();
-        if(availableWantBalance <= _debtOutstanding) {
-            return;
+        Lend[] memory lends;
+        uint256 cashAmount = _toInternalPrecision(_wantAmount).add(lendableCash);
+        if (cashAmount > 0) {
+            lends = _getLadderLends(cashAmount);
         }
-        availableWantBalance = availableWantBalance.sub(_debtOutstanding);
-        if(availableWantBalance < minAmountWant) {
+        if (lends.length == 0 && maturedCash == 0 && (cashBalance == 0 || _cashToWithdraw == 0)) {
             return;
         }
 
+        // All rungs go in a single action, fields are written in place to avoid
+        // allocating a second struct in memory
+        BalanceActionWithTrades[] memory actions = new BalanceActionWithTrades[](1);
+        actions[0].currencyId = currencyID;
+        actions[0].withdrawEntireCashBalance = withdrawEntireCash;
+        if (!withdrawEntireCash && _cashToWithdraw > 0) {
+            actions[0].withdrawAmountInternalPrecision = _toAssetCash(_cashToWithdraw);
+        }
+        // nothing is redeemed when all the cash stays
+        actions[0].redeemToUnderlying =
+            (withdrawEntireCash || _cashToWithdraw > 0) &&
+            assetTokenType != TokenType.NonMintable;
+        actions[0].trades = new bytes32[](lends.length);
+        cashAmount = 0;
+        for (uint256 i = 0; i < lends.length; i++) {
+            actions[0].trades[i] = getTradeFrom(lends[i].marketIndex, lends[i].fCashAmount, lends[i].minImpliedRate);
+            cashAmount = cashAmount.add(lends[i].cashAmount);
+        }
+        // settled cash funds the trades first, only the rest is deposited
+        // NOTE: any cash that is not used by the trades is withdrawn back as want
+        // unless it is kept
+        if (cashAmount > lendableCash) {
+            // want that is its own asset token is deposited as is
+            actions[0].actionType = assetTokenType == TokenType.NonMintable
+                ? DepositActionType.DepositAsset
+                : DepositActionType.DepositUnderlying;
+            actions[0].depositActionAmount = _getDepositAmount(_wantAmount, cashAmount - lendableCash);
+        }
+
+        _executeBatch(actions);
+        _setHasCashBalance(!withdrawEntireCash);
 
-        // TODO: research how to pass this as calldata
-        BalanceActionsWithTrades[] memory actions = new BalanceActionsWithTrades[](1);
-        
-        // TODO: term (initially always shortest one)
-        // TODO: calculate marketIndex taking into account currency and term
-        bytes32 trade = getTradeFrom(marketIndex, availableWantBalance);
+        for (uint256 i = 0; i < lends.length; i++) {
+            _addPosition(lends[i].maturity, lends[i].cashAmount, lends[i].fCashAmount);
+        }
+    }
 
-        actions[0] = BalanceActionsWithTrades(
-            DepositActionType.DepositUnderlying,
-            currencyID,
-            availableWantBalance,
-            0, // TODO: review this
-            true, // TODO: review this
-            true, // TODO: review this
-            trade);
+    // Splits `_cashAmount` (internal precision) across the best ranked markets,
+    // skipping markets that would need a new position when the record is full.
+    // Each rung is one or more chunk lends into its market
+    function _getLadderLends(uint256 _cashAmount) internal view returns (Lend[] memory lends) {
+        MarketParameters[] memory markets = nProxy.getActiveMarkets(currencyID);
+        uint256[] memory ranking = _rankMarkets(markets);
+        uint256 freePositions = MAX_POSITIONS.sub(_positionsLength());
+        uint256 rungs;
+        uint256 count;
+        lends = new Lend[](ranking.length.mul(MAX_CHUNKS));
+
+        for (uint256 i = 0; i < ranking.length && rungs < ladderSize && _cashAmount > 0; i++) {
+            MarketParameters memory market = markets[ranking[i]];
+            bool isNewPosition = !_hasPosition(market.maturity);
+            if (isNewPosition && freePositions == 0) continue;
+
+            uint256 cashAmount = Math.min(
+                _cashAmount,
+                uint256(market.totalfCash).mul(maxMarketShareBPS).div(MAX_BPS)
+            );
+            if (cashAmount == 0) continue;
+
+            // a market trading under the rate bound from the first chunk is skipped
+            uint256 firstLend = count;
+            (count, cashAmount) = _getRungLends(lends, count, uint8(ranking[i] + 1), market, cashAmount);
+            if (count == firstLend) continue;
 
-        // TODO: check return value
-        nProxy.batchBalanceAndTradeAction(address(this), actions);
+            _cashAmount = _cashAmount.sub(cashAmount);
+            if (isNewPosition) freePositions--;
+            rungs++;
+        }
+
+        // shrink the array to the chunks actually used
+        assembly {
+            mstore(lends, count)
+        }
+    }
+
+    // Appends the lends of up to `_cashAmount` in one market to `_lends` from
+    // `_count`, returns the new count and the cash lent. A rung that would leave
+    // the market under the rate bound as a whole is split into chunks quoted
+    // cumulatively, so each is priced after the ones before it, and the first chunk
+    // under the bound ends the rung. Fields, and the market's last implied rate as
+    // the chunks move it, are written in place
+    function _getRungLends(
+        Lend[] memory _lends,
+        uint256 _count,
+        uint8 _marketIndex,
+        MarketParameters memory _market,
+        uint256 _cashAmount
+    ) internal view returns (uint256, uint256 cashLent) {
+        uint256 minImpliedRate = _getMinImpliedRate(_market.oracleRate);
+        uint256 fCashAmount = _getfCashAmountGivenCashAmount(_marketIndex, _cashAmount);
+        uint256 chunks = 1;
+        if (minImpliedRate > 0 && _getPostTradeRate(_market, _cashAmount, fCashAmount) < minImpliedRate) {
+            chunks = _getChunks(_market, _cashAmount);
+        }
+
+        uint256 fCashLent;
+        for (uint256 i = 1; i <= chunks; i++) {
+            uint256 cashAmount = _cashAmount.mul(i).div(chunks);
+            // a rung lent whole reuses the quote it was checked with
+            if (chunks > 1) {
+                fCashAmount = _getfCashAmountGivenCashAmount(_marketIndex, cashAmount);
+            }
+            Lend memory chunk = _lends[_count];
+            chunk.cashAmount = cashAmount.sub(cashLent);
+            chunk.fCashAmount = fCashAmount.sub(fCashLent);
+            _market.lastImpliedRate = _getPostTradeRate(_market, chunk.cashAmount, chunk.fCashAmount);
+            if (_market.lastImpliedRate < minImpliedRate) break;
+
+            chunk.marketIndex = _marketIndex;
+            chunk.maturity = _market.maturity;
+            chunk.minImpliedRate = uint32(minImpliedRate);
+            _count++;
+            cashLent = cashAmount;
+            fCashLent = fCashAmount;
+        }
+        return (_count, cashLent);
     }
 
-    function getTradeFrom(uint256 marketIndex, uint256 amount) internal returns (bytes32 trade) {
-        // TODO: replicate remix test
-        return bytes32(0);
+    // Estimate of the last implied rate a lend of `_cashAmount` for `_fCashAmount`
+    // leaves `_market` at. Notional bounds that post trade rate, which a lend lowers
+    // past the average rate it fills at: the fill rate is made continuously compounded
+    // like Notional's rates (ln(1 + rt) / t >= r - r^2 t / 2) and the rate assumed to
+    // fall geometrically across the trade, ending at fill rate^2 / pre trade rate
+    function _getPostTradeRate(
+        MarketParameters memory _market,
+        uint256 _cashAmount,
+        uint256 _fCashAmount
+    ) internal view returns (uint256) {
+        uint256 rate = _getImpliedRate(_market.maturity, _cashAmount, _fCashAmount);
+        if (rate == 0 || _market.lastImpliedRate == 0) {
+            return 0;
+        }
+        uint256 compounding = rate.mul(rate).mul(_market.maturity - block.timestamp).div(
+            RATE_PRECISION.mul(YEAR).mul(2)
+        );
+        rate = rate > compounding ? rate - compounding : 0;
+        return rate.mul(rate).div(_market.lastImpliedRate);
+    }
+
+    // Lowest rate a lend may leave a market with `_oracleRate` at, zero (no bound)
+    // when the tolerance is disabled
+    function _getMinImpliedRate(uint256 _oracleRate) internal view returns (uint256) {
+        uint256 tolerance = RATE_PRECISION.mul(maxRateSlippageBPS).div(MAX_BPS);
+        if (tolerance == 0 || _oracleRate <= tolerance) {
+            return 0;
+        }
+        return _oracleRate - tolerance;
+    }
+
+    // Chunks to split `_cashAmount` into so each moves the market's proportion
+    // (fCash over fCash plus cash) by at most the rate tolerance
+    function _getChunks(MarketParameters memory _market, uint256 _cashAmount) internal view returns (uint256) {
+        // only cTokens need a rate to value the market's asset cash
+        AssetRateParameters memory assetRate;
+        if (assetTokenType != TokenType.NonMintable) {
+            (, , , assetRate) = nProxy.getCurrencyAndRates(currencyID);
+        }
+        uint256 liquidity = uint256(_market.totalfCash).add(
+            _toUnderlyingCash(uint256(_market.totalAssetCash), assetRate)
+        );
+        uint256 chunkAmount = liquidity.mul(maxRateSlippageBPS).div(MAX_BPS);
+        if (chunkAmount == 0) {
+            return MAX_CHUNKS;
+        }
+        return Math.max(2, Math.min(MAX_CHUNKS, _cashAmount.add(chunkAmount - 1).div(chunkAmount)));
+    }
+
+    // Indexes (0 based) of the tradable markets sorted by last implied rate, highest first
+    function _rankMarkets(MarketParameters[] memory _markets) internal view returns (uint256[] memory ranking) {
+        ranking = new uint256[](Math.min(_markets.length, maxMarketIndex));
+        for (uint256 i = 0; i < ranking.length; i++) {
+            uint256 j = i;
+            while (j > 0 && _markets[ranking[j - 1]].lastImpliedRate < _markets[i].lastImpliedRate) {
+                ranking[j] = ranking[j - 1];
+                j--;
+            }
+            ranking[j] = i;
+        }
+    }
+
+    // Only deposit what the trades use (plus a 1 BPS buffer for rounding) so capped
+    // rungs don't mint and redeem cTokens for nothing
+    function _getDepositAmount(uint256 _availableWantBalance, uint256 _cashAmount) internal view returns (uint256) {
+        uint256 wantAmount = _toWantPrecision(_cashAmount);
+        return Math.min(_availableWantBalance, wantAmount.add(wantAmount.div(MAX_BPS)).add(1));
+    }
+
+    function getTradeFrom(
+        uint8 _marketIndex,
+        uint256 _fCashAmount,
+        uint32 _minImpliedRate
+    ) public pure returns (bytes32) {
+        return _encodeTrade(TradeActionType.Lend, _marketIndex, _fCashAmount, _minImpliedRate);
+    }
+
+    // Packs a Lend or Borrow trade, both share the same layout (see Types.sol):
+    // uint8 TradeActionType | uint8 MarketIndex | uint88 fCashAmount | uint32 min/maxImpliedRate | uint120 unused
+    function _encodeTrade(
+        TradeActionType _actionType,
+        uint8 _marketIndex,
+        uint256 _fCashAmount,
+        uint32 _impliedRateLimit
+    ) internal pure returns (bytes32) {
+        require(_fCashAmount <= type(uint88).max, "!fCashAmount");
+        return bytes32(
+            (uint256(uint8(_actionType)) << 248) |
+            (uint256(_marketIndex) << 240) |
+            (_fCashAmount << 152) |
+            (uint256(_impliedRateLimit) << 120)
+        );
     }
 
     function liquidatePosition(uint256 _amountNeeded)
@@ -131,36 +598,355 @@ contract Strategy is BaseStrategy {
         override
         returns (uint256 _liquidatedAmount, uint256 _loss)
     {
-        // TODO: Do stuff here to free up to `_amountNeeded` from all positions back into `want`
         // NOTE: Maintain invariant `want.balanceOf(this) >= _liquidatedAmount`
         // NOTE: Maintain invariant `_liquidatedAmount + _loss <= _amountNeeded`
 
-        // TODO: balanceOFWant shortcut
+        uint256 wantBalance = balanceOfWant();
+        if (wantBalance < _amountNeeded) {
+            // kept cash and redeemed nTokens are withdrawn with the sold fCash, valuing
+            // them on both sides keeps them from covering the slippage of the sale
+            uint256 valueBefore = _exitableValue();
+            // rounded up so dust is not left behind
+            _exitPositions(_toInternalPrecision(_amountNeeded - wantBalance).add(1));
+
+            // selling fCash before maturity realizes the difference between its
+            // book value and the cash received for it
+            uint256 valueSold = _toWantPrecision(valueBefore.sub(_exitableValue()));
+            uint256 received = balanceOfWant().sub(wantBalance);
+            if (valueSold > received) {
+                _loss = valueSold - received;
+            }
+            wantBalance = balanceOfWant();
+        }
+
+        _liquidatedAmount = Math.min(_amountNeeded, wantBalance);
+        _loss = Math.min(_loss, _amountNeeded.sub(_liquidatedAmount));
+    }
 
-        // TODO: calcualte amount of fCash that you need to sell
-        // TODO: sell fCash for underlying (want)
+    // Underlying value (internal precision) of what _exitPositions draws from
+    function _exitableValue() internal view returns (uint256) {
+        return _positionsValue().add(_cashBalance()).add(_nTokenValue());
+    }
 
-        // TODO: assess result 
+    // Frees `_cashAmount` (internal precision) in a single batch. Matured fCash is
+    // settled at its notional and kept cash withdrawn first, then nTokens are
+    // redeemed at their present value and only then fCash is sold from the most
+    // liquid markets
+    function _exitPositions(uint256 _cashAmount) internal {
+        // the batch below settles and withdraws any matured fCash
+        uint256 availableCash = _removeClosedPositions().add(_cashBalance());
+        _cashAmount = _cashAmount > availableCash ? _cashAmount - availableCash : 0;
 
-        uint256 totalAssets = want.balanceOf(address(this));
-        if (_amountNeeded > totalAssets) {
-            _liquidatedAmount = totalAssets;
-            _loss = _amountNeeded.sub(totalAssets);
-        } else {
-            _liquidatedAmount = _amountNeeded;
+        uint256 nTokensToRedeem;
+        bool redeemAllNTokens;
+        if (_cashAmount > 0 && hasNTokens) {
+            uint256 nTokenCash;
+            (nTokensToRedeem, nTokenCash, redeemAllNTokens) = _getNTokenRedeem(_cashAmount);
+            _cashAmount = _cashAmount > nTokenCash ? _cashAmount - nTokenCash : 0;
+        }
+
+        Exit[] memory exits;
+        if (_cashAmount > 0) {
+            exits = _getExits(_cashAmount, _positionsLength());
+        }
+        if (exits.length == 0 && availableCash == 0 && nTokensToRedeem == 0) {
+            return;
+        }
+
+        BalanceActionWithTrades[] memory actions = new BalanceActionWithTrades[](1);
+        // redeemed nTokens become cash withdrawn with the rest
+        actions[0].actionType = nTokensToRedeem > 0 ? DepositActionType.RedeemNToken : DepositActionType.None;
+        actions[0].depositActionAmount = nTokensToRedeem;
+        actions[0].currencyId = currencyID;
+        actions[0].withdrawEntireCashBalance = true;
+        actions[0].redeemToUnderlying = assetTokenType != TokenType.NonMintable;
+        actions[0].trades = new bytes32[](exits.length);
+        for (uint256 i = 0; i < exits.length; i++) {
+            // selling lent fCash is done by borrowing it back
+            actions[0].trades[i] = _encodeTrade(
+                TradeActionType.Borrow,
+                exits[i].marketIndex,
+                exits[i].fCashAmount,
+                0
+            );
+        }
+
+        _executeBatch(actions);
+        _setHasCashBalance(false);
+        if (redeemAllNTokens) {
+            hasNTokens = false;
+        }
+
+        for (uint256 i = 0; i < exits.length; i++) {
+            _reducePosition(exits[i].positionIndex, exits[i].fCashAmount);
+        }
+        _removeClosedPositions();
+    }
+
+    // nTokens to redeem for `_cashAmount` (internal precision) and the cash they are
+    // worth, all of them when they are worth less
+    function _getNTokenRedeem(uint256 _cashAmount)
+        internal
+        view
+        returns (
+            uint256 nTokenAmount,
+            uint256 cashAmount,
+            bool redeemAll
+        )
+    {
+        (uint256 nTokenBalance, uint256 totalSupply, uint256 presentValue) = _getNTokenState();
+        if (nTokenBalance == 0) {
+            return (0, 0, true);
+        }
+        cashAmount = nTokenBalance.mul(presentValue).div(totalSupply);
+        if (cashAmount <= _cashAmount) {
+            return (nTokenBalance, cashAmount, true);
+        }
+        // rounded up so the redemption covers `_cashAmount`
+        nTokenAmount = Math.min(nTokenBalance, _cashAmount.mul(totalSupply).div(presentValue).add(1));
+        return (nTokenAmount, _cashAmount, nTokenAmount == nTokenBalance);
+    }
+
+    // fCash to sell from the most liquid markets to raise `_cashAmount`
+    function _getExits(uint256 _cashAmount, uint256 _length) internal view returns (Exit[] memory exits) {
+        MarketParameters[] memory markets = nProxy.getActiveMarkets(currencyID);
+        exits = _rankPositions(markets, _length);
+        uint256 count;
+        for (; count < exits.length && _cashAmount > 0; count++) {
+            Exit memory sale = exits[count];
+            uint256 cashAmount = _getCashAmountGivenfCashAmount(sale.marketIndex, sale.fCashAmount);
+            if (cashAmount > _cashAmount) {
+                // smaller sales move the rate less, so the pro rata fCash raises enough cash
+                sale.fCashAmount = Math.min(
+                    sale.fCashAmount,
+                    sale.fCashAmount.mul(_cashAmount).div(cashAmount).add(1)
+                );
+                _cashAmount = 0;
+            } else {
+                _cashAmount -= cashAmount;
+            }
+        }
+
+        assembly {
+            mstore(exits, count)
+        }
+    }
+
+    // Positions that can be sold on a market, most liquid market first
+    function _rankPositions(MarketParameters[] memory _markets, uint256 _length)
+        internal
+        view
+        returns (Exit[] memory exits)
+    {
+        exits = new Exit[](_length);
+        uint256 count;
+        for (uint256 i = 0; i < _length; i++) {
+            (uint256 maturity, , uint256 fCashAmount) = _unpackPosition(positions[i]);
+            for (uint256 j = 0; j < _markets.length; j++) {
+                if (_markets[j].maturity != maturity) continue;
+
+                uint256 k = count;
+                while (k > 0 && _markets[exits[k - 1].marketIndex - 1].totalfCash < _markets[j].totalfCash) {
+                    exits[k] = exits[k - 1];
+                    k--;
+                }
+                exits[k] = Exit(i, uint8(j + 1), fCashAmount);
+                count++;
+                break;
+            }
+        }
+
+        assembly {
+            mstore(exits, count)
         }
     }
 
+    // Unwinds everything in a single batch: every fCash asset Notional reports
+    // (bitmap or array portfolio) that has a market is sold back, matured fCash is
+    // settled, nTokens are redeemed and the whole cash balance is withdrawn as want.
+    // fCash without a market (idiosyncratic maturities) can't be sold and stays
     function liquidateAllPositions() internal override returns (uint256) {
-        // TODO: Liquidate all positions and return the amount freed.
-        return want.balanceOf(address(this));
+        _removeClosedPositions();
+        MarketParameters[] memory markets = nProxy.getActiveMarkets(currencyID);
+        PortfolioAsset[] memory portfolio = nProxy.getAccountPortfolio(address(this));
+        bytes32[] memory trades = new bytes32[](portfolio.length);
+        uint256 count;
+        bool hasMaturedfCash;
+        for (uint256 i = 0; i < portfolio.length; i++) {
+            PortfolioAsset memory asset = portfolio[i];
+            if (asset.currencyId != currencyID || asset.assetType != FCASH_ASSET_TYPE || asset.notional <= 0) continue;
+            if (asset.maturity <= block.timestamp) {
+                hasMaturedfCash = true;
+                continue;
+            }
+            uint8 marketIndex = _getMarketIndex(markets, asset.maturity);
+            if (marketIndex == 0) continue;
+            // selling lent fCash is done by borrowing it back
+            trades[count++] = _encodeTrade(TradeActionType.Borrow, marketIndex, uint256(asset.notional), 0);
+        }
+        assembly {
+            mstore(trades, count)
+        }
+
+        (int256 cashBalance, int256 nTokenBalance, ) = nProxy.getAccountBalance(currencyID, address(this));
+        if (count == 0 && !hasMaturedfCash && cashBalance <= 0 && nTokenBalance <= 0) {
+            return balanceOfWant();
+        }
+        BalanceActionWithTrades[] memory actions = new BalanceActionWithTrades[](1);
+        if (nTokenBalance > 0) {
+            actions[0].actionType = DepositActionType.RedeemNToken;
+            actions[0].depositActionAmount = uint256(nTokenBalance);
+        }
+        actions[0].currencyId = currencyID;
+        actions[0].withdrawEntireCashBalance = true;
+        actions[0].redeemToUnderlying = assetTokenType != TokenType.NonMintable;
+        actions[0].trades = trades;
+        _executeBatch(actions);
+        _setHasCashBalance(false);
+        if (hasNTokens) {
+            hasNTokens = false;
+        }
+
+        // sold maturities leave the record, only fCash without a market remains
+        uint256 length = _positionsLength();
+        for (uint256 i = 0; i < length; i++) {
+            (uint256 maturity, , uint256 fCashAmount) = _unpackPosition(positions[i]);
+            if (_getMarketIndex(markets, maturity) > 0) {
+                _reducePosition(i, fCashAmount);
+            }
+        }
+        _removeClosedPositions();
+        return balanceOfWant();
     }
 
-    // NOTE: Can override `tendTrigger` and `harvestTrigger` if necessary
+    // Index (1 based) of the market maturing at `_maturity`, zero when there is none
+    function _getMarketIndex(MarketParameters[] memory _markets, uint256 _maturity) internal pure returns (uint8) {
+        for (uint256 i = 0; i < _markets.length; i++) {
+            if (_markets[i].maturity == _maturity) return uint8(i + 1);
+        }
+        return 0;
+    }
+
+    // Matured fCash stops earning the fixed rate until it is lent again, so a
+    // harvest is due once rolling it over pays for the gas. BaseStrategy's gates
+    // apply first and its triggers are checked before pricing the rollover
+    function harvestTrigger(uint256 callCostInWei) public view override returns (bool) {
+        StrategyParams memory params = vault.strategies(address(this));
+        if (params.activation == 0 || block.timestamp.sub(params.lastReport) < minReportDelay) {
+            return false;
+        }
+        if (super.harvestTrigger(callCostInWei)) {
+            return true;
+        }
+        uint256 maturedCash = _maturedCash();
+        if (maturedCash == 0) {
+            return false;
+        }
+        uint256 callCost = ethToWant(callCostInWei);
+        return _expectedLendingProfit(_toWantPrecision(maturedCash)) > profitFactor.mul(callCost);
+    }
 
+    // Tending lends idle want without reporting, only worth it when the interest
+    // earned until maturity pays for the gas
+    function tendTrigger(uint256 callCostInWei) public view override returns (bool) {
+        if (emergencyExit) {
+            return false;
+        }
+        uint256 wantBalance = balanceOfWant();
+        uint256 debtOutstanding = vault.debtOutstanding();
+        if (wantBalance <= debtOutstanding || wantBalance - debtOutstanding < minAmountWant) {
+            return false;
+        }
+        uint256 callCost = ethToWant(callCostInWei);
+        return _expectedLendingProfit(wantBalance - debtOutstanding) > profitFactor.mul(callCost);
+    }
+
+    // Interest `_wantAmount` would earn lent in the best market until its maturity.
+    // Zero while that market trades below its oracle rate: a large trade just moved
+    // it against lenders and waiting for it to revert is cheaper
+    function _expectedLendingProfit(uint256 _wantAmount) internal view returns (uint256) {
+        MarketParameters[] memory markets = nProxy.getActiveMarkets(currencyID);
+        uint256[] memory ranking = _rankMarkets(markets);
+        if (ranking.length == 0) {
+            return 0;
+        }
+        MarketParameters memory market = markets[ranking[0]];
+        if (market.lastImpliedRate < market.oracleRate) {
+            return 0;
+        }
+        uint256 timeToMaturity = market.maturity.sub(block.timestamp);
+        return _wantAmount.mul(market.lastImpliedRate).mul(timeToMaturity).div(YEAR).div(RATE_PRECISION);
+    }
+
+    // Open fCash positions move to the new strategy as Notional ERC1155 tokens,
+    // so nothing is traded twice. Kept cash, nTokens and matured fCash become want
     function prepareMigration(address _newStrategy) internal override {
-        // TODO: Transfer any non-`want` tokens to the new strategy
         // NOTE: `migrate` will automatically forward all `want` in this strategy to the new one
+        // so a kept cash balance is withdrawn, nTokens are redeemed and matured fCash is settled first
+        if (hasNTokens) {
+            _exitPositions(_cashBalance().add(_maturedCash()).add(_nTokenValue()));
+        } else {
+            _exitPositions(0);
+        }
+        _transferPositions(_newStrategy);
+        if (address(noteToken) != address(0)) {
+            uint256 noteBalance = noteToken.balanceOf(address(this));
+            if (noteBalance > 0) {
+                noteToken.safeTransfer(_newStrategy, noteBalance);
+            }
+        }
+    }
+
+    // Sends every open position's fCash balance to `_to` in one batch transfer, with
+    // the positions' book values for the receiver's record
+    function _transferPositions(address _to) internal {
+        uint256 length = _positionsLength();
+        if (length == 0) {
+            return;
+        }
+        address[] memory accounts = new address[](length);
+        uint256[] memory ids = new uint256[](length);
+        uint256[] memory bookValues = new uint256[](length);
+        for (uint256 i = 0; i < length; i++) {
+            (uint256 maturity, uint256 impliedRate, uint256 fCashAmount) = _unpackPosition(positions[i]);
+            accounts[i] = address(this);
+            ids[i] = _encodefCashId(maturity);
+            bookValues[i] = _presentValue(maturity, impliedRate, fCashAmount);
+            delete positions[i];
+        }
+
+        int256[] memory balances = nProxy.signedBalanceOfBatch(accounts, ids);
+        uint256[] memory amounts = new uint256[](length);
+        for (uint256 i = 0; i < length; i++) {
+            // a negative balance would be debt, never a position to hand over
+            require(balances[i] > 0, "!fCash");
+            amounts[i] = uint256(balances[i]);
+        }
+        nProxy.safeBatchTransferFrom(address(this), _to, ids, amounts, abi.encode(bookValues));
+    }
+
+    // Takes the fCash of a strategy of the same vault migrating here, positions
+    // keep the book values (and so the rates) they had there
+    function onERC1155BatchReceived(
+        address,
+        address _from,
+        uint256[] calldata _ids,
+        uint256[] calldata _values,
+        bytes calldata _data
+    ) external returns (bytes4) {
+        require(msg.sender == address(nProxy) && vault.strategies(_from).activation > 0, "!migration");
+        uint256[] memory bookValues = abi.decode(_data, (uint256[]));
+        for (uint256 i = 0; i < _ids.length; i++) {
+            require(_ids[i] == _encodefCashId(uint40(_ids[i] >> 8)), "!fCash");
+            _addPosition(uint40(_ids[i] >> 8), bookValues[i], _values[i]);
+        }
+        return ERC1155_BATCH_ACCEPTED;
+    }
+
+    // Notional's ERC1155 id of want's fCash at `_maturity`, as encodeToId packs it:
+    // uint16 currencyId | uint40 maturity | uint8 assetType
+    function _encodefCashId(uint256 _maturity) internal view returns (uint256) {
+        return (uint256(currencyID) << 48) | (uint256(uint40(_maturity)) << 8) | FCASH_ASSET_TYPE;
     }
 
     // Override this to add all tokens/tokenized positions this contract manages
@@ -204,8 +990,16 @@ contract Strategy is BaseStrategy {
         override
         returns (uint256)
     {
-        // TODO create an accurate price oracle
-        return _amtInWei;
+        if (address(rateOracle) == address(0)) {
+            return _amtInWei.mul(ethToWantNumerator).div(ethToWantDenominator);
+        }
+
+        (, int256 answer, , , ) = rateOracle.latestRoundData();
+        require(answer > 0, "!rate");
+        if (rateMustInvert) {
+            return _amtInWei.mul(uint256(answer)).mul(ethToWantNumerator).div(ethToWantDenominator);
+        }
+        return _amtInWei.mul(ethToWantNumerator).div(uint256(answer).mul(ethToWantDenominator));
     }
 
     // INTERNAL FUNCTIONS
@@ -215,6 +1009,365 @@ contract Strategy is BaseStrategy {
         return want.balanceOf(address(this));
     }
 
+    // Underlying value (internal precision) of the cash balance kept in Notional,
+    // converted like Notional's AssetRate.convertToUnderlying
+    function _cashBalance() internal view returns (uint256) {
+        if (!hasCashBalance) {
+            return 0;
+        }
+        (int256 cashBalance, , ) = nProxy.getAccountBalance(currencyID, address(this));
+        if (cashBalance <= 0) {
+            return 0;
+        }
+        (, , , AssetRateParameters memory assetRate) = nProxy.getCurrencyAndRates(currencyID);
+        return _toUnderlyingCash(uint256(cashBalance), assetRate);
+    }
+
+    // Underlying value (internal precision) of `_assetCash`, want that is its own
+    // asset token (NonMintable) is worth its amount and needs no rate
+    function _toUnderlyingCash(uint256 _assetCash, AssetRateParameters memory _assetRate)
+        internal
+        view
+        returns (uint256)
+    {
+        if (assetTokenType == TokenType.NonMintable) {
+            return _assetCash;
+        }
+        return
+            _assetCash.mul(uint256(_assetRate.rate)).div(ASSET_RATE_DECIMAL_DIFFERENCE).div(
+                uint256(_assetRate.underlyingDecimals)
+            );
+    }
+
+    // Asset cash (internal precision) worth `_underlyingAmount`, rounded up
+    function _toAssetCash(uint256 _underlyingAmount) internal view returns (uint256) {
+        (, , , AssetRateParameters memory assetRate) = nProxy.getCurrencyAndRates(currencyID);
+        uint256 rate = uint256(assetRate.rate);
+        return
+            _underlyingAmount.mul(ASSET_RATE_DECIMAL_DIFFERENCE).mul(uint256(assetRate.underlyingDecimals)).add(rate - 1).div(
+                rate
+            );
+    }
+
+    // Underlying value (internal precision) of the strategy's nTokens
+    function _nTokenValue() internal view returns (uint256) {
+        if (!hasNTokens) {
+            return 0;
+        }
+        (uint256 nTokenBalance, uint256 totalSupply, uint256 presentValue) = _getNTokenState();
+        if (nTokenBalance == 0) {
+            return 0;
+        }
+        return nTokenBalance.mul(presentValue).div(totalSupply);
+    }
+
+    // The strategy's nToken balance, the nToken supply and the present value of the
+    // whole nToken in underlying (internal precision)
+    function _getNTokenState()
+        internal
+        view
+        returns (
+            uint256 nTokenBalance,
+            uint256 totalSupply,
+            uint256 presentValue
+        )
+    {
+        (, int256 balance, ) = nProxy.getAccountBalance(currencyID, address(this));
+        if (balance <= 0) {
+            return (0, 0, 0);
+        }
+        (, totalSupply, , , , , , ) = nProxy.getNTokenAccount(nProxy.nTokenAddress(currencyID));
+        nTokenBalance = uint256(balance);
+        presentValue = uint256(nProxy.nTokenPresentValueUnderlyingDenominated(currencyID));
+    }
+
+    // NOTE accrues to nToken holders, claimed tokens stay here until they are swept
+    // or migrated
+    function _claimIncentives() internal {
+        if (nProxy.nTokenGetClaimableIncentives(address(this), block.timestamp) == 0) {
+            return;
+        }
+        nProxy.nTokenClaimIncentives();
+        if (address(noteToken) == address(0)) {
+            noteToken = IERC20(nProxy.getNoteToken());
+        }
+    }
+
+    // Only written on changes, it shares a slot with the ladder settings
+    function _setHasCashBalance(bool _hasCashBalance) internal {
+        if (hasCashBalance != _hasCashBalance) {
+            hasCashBalance = _hasCashBalance;
+        }
+    }
+
+    function _toInternalPrecision(uint256 _wantAmount) internal view returns (uint256) {
+        return _wantAmount.mul(INTERNAL_TOKEN_PRECISION).div(uint256(10)**wantDecimals);
+    }
+
+    function _toWantPrecision(uint256 _internalAmount) internal view returns (uint256) {
+        return _internalAmount.mul(uint256(10)**wantDecimals).div(INTERNAL_TOKEN_PRECISION);
+    }
+
+    // Runs a batch for this strategy. Notional's ETH currency takes and returns
+    // ETH, so a WETH want is unwrapped for the deposit and wrapped back afterwards
+    function _executeBatch(BalanceActionWithTrades[] memory _actions) internal {
+        if (assetTokenType != TokenType.cETH) {
+            nProxy.batchBalanceAndTradeAction(address(this), _actions);
+            return;
+        }
+
+        uint256 depositAmount;
+        if (
+            _actions[0].actionType == DepositActionType.DepositUnderlying ||
+            _actions[0].actionType == DepositActionType.DepositUnderlyingAndMintNToken
+        ) {
+            depositAmount = _actions[0].depositActionAmount;
+            IWETH(address(want)).withdraw(depositAmount);
+        }
+        nProxy.batchBalanceAndTradeAction{value: depositAmount}(address(this), _actions);
+        uint256 ethBalance = address(this).balance;
+        if (ethBalance > 0) {
+            IWETH(address(want)).deposit{value: ethBalance}();
+        }
+    }
+
+    // Value of fCash discounted at `_impliedRate`, matured fCash is worth its notional
+    function _presentValue(
+        uint256 _maturity,
+        uint256 _impliedRate,
+        uint256 _fCashAmount
+    ) internal view returns (uint256) {
+        if (_maturity <= block.timestamp) {
+            return _fCashAmount;
+        }
+        uint256 discount = RATE_PRECISION.add(_impliedRate.mul(_maturity - block.timestamp).div(YEAR));
+        return _fCashAmount.mul(RATE_PRECISION).div(discount);
+    }
+
+    // Inverse of _presentValue: annualized rate that turns `_cashAmount` into `_fCashAmount`
+    function _getImpliedRate(
+        uint256 _maturity,
+        uint256 _cashAmount,
+        uint256 _fCashAmount
+    ) internal view returns (uint256) {
+        if (_maturity <= block.timestamp || _fCashAmount <= _cashAmount) {
+            return 0;
+        }
+        uint256 rate = _fCashAmount.sub(_cashAmount).mul(RATE_PRECISION).mul(YEAR).div(_cashAmount).div(
+            _maturity - block.timestamp
+        );
+        return Math.min(rate, type(uint32).max);
+    }
+
+    // POSITIONS
+
+    function getPositions()
+        external
+        view
+        returns (
+            uint256[] memory maturities,
+            uint256[] memory impliedRates,
+            uint256[] memory fCashAmounts
+        )
+    {
+        uint256 length = _positionsLength();
+        maturities = new uint256[](length);
+        impliedRates = new uint256[](length);
+        fCashAmounts = new uint256[](length);
+        for (uint256 i = 0; i < length; i++) {
+            (maturities[i], impliedRates[i], fCashAmounts[i]) = _unpackPosition(positions[i]);
+        }
+    }
+
+    function _hasPosition(uint256 _maturity) internal view returns (bool) {
+        for (uint256 i = 0; i < MAX_POSITIONS; i++) {
+            (uint256 maturity, , ) = _unpackPosition(positions[i]);
+            if (maturity == _maturity) return true;
+            if (maturity == 0) break;
+        }
+        return false;
+    }
+
+    // Notional of the matured positions, settled at the next batch
+    function _maturedCash() internal view returns (uint256 cashAmount) {
+        for (uint256 i = 0; i < MAX_POSITIONS; i++) {
+            (uint256 maturity, , uint256 fCashAmount) = _unpackPosition(positions[i]);
+            if (maturity == 0) break;
+            if (maturity <= block.timestamp) {
+                cashAmount = cashAmount.add(fCashAmount);
+            }
+        }
+    }
+
+    function _positionsLength() internal view returns (uint256 length) {
+        while (length < MAX_POSITIONS && positions[length] != 0) {
+            length++;
+        }
+    }
+
+    // Book value of the positions, accrued at the rate each one was lent at
+    function _positionsValue() internal view returns (uint256 value) {
+        for (uint256 i = 0; i < MAX_POSITIONS; i++) {
+            uint128 position = positions[i];
+            if (position == 0) break;
+            (uint256 maturity, uint256 impliedRate, uint256 fCashAmount) = _unpackPosition(position);
+            value = value.add(_presentValue(maturity, impliedRate, fCashAmount));
+        }
+    }
+
+    // Adds lent fCash to the position of the same maturity (or a new one), keeping
+    // the position's book value equal to the previous value plus the cash lent
+    function _addPosition(
+        uint256 _maturity,
+        uint256 _cashAmount,
+        uint256 _fCashAmount
+    ) internal {
+        for (uint256 i = 0; i < MAX_POSITIONS; i++) {
+            (uint256 maturity, uint256 impliedRate, uint256 fCashAmount) = _unpackPosition(positions[i]);
+            if (maturity == 0 || maturity == _maturity) {
+                uint256 cashAmount = _cashAmount.add(_presentValue(_maturity, impliedRate, fCashAmount));
+                fCashAmount = fCashAmount.add(_fCashAmount);
+                impliedRate = _getImpliedRate(_maturity, cashAmount, fCashAmount);
+                positions[i] = _packPosition(_maturity, impliedRate, fCashAmount);
+                return;
+            }
+        }
+        revert("!positions");
+    }
+
+    // Sold fCash keeps the position's rate, its book value shrinks pro rata
+    function _reducePosition(uint256 _index, uint256 _fCashAmount) internal {
+        (uint256 maturity, uint256 impliedRate, uint256 fCashAmount) = _unpackPosition(positions[_index]);
+        positions[_index] = _packPosition(maturity, impliedRate, fCashAmount.sub(_fCashAmount));
+    }
+
+    // Drops matured (settled by Notional) and fully sold positions, returns the
+    // notional of the matured ones
+    function _removeClosedPositions() internal returns (uint256 maturedCash) {
+        uint256 length = _positionsLength();
+        uint256 i = 0;
+        while (i < length) {
+            (uint256 maturity, , uint256 fCashAmount) = _unpackPosition(positions[i]);
+            if (maturity <= block.timestamp || fCashAmount == 0) {
+                if (maturity <= block.timestamp) {
+                    maturedCash = maturedCash.add(fCashAmount);
+                }
+                // move the last position into the gap to keep them contiguous
+                length--;
+                positions[i] = positions[length];
+                delete positions[length];
+            } else {
+                i++;
+            }
+        }
+    }
+
+    function _packPosition(
+        uint256 _maturity,
+        uint256 _impliedRate,
+        uint256 _fCashAmount
+    ) internal pure returns (uint128) {
+        require(_fCashAmount <= type(uint64).max, "!fCashAmount");
+        return uint128((_maturity << 96) | (_impliedRate << 64) | _fCashAmount);
+    }
+
+    function _unpackPosition(uint128 _position)
+        internal
+        pure
+        returns (
+            uint256 maturity,
+            uint256 impliedRate,
+            uint256 fCashAmount
+        )
+    {
+        maturity = uint256(_position >> 96);
+        impliedRate = uint256(uint32(_position >> 64));
+        fCashAmount = uint256(uint64(_position));
+    }
+
     // NOTIONAL FUNCTIONS
 
+    // Marks fCash to market reading the whole portfolio from Notional and discounting
+    // each asset at the oracle rate of its maturity
+    function _portfolioValue() internal view returns (uint256 value) {
+        PortfolioAsset[] memory portfolio = nProxy.getAccountPortfolio(address(this));
+        if (portfolio.length == 0) {
+            return 0;
+        }
+        MarketParameters[] memory markets = nProxy.getActiveMarkets(currencyID);
+        for (uint256 i = 0; i < portfolio.length; i++) {
+            PortfolioAsset memory asset = portfolio[i];
+            if (
+                asset.currencyId != currencyID ||
+                asset.assetType != FCASH_ASSET_TYPE ||
+                asset.notional <= 0
+            ) {
+                continue;
+            }
+            uint256 oracleRate = _getOracleRate(markets, asset.maturity);
+            value = value.add(_presentValue(asset.maturity, oracleRate, uint256(asset.notional)));
+        }
+    }
+
+    // Interpolates between the oracle rates of the markets around `_maturity`,
+    // the same way Notional values idiosyncratic fCash
+    function _getOracleRate(MarketParameters[] memory _markets, uint256 _maturity)
+        internal
+        pure
+        returns (uint256)
+    {
+        if (_markets.length == 0) {
+            return 0;
+        }
+        for (uint256 i = 0; i < _markets.length; i++) {
+            if (_markets[i].maturity < _maturity) continue;
+            if (_markets[i].maturity == _maturity || i == 0) {
+                return _markets[i].oracleRate;
+            }
+            MarketParameters memory shorter = _markets[i - 1];
+            MarketParameters memory longer = _markets[i];
+            uint256 elapsed = _maturity - shorter.maturity;
+            uint256 term = longer.maturity - shorter.maturity;
+            if (longer.oracleRate >= shorter.oracleRate) {
+                return shorter.oracleRate.add(longer.oracleRate.sub(shorter.oracleRate).mul(elapsed).div(term));
+            }
+            return shorter.oracleRate.sub(shorter.oracleRate.sub(longer.oracleRate).mul(elapsed).div(term));
+        }
+        return _markets[_markets.length - 1].oracleRate;
+    }
+
+    // fCash received when lending `_cashAmount` (internal precision) in `_marketIndex`
+    function _getfCashAmountGivenCashAmount(uint8 _marketIndex, uint256 _cashAmount)
+        internal
+        view
+        returns (uint256)
+    {
+        require(_cashAmount <= uint256(type(int88).max), "!cashAmount");
+        // Lending takes cash from the account, so the net cash to account is negative
+        int256 fCashAmount = nProxy.getfCashAmountGivenCashAmount(
+            currencyID,
+            -int88(_cashAmount),
+            _marketIndex,
+            block.timestamp
+        );
+        return uint256(fCashAmount);
+    }
+
+    // Cash (internal precision, underlying) received when selling `_fCashAmount` in `_marketIndex`
+    function _getCashAmountGivenfCashAmount(uint8 _marketIndex, uint256 _fCashAmount)
+        internal
+        view
+        returns (uint256)
+    {
+        require(_fCashAmount <= uint256(type(int88).max), "!fCashAmount");
+        // Selling fCash is a negative fCash change for the account
+        (, int256 underlyingCashAmount) = nProxy.getCashAmountGivenfCashAmount(
+            currencyID,
+            -int88(_fCashAmount),
+            _marketIndex,
+            block.timestamp
+        );
+        return uint256(underlyingCashAmount);
+    }
+
 }
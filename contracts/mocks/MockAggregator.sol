@@ -0,0 +1,80 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import "../../interfaces/chainlink/AggregatorV2V3Interface.sol";
+
+// Chainlink feed with a settable answer, every update is a new round
+contract MockAggregator is AggregatorV2V3Interface {
+    uint8 public override decimals;
+    string public override description;
+    uint256 public override version = 3;
+
+    uint80 private round;
+    mapping(uint256 => int256) private answers;
+    mapping(uint256 => uint256) private timestamps;
+
+    constructor(uint8 _decimals, int256 _answer) public {
+        decimals = _decimals;
+        description = "MockAggregator";
+        setAnswer(_answer);
+    }
+
+    function setAnswer(int256 _answer) public {
+        round++;
+        answers[round] = _answer;
+        timestamps[round] = block.timestamp;
+        emit AnswerUpdated(_answer, round, block.timestamp);
+        emit NewRound(round, msg.sender, block.timestamp);
+    }
+
+    function latestAnswer() external view override returns (int256) {
+        return answers[round];
+    }
+
+    function latestTimestamp() external view override returns (uint256) {
+        return timestamps[round];
+    }
+
+    function latestRound() external view override returns (uint256) {
+        return round;
+    }
+
+    function getAnswer(uint256 _roundId) external view override returns (int256) {
+        return answers[_roundId];
+    }
+
+    function getTimestamp(uint256 _roundId) external view override returns (uint256) {
+        return timestamps[_roundId];
+    }
+
+    function getRoundData(uint80 _roundId)
+        public
+        view
+        override
+        returns (
+            uint80 roundId,
+            int256 answer,
+            uint256 startedAt,
+            uint256 updatedAt,
+            uint80 answeredInRound
+        )
+    {
+        require(timestamps[_roundId] > 0, "No data present");
+        return (_roundId, answers[_roundId], timestamps[_roundId], timestamps[_roundId], _roundId);
+    }
+
+    function latestRoundData()
+        external
+        view
+        override
+        returns (
+            uint80 roundId,
+            int256 answer,
+            uint256 startedAt,
+            uint256 updatedAt,
+            uint80 answeredInRound
+        )
+    {
+        return getRoundData(round);
+    }
+}
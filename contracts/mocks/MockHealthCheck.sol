@@ -0,0 +1,18 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+// Same default limits as the live CommonHealthCheck: any profit, losses up to 1 BPS of the debt
+contract MockHealthCheck {
+    uint256 private constant MAX_BPS = 10_000;
+    uint256 public lossLimitRatio = 1;
+
+    function check(
+        uint256 profit,
+        uint256 loss,
+        uint256 debtPayment,
+        uint256 debtOutstanding,
+        uint256 totalDebt
+    ) external view returns (bool) {
+        return loss <= totalDebt * lossLimitRatio / MAX_BPS;
+    }
+}
@@ -0,0 +1,779 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import {SafeMath} from "@openzeppelin/contracts/math/SafeMath.sol";
+import {SignedSafeMath} from "@openzeppelin/contracts/math/SignedSafeMath.sol";
+import {IERC20, SafeERC20} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+import {Address} from "@openzeppelin/contracts/utils/Address.sol";
+
+import "../../interfaces/notional/Types.sol";
+import "./MockERC20.sol";
+
+interface IERC20Decimals {
+    function decimals() external view returns (uint8);
+}
+
+interface IERC1155BatchReceiver {
+    function onERC1155BatchReceived(
+        address operator,
+        address from,
+        uint256[] calldata ids,
+        uint256[] calldata values,
+        bytes calldata data
+    ) external returns (bytes4);
+}
+
+// Stand-in for the Notional proxy on a local dev chain, implementing the views and
+// actions the strategy uses with the same signatures. Tokens are listed the way
+// Notional lists NonMintable currencies, asset cash is the token itself (an asset
+// rate of 1), and ETH as cETH over Ether. Each market prices fCash with simple interest at a
+// rate that moves with the share of its fCash liquidity a trade takes. Accounts can
+// only lend: fCash and cash balances never go negative. nTokens hold their
+// liquidity as cash, so their present value is that cash, and accrue NOTE at a
+// fixed rate per nToken. fCash is transferable as ERC1155 tokens, without approvals.
+contract MockNotional {
+    using SafeMath for uint256;
+    using SignedSafeMath for int256;
+    using SafeERC20 for IERC20;
+
+    int256 private constant INTERNAL_TOKEN_PRECISION = 1e8;
+    uint256 private constant RATE_PRECISION = 1e9;
+    uint256 private constant YEAR = 360 days;
+    uint256 private constant QUARTER = 90 days;
+    uint256 private constant FCASH_ASSET_TYPE = 1;
+    uint256 private constant ORACLE_TIME_WINDOW = 1 hours;
+    bytes4 private constant ERC1155_BATCH_ACCEPTED = 0xbc197c81;
+
+    event LendBorrowTrade(
+        address indexed account,
+        uint16 indexed currencyId,
+        uint40 maturity,
+        int256 netAssetCash,
+        int256 netfCash
+    );
+    event MarketsInitialized(uint16 currencyId);
+    event TransferBatch(
+        address indexed operator,
+        address indexed from,
+        address indexed to,
+        uint256[] ids,
+        uint256[] values
+    );
+
+    struct Currency {
+        // zero for ETH
+        address underlying;
+        int256 decimals;
+        ETHRateStorage ethRate;
+        uint8 maxMarketIndex;
+        int256 defaultfCash;
+        uint256 defaultRate;
+    }
+
+    struct Market {
+        int256 totalfCash;
+        int256 totalCash;
+        uint256 lastImpliedRate;
+        uint256 oracleRate;
+        uint256 previousTradeTime;
+    }
+
+    struct Asset {
+        uint16 currencyId;
+        uint256 maturity;
+    }
+
+    uint16 public maxCurrencyId;
+    mapping(uint16 => Currency) private currencies;
+    // currency => maturity => market
+    mapping(uint16 => mapping(uint256 => Market)) private markets;
+    // account => currency => internal precision cash
+    mapping(address => mapping(uint16 => int256)) private cashBalances;
+    mapping(address => Asset[]) private portfolios;
+    // account => currency => maturity => fCash
+    mapping(address => mapping(uint16 => mapping(uint256 => int256))) private fCashBalances;
+
+    struct NToken {
+        int256 totalSupply;
+        // internal precision
+        int256 cash;
+    }
+
+    MockERC20 public noteToken;
+    // NOTE (1e8) per nToken (1e8) per year
+    uint256 public incentiveRate;
+    mapping(uint16 => NToken) private nTokens;
+    // account => currency => nTokens
+    mapping(address => mapping(uint16 => int256)) private nTokenBalances;
+    mapping(address => mapping(uint16 => uint256)) private lastClaimTimes;
+
+    constructor() public {
+        noteToken = new MockERC20("Notional", "NOTE", 8);
+        // ETH is always listed first and has no rate oracle
+        listCurrency(address(0), AggregatorV2V3Interface(0), 18, false, 3);
+    }
+
+    /* Setup */
+
+    function listCurrency(
+        address _underlying,
+        AggregatorV2V3Interface _rateOracle,
+        uint8 _rateDecimalPlaces,
+        bool _mustInvert,
+        uint8 _maxMarketIndex
+    ) public returns (uint16 currencyId) {
+        require(_maxMarketIndex > 0 && _maxMarketIndex <= 7, "Invalid market index");
+        currencyId = ++maxCurrencyId;
+        Currency storage currency = currencies[currencyId];
+        currency.underlying = _underlying;
+        uint256 decimals = _underlying == address(0) ? 18 : IERC20Decimals(_underlying).decimals();
+        currency.decimals = int256(uint256(10)**decimals);
+        currency.ethRate.rateOracle = _rateOracle;
+        currency.ethRate.rateDecimalPlaces = _rateDecimalPlaces;
+        currency.ethRate.mustInvert = _mustInvert;
+        currency.maxMarketIndex = _maxMarketIndex;
+    }
+
+    function setIncentiveRate(uint256 _incentiveRate) external {
+        incentiveRate = _incentiveRate;
+    }
+
+    // Liquidity (fCash, internal precision) and rate new markets start with
+    function setMarketDefaults(
+        uint16 _currencyId,
+        uint256 _totalfCash,
+        uint256 _rate
+    ) external {
+        Currency storage currency = _getCurrency(_currencyId);
+        currency.defaultfCash = int256(_totalfCash);
+        currency.defaultRate = _rate;
+    }
+
+    // Sets up the markets of the current quarter that don't exist yet
+    function initializeMarkets(uint16 currencyId, bool) external {
+        Currency storage currency = _getCurrency(currencyId);
+        require(currency.defaultfCash > 0, "No market defaults");
+        for (uint256 i = 1; i <= currency.maxMarketIndex; i++) {
+            Market storage market = markets[currencyId][_getMaturity(i, block.timestamp)];
+            if (market.totalfCash > 0) continue;
+
+            market.totalfCash = currency.defaultfCash;
+            market.totalCash = currency.defaultfCash;
+            market.lastImpliedRate = currency.defaultRate;
+            market.oracleRate = currency.defaultRate;
+            market.previousTradeTime = block.timestamp;
+        }
+        emit MarketsInitialized(currencyId);
+    }
+
+    /* Actions */
+
+    function batchBalanceAndTradeAction(address account, BalanceActionWithTrades[] memory actions)
+        external
+        payable
+    {
+        require(account == msg.sender, "Unauthorized");
+        _settleAccount(account);
+        for (uint256 i = 0; i < actions.length; i++) {
+            _executeAction(account, actions[i]);
+        }
+    }
+
+    /* Views */
+
+    function getCurrency(uint16 currencyId)
+        external
+        view
+        returns (Token memory assetToken, Token memory underlyingToken)
+    {
+        (assetToken, underlyingToken) = _getTokens(_getCurrency(currencyId));
+    }
+
+    function getMaxCurrencyId() external view returns (uint16) {
+        return maxCurrencyId;
+    }
+
+    // Like Notional, only matches asset tokens: ETH isn't found by address
+    function getCurrencyId(address tokenAddress) external view returns (uint16 currencyId) {
+        for (uint16 i = 1; i <= maxCurrencyId; i++) {
+            if (currencies[i].underlying != address(0) && currencies[i].underlying == tokenAddress) return i;
+        }
+        revert("Currency not found");
+    }
+
+    function getRateStorage(uint16 currencyId)
+        external
+        view
+        returns (ETHRateStorage memory ethRate, AssetRateStorage memory assetRate)
+    {
+        Currency storage currency = _getCurrency(currencyId);
+        ethRate = currency.ethRate;
+        assetRate.underlyingDecimalPlaces = uint8(_log10(uint256(currency.decimals)));
+    }
+
+    function getCurrencyAndRates(uint16 currencyId)
+        external
+        view
+        returns (
+            Token memory assetToken,
+            Token memory underlyingToken,
+            ETHRate memory ethRate,
+            AssetRateParameters memory assetRate
+        )
+    {
+        Currency storage currency = _getCurrency(currencyId);
+        (assetToken, underlyingToken) = _getTokens(currency);
+        ethRate = _getETHRate(currency);
+        // asset cash is the underlying, the rate converts it one to one
+        assetRate.rate = currency.decimals.mul(1e10);
+        assetRate.underlyingDecimals = currency.decimals;
+    }
+
+    function getActiveMarkets(uint16 currencyId) external view returns (MarketParameters[] memory activeMarkets) {
+        Currency storage currency = _getCurrency(currencyId);
+        activeMarkets = new MarketParameters[](currency.maxMarketIndex);
+        for (uint256 i = 0; i < activeMarkets.length; i++) {
+            uint256 maturity = _getMaturity(i + 1, block.timestamp);
+            Market storage market = markets[currencyId][maturity];
+            activeMarkets[i].maturity = maturity;
+            activeMarkets[i].totalfCash = market.totalfCash;
+            activeMarkets[i].totalAssetCash = market.totalCash;
+            activeMarkets[i].totalLiquidity = market.totalCash;
+            activeMarkets[i].lastImpliedRate = market.lastImpliedRate;
+            activeMarkets[i].oracleRate = _getOracleRate(market, block.timestamp);
+            activeMarkets[i].previousTradeTime = market.previousTradeTime;
+        }
+    }
+
+    function getfCashAmountGivenCashAmount(
+        uint16 currencyId,
+        int88 netCashToAccount,
+        uint256 marketIndex,
+        uint256 blockTime
+    ) external view returns (int256) {
+        uint256 maturity = _getMaturity(marketIndex, blockTime);
+        Market storage market = _getMarket(currencyId, maturity);
+        // fCash at the last implied rate, then priced again at the rate that size trades at
+        int256 fCashAmount = _fCashGivenRate(netCashToAccount, market.lastImpliedRate, maturity - blockTime);
+        uint256 rate = _getTradeRate(market, fCashAmount);
+        return _fCashGivenRate(netCashToAccount, rate, maturity - blockTime);
+    }
+
+    function getCashAmountGivenfCashAmount(
+        uint16 currencyId,
+        int88 fCashAmount,
+        uint256 marketIndex,
+        uint256 blockTime
+    ) external view returns (int256, int256) {
+        uint256 maturity = _getMaturity(marketIndex, blockTime);
+        Market storage market = _getMarket(currencyId, maturity);
+        uint256 rate = _getTradeRate(market, fCashAmount);
+        int256 cashAmount = _cashGivenRate(fCashAmount, rate, maturity - blockTime);
+        return (cashAmount, cashAmount);
+    }
+
+    function getAccountPortfolio(address account) public view returns (PortfolioAsset[] memory portfolio) {
+        Asset[] storage assets = portfolios[account];
+        portfolio = new PortfolioAsset[](assets.length);
+        for (uint256 i = 0; i < assets.length; i++) {
+            portfolio[i].currencyId = assets[i].currencyId;
+            portfolio[i].maturity = assets[i].maturity;
+            portfolio[i].assetType = FCASH_ASSET_TYPE;
+            portfolio[i].notional = fCashBalances[account][assets[i].currencyId][assets[i].maturity];
+        }
+    }
+
+    // Mock portfolios are asset arrays, never bitmaps
+    function getAccountContext(address account) external view returns (AccountContext memory accountContext) {
+        accountContext.assetArrayLength = uint8(portfolios[account].length);
+    }
+
+    function getAssetsBitmap(address, uint16) external pure returns (bytes32) {
+        return bytes32(0);
+    }
+
+    function getfCashNotional(
+        address account,
+        uint16 currencyId,
+        uint256 maturity
+    ) external view returns (int256) {
+        return fCashBalances[account][currencyId][maturity];
+    }
+
+    function getAccount(address account)
+        external
+        view
+        returns (
+            AccountContext memory accountContext,
+            AccountBalance[] memory accountBalances,
+            PortfolioAsset[] memory portfolio
+        )
+    {
+        portfolio = getAccountPortfolio(account);
+        accountContext.assetArrayLength = uint8(portfolio.length);
+        accountBalances = new AccountBalance[](maxCurrencyId);
+        uint256 count;
+        for (uint16 i = 1; i <= maxCurrencyId; i++) {
+            if (cashBalances[account][i] == 0) continue;
+            accountBalances[count].currencyId = i;
+            accountBalances[count].cashBalance = cashBalances[account][i];
+            count++;
+        }
+        assembly {
+            mstore(accountBalances, count)
+        }
+    }
+
+    function getAccountBalance(uint16 currencyId, address account)
+        external
+        view
+        returns (
+            int256 cashBalance,
+            int256 nTokenBalance,
+            uint256 lastClaimTime
+        )
+    {
+        cashBalance = cashBalances[account][currencyId];
+        nTokenBalance = nTokenBalances[account][currencyId];
+        lastClaimTime = lastClaimTimes[account][currencyId];
+    }
+
+    /* nTokens */
+
+    function nTokenAddress(uint16 currencyId) public view returns (address) {
+        _getCurrency(currencyId);
+        // a placeholder address per currency, nTokens are only balances here
+        return address(uint160(uint256(keccak256(abi.encode(address(this), currencyId)))));
+    }
+
+    function getNoteToken() external view returns (address) {
+        return address(noteToken);
+    }
+
+    function getNTokenAccount(address tokenAddress)
+        external
+        view
+        returns (
+            uint16 currencyId,
+            uint256 totalSupply,
+            uint256 incentiveAnnualEmissionRate,
+            uint256 lastInitializedTime,
+            bytes5 nTokenParameters,
+            int256 cashBalance,
+            uint256 integralTotalSupply,
+            uint256 lastSupplyChangeTime
+        )
+    {
+        for (uint16 i = 1; i <= maxCurrencyId; i++) {
+            if (nTokenAddress(i) != tokenAddress) continue;
+            currencyId = i;
+            totalSupply = uint256(nTokens[i].totalSupply);
+            incentiveAnnualEmissionRate = incentiveRate;
+            cashBalance = nTokens[i].cash;
+            return (currencyId, totalSupply, incentiveAnnualEmissionRate, 0, 0, cashBalance, 0, 0);
+        }
+        revert("Invalid nToken");
+    }
+
+    function calculateNTokensToMint(uint16 currencyId, uint88 amountToDepositExternalPrecision)
+        external
+        view
+        returns (uint256)
+    {
+        Currency storage currency = _getCurrency(currencyId);
+        int256 cashAmount = int256(amountToDepositExternalPrecision).mul(INTERNAL_TOKEN_PRECISION).div(
+            currency.decimals
+        );
+        return uint256(_nTokensGivenCash(nTokens[currencyId], cashAmount));
+    }
+
+    function nTokenPresentValueUnderlyingDenominated(uint16 currencyId) external view returns (int256) {
+        _getCurrency(currencyId);
+        return nTokens[currencyId].cash;
+    }
+
+    function nTokenGetClaimableIncentives(address account, uint256 blockTime) public view returns (uint256 incentives) {
+        for (uint16 i = 1; i <= maxCurrencyId; i++) {
+            incentives = incentives.add(_claimableIncentives(account, i, blockTime));
+        }
+    }
+
+    function nTokenClaimIncentives() external returns (uint256 incentives) {
+        for (uint16 i = 1; i <= maxCurrencyId; i++) {
+            incentives = incentives.add(_claimIncentives(msg.sender, i));
+        }
+    }
+
+    // Net local value (cash plus fCash notional) per currency, in ETH for the total
+    function getFreeCollateral(address account) external view returns (int256 freeCollateral, int256[] memory netLocal) {
+        netLocal = new int256[](maxCurrencyId);
+        for (uint16 i = 1; i <= maxCurrencyId; i++) {
+            netLocal[i - 1] = cashBalances[account][i];
+        }
+        Asset[] storage assets = portfolios[account];
+        for (uint256 i = 0; i < assets.length; i++) {
+            uint16 currencyId = assets[i].currencyId;
+            netLocal[currencyId - 1] = netLocal[currencyId - 1].add(
+                fCashBalances[account][currencyId][assets[i].maturity]
+            );
+        }
+        for (uint16 i = 1; i <= maxCurrencyId; i++) {
+            ETHRate memory ethRate = _getETHRate(currencies[i]);
+            freeCollateral = freeCollateral.add(netLocal[i - 1].mul(ethRate.rate).div(ethRate.rateDecimals));
+        }
+    }
+
+    /* ERC1155 */
+
+    function encodeToId(
+        uint16 currencyId,
+        uint40 maturity,
+        uint8 assetType
+    ) public pure returns (uint256) {
+        return (uint256(currencyId) << 48) | (uint256(maturity) << 8) | uint256(assetType);
+    }
+
+    function signedBalanceOfBatch(address[] calldata accounts, uint256[] calldata ids)
+        external
+        view
+        returns (int256[] memory balances)
+    {
+        require(accounts.length == ids.length, "Invalid lengths");
+        balances = new int256[](ids.length);
+        for (uint256 i = 0; i < ids.length; i++) {
+            (uint16 currencyId, uint256 maturity) = _decodefCashId(ids[i]);
+            balances[i] = fCashBalances[accounts[i]][currencyId][maturity];
+        }
+    }
+
+    // Only the owner can transfer, and only fCash that has not matured
+    function safeBatchTransferFrom(
+        address from,
+        address to,
+        uint256[] calldata ids,
+        uint256[] calldata amounts,
+        bytes calldata data
+    ) external payable {
+        require(msg.sender == from, "Unauthorized");
+        require(ids.length == amounts.length, "Invalid lengths");
+        for (uint256 i = 0; i < ids.length; i++) {
+            (uint16 currencyId, uint256 maturity) = _decodefCashId(ids[i]);
+            require(maturity > block.timestamp, "Matured fCash");
+            int256 amount = int256(amounts[i]);
+            _updatefCash(from, currencyId, maturity, amount.mul(-1));
+            _updatefCash(to, currencyId, maturity, amount);
+        }
+        emit TransferBatch(msg.sender, from, to, ids, amounts);
+
+        if (Address.isContract(to)) {
+            require(
+                IERC1155BatchReceiver(to).onERC1155BatchReceived(msg.sender, from, ids, amounts, data) ==
+                    ERC1155_BATCH_ACCEPTED,
+                "Not accepted"
+            );
+        }
+    }
+
+    /* Internal */
+
+    function _decodefCashId(uint256 id) internal pure returns (uint16 currencyId, uint256 maturity) {
+        require(uint8(id) == FCASH_ASSET_TYPE, "Invalid asset type");
+        currencyId = uint16(id >> 48);
+        maturity = uint40(id >> 8);
+    }
+
+    function _executeAction(address account, BalanceActionWithTrades memory action) internal {
+        Currency storage currency = _getCurrency(action.currencyId);
+        int256 cashBalance = cashBalances[account][action.currencyId];
+
+        if (
+            action.actionType == DepositActionType.DepositUnderlying ||
+            action.actionType == DepositActionType.DepositAsset
+        ) {
+            cashBalance = cashBalance.add(_deposit(currency, account, action.depositActionAmount));
+        } else if (
+            action.actionType == DepositActionType.DepositUnderlyingAndMintNToken ||
+            action.actionType == DepositActionType.DepositAssetAndMintNToken
+        ) {
+            _mintNTokens(account, action.currencyId, _deposit(currency, account, action.depositActionAmount));
+        } else if (action.actionType == DepositActionType.RedeemNToken) {
+            cashBalance = cashBalance.add(_redeemNTokens(account, action.currencyId, int256(action.depositActionAmount)));
+        } else {
+            require(action.actionType == DepositActionType.None, "Unsupported action");
+        }
+
+        for (uint256 i = 0; i < action.trades.length; i++) {
+            cashBalance = cashBalance.add(_executeTrade(account, action.currencyId, action.trades[i]));
+        }
+        require(cashBalance >= 0, "Insufficient free collateral");
+
+        int256 withdrawAmount = action.withdrawEntireCashBalance
+            ? cashBalance
+            : int256(action.withdrawAmountInternalPrecision);
+        cashBalance = cashBalance.sub(withdrawAmount);
+        require(cashBalance >= 0, "Insufficient cash");
+        cashBalances[account][action.currencyId] = cashBalance;
+        _withdraw(currency, account, withdrawAmount);
+    }
+
+    function _executeTrade(
+        address account,
+        uint16 currencyId,
+        bytes32 trade
+    ) internal returns (int256 netCash) {
+        TradeActionType tradeType = TradeActionType(uint8(bytes1(trade)));
+        uint256 maturity = _getMaturity(uint8(uint256(trade) >> 240), block.timestamp);
+        int256 fCashAmount = int256(uint88(uint256(trade) >> 152));
+        uint256 rateLimit = uint32(uint256(trade) >> 120);
+        Market storage market = _getMarket(currencyId, maturity);
+
+        if (tradeType == TradeActionType.Borrow) {
+            fCashAmount = fCashAmount.mul(-1);
+        } else {
+            require(tradeType == TradeActionType.Lend, "Unsupported trade");
+        }
+        uint256 rate = _getTradeRate(market, fCashAmount);
+        // the trade fills at `rate` on average and leaves the market at its marginal
+        // rate, past it, which like Notional is the rate the limit bounds
+        uint256 postTradeRate = rate.mul(rate).div(market.lastImpliedRate);
+        if (tradeType == TradeActionType.Lend) {
+            require(rateLimit == 0 || postTradeRate >= rateLimit, "Trade failed, slippage");
+        } else {
+            require(rateLimit == 0 || postTradeRate <= rateLimit, "Trade failed, slippage");
+        }
+        netCash = _cashGivenRate(fCashAmount, rate, maturity - block.timestamp);
+
+        market.oracleRate = _getOracleRate(market, block.timestamp);
+        market.totalfCash = market.totalfCash.sub(fCashAmount);
+        market.totalCash = market.totalCash.sub(netCash);
+        market.lastImpliedRate = postTradeRate;
+        market.previousTradeTime = block.timestamp;
+
+        _updatefCash(account, currencyId, maturity, fCashAmount);
+        emit LendBorrowTrade(account, currencyId, uint40(maturity), netCash, fCashAmount);
+    }
+
+    function _updatefCash(
+        address account,
+        uint16 currencyId,
+        uint256 maturity,
+        int256 fCashAmount
+    ) internal {
+        int256 balance = fCashBalances[account][currencyId][maturity];
+        int256 newBalance = balance.add(fCashAmount);
+        require(newBalance >= 0, "Insufficient free collateral");
+        fCashBalances[account][currencyId][maturity] = newBalance;
+
+        Asset[] storage assets = portfolios[account];
+        if (balance == 0 && newBalance != 0) {
+            assets.push(Asset(currencyId, maturity));
+        } else if (balance != 0 && newBalance == 0) {
+            for (uint256 i = 0; i < assets.length; i++) {
+                if (assets[i].currencyId != currencyId || assets[i].maturity != maturity) continue;
+                assets[i] = assets[assets.length - 1];
+                assets.pop();
+                break;
+            }
+        }
+    }
+
+    function _nTokensGivenCash(NToken storage nToken, int256 cashAmount) internal view returns (int256) {
+        if (nToken.totalSupply == 0) return cashAmount;
+        return cashAmount.mul(nToken.totalSupply).div(nToken.cash);
+    }
+
+    function _mintNTokens(
+        address account,
+        uint16 currencyId,
+        int256 cashAmount
+    ) internal {
+        _claimIncentives(account, currencyId);
+        NToken storage nToken = nTokens[currencyId];
+        int256 tokens = _nTokensGivenCash(nToken, cashAmount);
+        nToken.totalSupply = nToken.totalSupply.add(tokens);
+        nToken.cash = nToken.cash.add(cashAmount);
+        nTokenBalances[account][currencyId] = nTokenBalances[account][currencyId].add(tokens);
+    }
+
+    // Redeemed nTokens pay their share of the nToken's cash
+    function _redeemNTokens(
+        address account,
+        uint16 currencyId,
+        int256 tokens
+    ) internal returns (int256 cashAmount) {
+        _claimIncentives(account, currencyId);
+        NToken storage nToken = nTokens[currencyId];
+        int256 balance = nTokenBalances[account][currencyId].sub(tokens);
+        require(tokens > 0 && balance >= 0, "Insufficient nTokens");
+        cashAmount = tokens.mul(nToken.cash).div(nToken.totalSupply);
+        nToken.totalSupply = nToken.totalSupply.sub(tokens);
+        nToken.cash = nToken.cash.sub(cashAmount);
+        nTokenBalances[account][currencyId] = balance;
+    }
+
+    function _claimableIncentives(
+        address account,
+        uint16 currencyId,
+        uint256 blockTime
+    ) internal view returns (uint256) {
+        int256 balance = nTokenBalances[account][currencyId];
+        if (balance == 0) return 0;
+        uint256 elapsed = blockTime.sub(lastClaimTimes[account][currencyId]);
+        return uint256(balance).mul(incentiveRate).mul(elapsed).div(YEAR).div(uint256(INTERNAL_TOKEN_PRECISION));
+    }
+
+    function _claimIncentives(address account, uint16 currencyId) internal returns (uint256 incentives) {
+        incentives = _claimableIncentives(account, currencyId, block.timestamp);
+        lastClaimTimes[account][currencyId] = block.timestamp;
+        if (incentives > 0) noteToken.mint(account, incentives);
+    }
+
+    // Matured fCash becomes cash at its notional
+    function _settleAccount(address account) internal {
+        Asset[] storage assets = portfolios[account];
+        uint256 i;
+        while (i < assets.length) {
+            Asset memory asset = assets[i];
+            if (asset.maturity > block.timestamp) {
+                i++;
+                continue;
+            }
+            int256 fCashAmount = fCashBalances[account][asset.currencyId][asset.maturity];
+            cashBalances[account][asset.currencyId] = cashBalances[account][asset.currencyId].add(fCashAmount);
+            delete fCashBalances[account][asset.currencyId][asset.maturity];
+            assets[i] = assets[assets.length - 1];
+            assets.pop();
+        }
+    }
+
+    function _deposit(
+        Currency storage currency,
+        address account,
+        uint256 amount
+    ) internal returns (int256) {
+        if (currency.underlying == address(0)) {
+            require(msg.value == amount, "ETH Balance");
+        } else {
+            IERC20(currency.underlying).safeTransferFrom(account, address(this), amount);
+        }
+        return int256(amount).mul(INTERNAL_TOKEN_PRECISION).div(currency.decimals);
+    }
+
+    function _withdraw(
+        Currency storage currency,
+        address account,
+        int256 cashAmount
+    ) internal {
+        uint256 amount = uint256(cashAmount.mul(currency.decimals).div(INTERNAL_TOKEN_PRECISION));
+        if (amount == 0) return;
+        if (currency.underlying == address(0)) {
+            payable(account).transfer(amount);
+        } else {
+            IERC20(currency.underlying).safeTransfer(account, amount);
+        }
+    }
+
+    // Lending takes fCash out of the market and lowers its rate, selling fCash back raises it.
+    // This is the average rate a trade fills at, the marginal rate falls (or rises) with
+    // the same ratio again so the market ends at rate^2 / lastImpliedRate
+    function _getTradeRate(Market storage market, int256 fCashToAccount) internal view returns (uint256) {
+        uint256 liquidity = uint256(market.totalfCash);
+        if (fCashToAccount >= 0) {
+            return market.lastImpliedRate.mul(liquidity).div(liquidity.add(uint256(fCashToAccount)));
+        }
+        uint256 fCashAmount = uint256(-fCashToAccount);
+        require(fCashAmount < liquidity, "Trade failed, liquidity");
+        return market.lastImpliedRate.mul(liquidity).div(liquidity - fCashAmount);
+    }
+
+    // Net cash to the account for a fCash change, negative when lending
+    function _cashGivenRate(
+        int256 fCashToAccount,
+        uint256 rate,
+        uint256 timeToMaturity
+    ) internal pure returns (int256) {
+        int256 discount = int256(RATE_PRECISION.mul(YEAR).add(rate.mul(timeToMaturity)));
+        return fCashToAccount.mul(-1).mul(int256(RATE_PRECISION.mul(YEAR))).div(discount);
+    }
+
+    function _fCashGivenRate(
+        int256 netCashToAccount,
+        uint256 rate,
+        uint256 timeToMaturity
+    ) internal pure returns (int256) {
+        int256 growth = int256(RATE_PRECISION.mul(YEAR).add(rate.mul(timeToMaturity)));
+        return netCashToAccount.mul(-1).mul(growth).div(int256(RATE_PRECISION.mul(YEAR)));
+    }
+
+    // Time weighted towards the last implied rate like Notional's rate oracle
+    function _getOracleRate(Market storage market, uint256 blockTime) internal view returns (uint256) {
+        uint256 elapsed = blockTime.sub(market.previousTradeTime);
+        if (elapsed >= ORACLE_TIME_WINDOW) return market.lastImpliedRate;
+        return
+            market.lastImpliedRate.mul(elapsed).add(market.oracleRate.mul(ORACLE_TIME_WINDOW - elapsed)).div(
+                ORACLE_TIME_WINDOW
+            );
+    }
+
+    function _getETHRate(Currency storage currency) internal view returns (ETHRate memory ethRate) {
+        ethRate.rateDecimals = int256(uint256(10)**currency.ethRate.rateDecimalPlaces);
+        ethRate.buffer = 100;
+        ethRate.haircut = 100;
+        ethRate.liquidationDiscount = 100;
+        if (address(currency.ethRate.rateOracle) == address(0)) {
+            ethRate.rate = ethRate.rateDecimals;
+            return ethRate;
+        }
+        (, int256 answer, , , ) = currency.ethRate.rateOracle.latestRoundData();
+        ethRate.rate = currency.ethRate.mustInvert
+            ? ethRate.rateDecimals.mul(ethRate.rateDecimals).div(answer)
+            : answer;
+    }
+
+    function _getTokens(Currency storage currency)
+        internal
+        view
+        returns (Token memory assetToken, Token memory underlyingToken)
+    {
+        assetToken.decimals = currency.decimals;
+        if (currency.underlying != address(0)) {
+            assetToken.tokenAddress = currency.underlying;
+            assetToken.tokenType = TokenType.NonMintable;
+            return (assetToken, underlyingToken);
+        }
+        assetToken.tokenType = TokenType.cETH;
+        underlyingToken.decimals = currency.decimals;
+        underlyingToken.tokenType = TokenType.Ether;
+    }
+
+    function _getCurrency(uint16 currencyId) internal view returns (Currency storage currency) {
+        require(currencyId > 0 && currencyId <= maxCurrencyId, "Invalid currency id");
+        currency = currencies[currencyId];
+    }
+
+    function _getMarket(uint16 currencyId, uint256 maturity) internal view returns (Market storage market) {
+        market = markets[currencyId][maturity];
+        require(market.totalfCash > 0, "Market not initialized");
+    }
+
+    function _getMaturity(uint256 marketIndex, uint256 blockTime) internal pure returns (uint256) {
+        require(marketIndex > 0 && marketIndex <= 7, "Invalid market index");
+        uint256 term;
+        if (marketIndex == 1) term = QUARTER;
+        else if (marketIndex == 2) term = 2 * QUARTER;
+        else if (marketIndex == 3) term = YEAR;
+        else if (marketIndex == 4) term = 2 * YEAR;
+        else if (marketIndex == 5) term = 5 * YEAR;
+        else if (marketIndex == 6) term = 10 * YEAR;
+        else term = 20 * YEAR;
+        return blockTime - (blockTime % QUARTER) + term;
+    }
+
+    function _log10(uint256 value) internal pure returns (uint256 exponent) {
+        while (value >= 10) {
+            value /= 10;
+            exponent++;
+        }
+    }
+}
@@ -0,0 +1,22 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import "./MockERC20.sol";
+
+// WETH9 deposit/withdraw on top of the mintable mock
+contract MockWETH is MockERC20 {
+    constructor() public MockERC20("Wrapped Ether", "WETH", 18) {}
+
+    receive() external payable {
+        deposit();
+    }
+
+    function deposit() public payable {
+        _mint(msg.sender, msg.value);
+    }
+
+    function withdraw(uint256 _amount) external {
+        _burn(msg.sender, _amount);
+        msg.sender.transfer(_amount);
+    }
+}
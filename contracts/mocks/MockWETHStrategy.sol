@@ -0,0 +1,16 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "../Strategy.sol";
+
+// The strategy with want taken as WETH, so on the development network a MockWETH
+// want resolves to the mock's ETH currency and batches unwrap and wrap it like the
+// mainnet WETH
+contract MockWETHStrategy is Strategy {
+    constructor(address _vault, NotionalProxy _nProxy) public Strategy(_vault, _nProxy) {}
+
+    function _weth() internal view override returns (address) {
+        return address(want);
+    }
+}
@@ -0,0 +1,211 @@
+from typing import NamedTuple
+
+import numpy as np
+from brownie import web3
+
+from scripts import indexer
+
+# Lending analytics over the strategy's trade history. Trades are folded into
+# additive per maturity sums, so new blocks update the totals instead of replaying
+# the history, and every report is vectorized over the maturities. Amounts are in
+# underlying (Notional's internal precision) and APRs are annualized fractions on
+# Notional's 360 day year, simple interest like its markets.
+
+YEAR = 360 * 86_400
+RATE_PRECISION = 1e9
+ASSET_RATE_DECIMAL_DIFFERENCE = 1e10
+LEND_BORROW_TRADE = "LendBorrowTrade"
+
+
+class Trades(NamedTuple):
+    """fCash trades of one account, arrays with an element per trade"""
+
+    timestamp: np.ndarray
+    maturity: np.ndarray
+    # net cash to the account, negative when lending
+    net_cash: np.ndarray
+    # net fCash to the account, positive when lending
+    net_fcash: np.ndarray
+
+
+class MaturityReport(NamedTuple):
+    maturity: np.ndarray
+    # fCash still held and the net cash paid for all the trades
+    fcash: np.ndarray
+    cash_paid: np.ndarray
+    # cash weighted rate of the lends
+    implied_rate: np.ndarray
+    # matured maturities settle at their notional, the others are marked at the
+    # oracle rate. Profit and APR are realised for the former, mark to market else
+    matured: np.ndarray
+    value: np.ndarray
+    profit: np.ndarray
+    apr: np.ndarray
+
+
+class AprTracker:
+    """Running per maturity sums of a trade history"""
+
+    _SUMS = ("cash", "fcash", "lent", "lent_fcash", "lent_term", "cash_time")
+
+    def __init__(self):
+        self.maturity = np.empty(0, dtype=np.int64)
+        for name in self._SUMS:
+            setattr(self, name, np.empty(0))
+        self.gain = 0
+        self.loss = 0
+        self.last_block = None
+
+    def update(self, trades, last_block=None):
+        """Folds new trades in, sums only grow so the order of updates doesn't matter"""
+        maturity = np.asarray(trades.maturity, dtype=np.int64)
+        if len(maturity) > 0:
+            timestamp = np.asarray(trades.timestamp, dtype=float)
+            net_cash = np.asarray(trades.net_cash, dtype=float)
+            net_fcash = np.asarray(trades.net_fcash, dtype=float)
+            lent = np.where(net_cash < 0, -net_cash, 0)
+
+            self.maturity, inverse = np.unique(
+                np.concatenate([self.maturity, maturity]), return_inverse=True
+            )
+            old, new = inverse[: -len(maturity)], inverse[-len(maturity) :]
+            additions = {
+                "cash": net_cash,
+                "fcash": net_fcash,
+                "lent": lent,
+                "lent_fcash": np.where(net_cash < 0, net_fcash, 0),
+                # capital times time lent until maturity, for the lends' implied rate
+                "lent_term": lent * (maturity - timestamp),
+                # signed capital times its entry time, for the time weighted APR
+                "cash_time": -net_cash * timestamp,
+            }
+            for name in self._SUMS:
+                sums = np.zeros(len(self.maturity))
+                np.add.at(sums, old, getattr(self, name))
+                np.add.at(sums, new, additions[name])
+                setattr(self, name, sums)
+        if last_block is not None:
+            self.last_block = last_block
+
+    def update_harvests(self, profit, loss, last_block=None):
+        self.gain += sum(int(x) for x in profit)
+        self.loss += sum(int(x) for x in loss)
+        if last_block is not None:
+            self.last_block = last_block
+
+    def report(self, timestamp, oracle_rate=None):
+        """Per maturity value, profit and APR at `timestamp`. `oracle_rate` maps
+        open maturities to their market oracle rate (RATE_PRECISION), the lends'
+        own rate is used for the ones missing"""
+        matured = self.maturity <= timestamp
+        implied_rate = _safe_divide(
+            (self.lent_fcash - self.lent) * YEAR, self.lent_term
+        )
+        rate = implied_rate.copy()
+        if oracle_rate:
+            for i, maturity in enumerate(self.maturity):
+                if maturity in oracle_rate:
+                    rate[i] = oracle_rate[maturity] / RATE_PRECISION
+
+        time_to_maturity = np.maximum(self.maturity - timestamp, 0)
+        value = self.fcash / (1 + rate * time_to_maturity / YEAR)
+        profit = self.cash + value
+
+        # capital times time invested, until maturity once settled
+        end = np.where(matured, self.maturity, timestamp)
+        capital_time = -self.cash * end - self.cash_time
+        apr = _safe_divide(profit * YEAR, capital_time)
+        return MaturityReport(
+            self.maturity.copy(),
+            self.fcash.copy(),
+            -self.cash,
+            implied_rate,
+            matured,
+            value,
+            profit,
+            apr,
+        )
+
+    def save(self, path):
+        np.savez(
+            path,
+            maturity=self.maturity,
+            harvests=np.array([self.gain, self.loss], dtype=object),
+            last_block=np.array(-1 if self.last_block is None else self.last_block),
+            **{name: getattr(self, name) for name in self._SUMS},
+        )
+
+    @classmethod
+    def load(cls, path):
+        tracker = cls()
+        with np.load(path, allow_pickle=True) as data:
+            tracker.maturity = data["maturity"]
+            for name in cls._SUMS:
+                setattr(tracker, name, data[name])
+            tracker.gain, tracker.loss = (int(x) for x in data["harvests"])
+            last_block = int(data["last_block"])
+            tracker.last_block = None if last_block < 0 else last_block
+        return tracker
+
+
+def update_from_chain(tracker, n_proxy, strategy, to_block=None, event_index=None):
+    """Folds the strategy's trades and harvests since the tracker's last block, read
+    from the event index after bringing it up to `to_block`"""
+    to_block = web3.eth.block_number if to_block is None else to_block
+    from_block = 0 if tracker.last_block is None else tracker.last_block + 1
+    if from_block > to_block:
+        return tracker
+
+    event_index = indexer.EventIndex() if event_index is None else event_index
+    address = strategy.address
+    indexer.index(
+        event_index,
+        {address: strategy.vault()},
+        to_block,
+        start_block=from_block,
+        n_proxy=n_proxy.address,
+    )
+
+    currency_id = strategy.currencyID()
+    events = [
+        dict(args, block=block)
+        for block, _, _, _, args in event_index.events(
+            address, LEND_BORROW_TRADE, from_block, to_block
+        )
+        if args["currencyId"] == currency_id
+    ]
+    if events:
+        blocks = [e["block"] for e in events]
+        timestamps = {b: web3.eth.get_block(b).timestamp for b in set(blocks)}
+        asset_rates = _asset_rates(n_proxy, currency_id, set(blocks))
+        tracker.update(
+            Trades(
+                np.array([timestamps[e["block"]] for e in events]),
+                np.array([e["maturity"] for e in events]),
+                np.array([e["netAssetCash"] * asset_rates[e["block"]] for e in events]),
+                np.array([e["netfCash"] for e in events]),
+            )
+        )
+
+    harvests = [
+        args for _, _, _, _, args in event_index.harvests(address, from_block, to_block)
+    ]
+    tracker.update_harvests(
+        [h["profit"] for h in harvests], [h["loss"] for h in harvests]
+    )
+    tracker.last_block = to_block
+    return tracker
+
+
+def _asset_rates(n_proxy, currency_id, blocks):
+    # underlying per unit of asset cash, like Notional's AssetRate.convertToUnderlying
+    rates = {}
+    for block in blocks:
+        asset_rate = n_proxy.getCurrencyAndRates(currency_id, block_identifier=block)[3]
+        rates[block] = asset_rate[1] / ASSET_RATE_DECIMAL_DIFFERENCE / asset_rate[2]
+    return rates
+
+
+def _safe_divide(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator != 0, numerator / denominator, 0.0)
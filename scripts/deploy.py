@@ -5,6 +5,7 @@ from eth_utils import is_checksum_address
 import click
 
 API_VERSION = config["dependencies"][0].split("@")[-1]
+NOTIONAL_PROXY = "0x1344A36A1B56144C3Bc62E7757377D288fDE0369"
 Vault = project.load(
     Path.home() / ".brownie" / "packages" / config["dependencies"][0]
 ).Vault
@@ -55,4 +56,6 @@ def main():
     if input("Deploy Strategy? y/[N]: ").lower() != "y":
         return
 
-    strategy = Strategy.deploy(vault, {"from": dev}, publish_source=publish_source)
+    strategy = Strategy.deploy(
+        vault, NOTIONAL_PROXY, {"from": dev}, publish_source=publish_source
+    )
@@ -0,0 +1,229 @@
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+from brownie import Strategy, network, web3
+from eth_abi import decode_abi
+from eth_utils import to_checksum_address
+
+from scripts.keeper import CONFIG_PATH
+
+# Local index of the strategies' event logs: `brownie run indexer main [start_block]`.
+# Harvested (strategy), StrategyReported (vault) and the strategies' Notional trades
+# and settlements are fetched in block ranges that halve when the node refuses a
+# query and grow back after successes, then stored in SQLite indexed by
+# (strategy, block) so lifetime queries never reach the node.
+
+NOTIONAL_PROXY = "0x1344A36A1B56144C3Bc62E7757377D288fDE0369"
+INDEX_PATH = Path(os.environ.get("EVENT_INDEX", "data/events.sqlite"))
+BATCH = 10_000
+MAX_BATCH = 200_000
+
+# name -> (signature, indexed argument names, non indexed argument names and types)
+EVENTS = {
+    "Harvested": (
+        "Harvested(uint256,uint256,uint256,uint256)",
+        (),
+        (
+            ("profit", "uint256"),
+            ("loss", "uint256"),
+            ("debtPayment", "uint256"),
+            ("debtOutstanding", "uint256"),
+        ),
+    ),
+    "StrategyReported": (
+        "StrategyReported(address,uint256,uint256,uint256,uint256,uint256,uint256,uint256,uint256)",
+        ("strategy",),
+        (
+            ("gain", "uint256"),
+            ("loss", "uint256"),
+            ("debtPaid", "uint256"),
+            ("totalGain", "uint256"),
+            ("totalLoss", "uint256"),
+            ("totalDebt", "uint256"),
+            ("debtAdded", "uint256"),
+            ("debtRatio", "uint256"),
+        ),
+    ),
+    "LendBorrowTrade": (
+        "LendBorrowTrade(address,uint16,uint40,int256,int256)",
+        ("account", "currencyId"),
+        (("maturity", "uint40"), ("netAssetCash", "int256"), ("netfCash", "int256")),
+    ),
+    "AccountSettled": ("AccountSettled(address)", ("account",), ()),
+}
+TOPICS = {
+    "0x" + bytes(web3.keccak(text=signature)).hex(): name
+    for name, (signature, _, _) in EVENTS.items()
+}
+TOPIC = {name: topic for topic, name in TOPICS.items()}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    block INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    address TEXT NOT NULL,
+    event TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    args TEXT NOT NULL,
+    PRIMARY KEY (block, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_strategy_block ON events (strategy, block);
+CREATE INDEX IF NOT EXISTS events_strategy_event_block ON events (strategy, event, block);
+CREATE TABLE IF NOT EXISTS progress (
+    strategy TEXT PRIMARY KEY,
+    last_block INTEGER NOT NULL
+);
+"""
+
+
+class EventIndex:
+    def __init__(self, path=INDEX_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path))
+        self.db.executescript(SCHEMA)
+
+    def last_block(self, strategy):
+        row = self.db.execute(
+            "SELECT last_block FROM progress WHERE strategy = ?", (strategy,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def events(self, strategy, event=None, from_block=0, to_block=None):
+        """A strategy's events in chain order, args decoded"""
+        query = "SELECT block, log_index, tx_hash, event, args FROM events WHERE strategy = ?"
+        params = [strategy]
+        if event is not None:
+            query += " AND event = ?"
+            params.append(event)
+        query += " AND block >= ?"
+        params.append(from_block)
+        if to_block is not None:
+            query += " AND block <= ?"
+            params.append(to_block)
+        query += " ORDER BY block, log_index"
+        return [
+            (block, log_index, tx_hash, name, _loads(args))
+            for block, log_index, tx_hash, name, args in self.db.execute(query, params)
+        ]
+
+    def harvests(self, strategy, from_block=0, to_block=None):
+        return self.events(strategy, "Harvested", from_block, to_block)
+
+    def add(self, rows, strategies, last_block):
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO progress VALUES (?, ?)",
+                [(strategy, last_block) for strategy in strategies],
+            )
+
+
+def index(
+    event_index,
+    strategies,
+    to_block=None,
+    start_block=0,
+    n_proxy=NOTIONAL_PROXY,
+    get_logs=None,
+    batch=BATCH,
+):
+    """Indexes `strategies` (address -> vault address) up to `to_block`, each one
+    from the block after the last one indexed for it"""
+    get_logs = get_logs or web3.eth.get_logs
+    to_block = web3.eth.block_number if to_block is None else to_block
+    last_blocks = [event_index.last_block(s) for s in strategies]
+    from_block = min(start_block if b is None else b + 1 for b in last_blocks)
+
+    accounts = [_topic_address(s) for s in strategies]
+    filters = [
+        {"address": list(strategies), "topics": [TOPIC["Harvested"]]},
+        {
+            "address": sorted(set(strategies.values())),
+            "topics": [TOPIC["StrategyReported"], accounts],
+        },
+        {
+            "address": n_proxy,
+            "topics": [[TOPIC["LendBorrowTrade"], TOPIC["AccountSettled"]], accounts],
+        },
+    ]
+    while from_block <= to_block:
+        end_block = min(from_block + batch - 1, to_block)
+        try:
+            logs = [
+                log
+                for log_filter in filters
+                for log in get_logs(
+                    dict(log_filter, fromBlock=from_block, toBlock=end_block)
+                )
+            ]
+        except ValueError:
+            # too many results or a timeout, retry the range in halves
+            if batch == 1:
+                raise
+            batch //= 2
+            continue
+        event_index.add([_row(log) for log in logs], strategies, end_block)
+        from_block = end_block + 1
+        batch = min(batch * 2, MAX_BATCH)
+    return event_index
+
+
+def _row(log):
+    topics = [_hex(topic) for topic in log["topics"]]
+    name = TOPICS[topics[0]]
+    _, indexed, data_types = EVENTS[name]
+    args = {arg: _topic_value(topic, arg) for arg, topic in zip(indexed, topics[1:])}
+    values = decode_abi(
+        [t for _, t in data_types], bytes.fromhex(_hex(log["data"])[2:])
+    )
+    args.update({arg: value for (arg, _), value in zip(data_types, values)})
+    address = to_checksum_address(log["address"])
+    strategy = (
+        address if name == "Harvested" else args.get("strategy", args.get("account"))
+    )
+    return (
+        log["blockNumber"],
+        log["logIndex"],
+        _hex(log["transactionHash"]),
+        address,
+        name,
+        strategy,
+        json.dumps({k: str(v) if isinstance(v, int) else v for k, v in args.items()}),
+    )
+
+
+def _topic_address(address):
+    return "0x" + address[2:].lower().rjust(64, "0")
+
+
+def _topic_value(topic, arg):
+    if arg in ("strategy", "account"):
+        return to_checksum_address("0x" + topic[-40:])
+    return int(topic, 16)
+
+
+def _hex(value):
+    return value if isinstance(value, str) else "0x" + bytes(value).hex()
+
+
+def _loads(args):
+    # large integers are stored as strings, SQLite integers are 64 bit
+    return {
+        k: int(v) if isinstance(v, str) and v.lstrip("-").isdigit() else v
+        for k, v in json.loads(args).items()
+    }
+
+
+def main(start_block=0):
+    print(f"You are using the '{network.show_active()}' network")
+    with open(CONFIG_PATH) as f:
+        config = json.load(f)
+    strategies = {s: Strategy.at(s).vault() for s in config["strategies"]}
+    event_index = index(EventIndex(), strategies, start_block=int(start_block))
+    for strategy in strategies:
+        print(f"{strategy}: {len(event_index.harvests(strategy))} harvests")
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import brownie
+import click
+from brownie import Strategy, accounts, interface, network, web3
+
+# Keeper bot for a fleet of strategies: `brownie run keeper --network <network>`.
+# Every new block the triggers of all strategies and the markets of their Notional
+# currencies are read in one multicall, due harvests and tends are queued and sent
+# by a bounded pool of workers that share the keeper account's nonces.
+#
+# The deployments are read from the JSON file at $KEEPER_CONFIG (keeper.json):
+#   {"account": "<brownie account id>", "workers": 4, "strategies": ["0x...", ...]}
+
+CONFIG_PATH = os.environ.get("KEEPER_CONFIG", "keeper.json")
+# gas limits the trigger call costs are priced at
+HARVEST_GAS = 1_500_000
+TEND_GAS = 1_000_000
+WORKERS = 4
+POLL_INTERVAL = 2
+
+
+class Deployment(NamedTuple):
+    strategy: object
+    n_proxy: object
+    currency_id: int
+
+
+class Job(NamedTuple):
+    deployment: Deployment
+    action: str  # "harvest" or "tend"
+
+
+class NonceManager:
+    """Hands out consecutive nonces to concurrent senders"""
+
+    def __init__(self, account):
+        self.account = account
+        self._lock = asyncio.Lock()
+        self._next = None
+
+    async def send(self, broadcast):
+        """Awaits `broadcast(nonce)` with the next nonce and returns its result.
+        The lock is held until the transaction is broadcast, so when a send fails
+        no other nonce is out and resyncing with the node can't hand one out twice"""
+        async with self._lock:
+            if self._next is None:
+                self._next = web3.eth.get_transaction_count(
+                    self.account.address, "pending"
+                )
+            try:
+                result = await broadcast(self._next)
+            except Exception:
+                self._next = None
+                raise
+            self._next += 1
+            return result
+
+
+class Keeper:
+    def __init__(self, deployments, account, workers=WORKERS):
+        self.deployments = deployments
+        self.account = account
+        self.workers = workers
+        self.nonces = NonceManager(account)
+        self.sent = []
+        # strategies with a transaction in flight are not polled again
+        self._in_flight = set()
+        self._queue = None
+        self._executor = ThreadPoolExecutor(max_workers=workers + 1)
+
+    @classmethod
+    def from_addresses(cls, addresses, account, workers=WORKERS):
+        strategies = [Strategy.at(address) for address in addresses]
+        with brownie.multicall():
+            calls = [(s.nProxy(), s.currencyID()) for s in strategies]
+        deployments = [
+            Deployment(s, interface.NotionalProxy(str(n_proxy)), int(currency_id))
+            for s, (n_proxy, currency_id) in zip(strategies, calls)
+        ]
+        return cls(deployments, account, workers)
+
+    def read(self, block):
+        """Triggers and active markets of every deployment at `block`, one multicall"""
+        gas_price = web3.eth.gas_price
+        currencies = {(str(d.n_proxy), d.currency_id): d for d in self.deployments}
+        with brownie.multicall(block_identifier=block):
+            triggers = [
+                (
+                    d.strategy.harvestTrigger(gas_price * HARVEST_GAS),
+                    d.strategy.tendTrigger(gas_price * TEND_GAS),
+                )
+                for d in self.deployments
+            ]
+            markets = {
+                key: d.n_proxy.getActiveMarkets(d.currency_id)
+                for key, d in currencies.items()
+            }
+        markets = {key: _resolve(value) for key, value in markets.items()}
+        reads = [
+            (
+                d,
+                _resolve(harvest),
+                _resolve(tend),
+                markets[str(d.n_proxy), d.currency_id],
+            )
+            for d, (harvest, tend) in zip(self.deployments, triggers)
+        ]
+        return reads
+
+    def due_jobs(self, reads):
+        jobs = []
+        for deployment, harvest, tend, markets in reads:
+            if deployment.strategy.address in self._in_flight:
+                continue
+            # trades revert until the new quarter's markets are initialized
+            if len(markets) == 0 or any(market[2] == 0 for market in markets):
+                continue
+            if harvest:
+                jobs.append(Job(deployment, "harvest"))
+            elif tend:
+                jobs.append(Job(deployment, "tend"))
+        return jobs
+
+    async def poll(self, block):
+        loop = asyncio.get_event_loop()
+        reads = await loop.run_in_executor(self._executor, self.read, block)
+        jobs = self.due_jobs(reads)
+        for job in jobs:
+            self._in_flight.add(job.deployment.strategy.address)
+            await self._queue.put(job)
+        return jobs
+
+    async def run(self, blocks=None):
+        """Polls every new block, `blocks` of them or forever"""
+        self._queue = asyncio.Queue()
+        workers = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+        last_block = None
+        polled = 0
+        try:
+            while blocks is None or polled < blocks:
+                block = web3.eth.block_number
+                if block == last_block:
+                    await asyncio.sleep(POLL_INTERVAL)
+                    continue
+                await self.poll(block)
+                last_block = block
+                polled += 1
+            await self._queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    async def _work(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                tx = await self.nonces.send(
+                    lambda nonce: loop.run_in_executor(
+                        self._executor, self._send, job, nonce
+                    )
+                )
+                # only the broadcasts are serialized, workers wait for blocks together
+                await loop.run_in_executor(self._executor, tx.wait, 1)
+                self.sent.append((job, tx))
+            except Exception as error:
+                click.echo(
+                    f"{job.action} {job.deployment.strategy.address} failed: {error}"
+                )
+            finally:
+                self._in_flight.discard(job.deployment.strategy.address)
+                self._queue.task_done()
+
+    def _send(self, job, nonce):
+        method = getattr(job.deployment.strategy, job.action)
+        gas_limit = HARVEST_GAS if job.action == "harvest" else TEND_GAS
+        tx = method(
+            {
+                "from": self.account,
+                "nonce": nonce,
+                "gas_limit": gas_limit,
+                "required_confs": 0,
+            }
+        )
+        return tx
+
+
+def _resolve(value):
+    # multicall results are lazy proxies until the batch is flushed
+    return getattr(value, "__wrapped__", value)
+
+
+def main():
+    print(f"You are using the '{network.show_active()}' network")
+    with open(CONFIG_PATH) as f:
+        config = json.load(f)
+    account = accounts.load(config["account"])
+    keeper = Keeper.from_addresses(
+        config["strategies"], account, config.get("workers", WORKERS)
+    )
+    print(f"Keeping {len(keeper.deployments)} strategies with {account.address}")
+    asyncio.get_event_loop().run_until_complete(keeper.run())
@@ -0,0 +1,150 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import brownie
+import numpy as np
+from brownie import interface, web3
+
+# Historical Notional market data: `brownie run market_data main <start> <end> [step]`.
+# Every `step` blocks the active markets of each currency are read in one multicall
+# and appended, one row per market, to a columnar store on disk. Re-running resumes
+# after the last stored block, and analyses read the columns back memory mapped
+# without touching the node.
+
+NOTIONAL_PROXY = "0x1344A36A1B56144C3Bc62E7757377D288fDE0369"
+DATA_PATH = Path(os.environ.get("MARKET_DATA", "data/markets"))
+CURRENCY_IDS = (1, 2, 3, 4)
+STEP = 100
+WORKERS = 8
+# blocks read before each append, so a crash loses at most one chunk
+CHUNK = 256
+
+# Column name -> dtype, amounts in Notional's internal precision and rates in
+# RATE_PRECISION, as in MarketParameters
+COLUMNS = {
+    "block": np.int64,
+    "timestamp": np.int64,
+    "currency_id": np.int16,
+    "market_index": np.int8,
+    "maturity": np.int64,
+    "total_fcash": np.int64,
+    "total_asset_cash": np.int64,
+    "total_liquidity": np.int64,
+    "last_implied_rate": np.int64,
+    "oracle_rate": np.int64,
+    "previous_trade_time": np.int64,
+}
+
+
+class MarketStore:
+    """Append-only columns, one raw file each, and a JSON header with the
+    committed row count and the last ingested block"""
+
+    def __init__(self, path=DATA_PATH):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._meta_path = self.path / "meta.json"
+        if self._meta_path.exists():
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+        else:
+            meta = {"rows": 0, "last_block": None}
+        self.rows = meta["rows"]
+        self.last_block = meta["last_block"]
+        # drop rows appended after the last committed header
+        for name, dtype in COLUMNS.items():
+            with open(self._column_path(name), "ab") as f:
+                f.truncate(self.rows * np.dtype(dtype).itemsize)
+
+    def append(self, columns, last_block):
+        rows = len(columns["block"])
+        for name, dtype in COLUMNS.items():
+            with open(self._column_path(name), "ab") as f:
+                f.write(np.asarray(columns[name], dtype=dtype).tobytes())
+        self.rows += rows
+        self.last_block = last_block
+        self._write_meta()
+
+    def read(self):
+        """Columns as read-only memory maps, in ingestion (block) order"""
+        if self.rows == 0:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        return {
+            name: np.memmap(
+                self._column_path(name), dtype=dtype, mode="r", shape=(self.rows,)
+            )
+            for name, dtype in COLUMNS.items()
+        }
+
+    def between(self, start_block, end_block):
+        """Rows with start_block <= block <= end_block, found by binary search"""
+        columns = self.read()
+        start, end = np.searchsorted(columns["block"], [start_block, end_block + 1])
+        return {name: column[start:end] for name, column in columns.items()}
+
+    def _column_path(self, name):
+        return self.path / f"{name}.bin"
+
+    def _write_meta(self):
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"rows": self.rows, "last_block": self.last_block}, f)
+        os.replace(tmp_path, self._meta_path)
+
+
+def read_block(n_proxy, currency_ids, block):
+    """Rows of the active markets of `currency_ids` at `block`"""
+    timestamp = web3.eth.get_block(block).timestamp
+    with brownie.multicall(block_identifier=block):
+        calls = [n_proxy.getActiveMarkets(currency_id) for currency_id in currency_ids]
+    rows = []
+    for currency_id, markets in zip(currency_ids, calls):
+        markets = getattr(markets, "__wrapped__", markets)
+        for index, market in enumerate(markets):
+            rows.append((block, timestamp, currency_id, index + 1, *market[1:]))
+    return rows
+
+
+def ingest(
+    n_proxy,
+    start_block,
+    end_block,
+    step=STEP,
+    currency_ids=CURRENCY_IDS,
+    store=None,
+    workers=WORKERS,
+):
+    """Reads every `step`th block in [start_block, end_block] not yet stored"""
+    store = store if store is not None else MarketStore()
+    if store.last_block is not None:
+        start_block = max(start_block, store.last_block + step)
+    blocks = range(start_block, end_block + 1, step)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for i in range(0, len(blocks), CHUNK):
+            chunk = blocks[i : i + CHUNK]
+            # map keeps block order, the store stays sorted by block
+            rows = [
+                row
+                for block_rows in executor.map(
+                    lambda block: read_block(n_proxy, currency_ids, block), chunk
+                )
+                for row in block_rows
+            ]
+            columns = dict(zip(COLUMNS, zip(*rows))) if rows else _empty_columns()
+            store.append(columns, chunk[-1])
+    return store
+
+
+def _empty_columns():
+    return {name: () for name in COLUMNS}
+
+
+def main(start_block, end_block=None, step=STEP):
+    end_block = web3.eth.block_number if end_block is None else int(end_block)
+    store = ingest(
+        interface.NotionalProxy(NOTIONAL_PROXY), int(start_block), end_block, int(step)
+    )
+    print(f"{store.rows} rows up to block {store.last_block} in {store.path}")
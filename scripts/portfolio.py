@@ -0,0 +1,216 @@
+import brownie
+import numpy as np
+from brownie import interface, network, web3
+
+# Decoder of Notional portfolios for monitoring: `brownie run portfolio main <account> ...`.
+# Array portfolios (getAccountPortfolio, decodeToAssets) and bitmap portfolios
+# (getAssetsBitmap) are decoded into the same columns, one numpy array per field.
+# Bitmaps are decoded locally with bit operations and only their notionals are
+# read, all of a batch in one multicall. Accounts are streamed in batches so a
+# scan over any number of them holds a single batch in memory.
+
+NOTIONAL_PROXY = "0x1344A36A1B56144C3Bc62E7757377D288fDE0369"
+BATCH = 100
+FCASH_ASSET_TYPE = 1
+
+# Notional's bitmap time chunks (DateTime.getMaturityFromBitNum): bits are numbered
+# from the most significant one, daily up to WEEK_BIT_OFFSET, then weekly, monthly
+# and quarterly, each chunk starting where the previous one ends
+DAY = 86_400
+WEEK = 6 * DAY
+MONTH = 30 * DAY
+QUARTER = 90 * DAY
+WEEK_BIT_OFFSET = 90
+MONTH_BIT_OFFSET = 135
+QUARTER_BIT_OFFSET = 195
+MAX_DAY_OFFSET = 90 * DAY
+MAX_WEEK_OFFSET = 360 * DAY
+MAX_MONTH_OFFSET = 2160 * DAY
+
+# Column name -> dtype, notionals in Notional's internal precision
+COLUMNS = {
+    # index of the asset's account in the accounts decoded together
+    "account": np.int32,
+    "currency_id": np.int16,
+    "maturity": np.int64,
+    "asset_type": np.int8,
+    "notional": np.int64,
+}
+
+
+class Portfolio:
+    """Assets of one or more accounts, a column per field"""
+
+    __slots__ = tuple(COLUMNS)
+
+    def __init__(self, **columns):
+        for name, dtype in COLUMNS.items():
+            setattr(self, name, np.asarray(columns.get(name, ()), dtype=dtype))
+
+    def __len__(self):
+        return len(self.maturity)
+
+    def __getitem__(self, index):
+        """Rows selected by a mask, a slice or indexes"""
+        return Portfolio(**{name: getattr(self, name)[index] for name in COLUMNS})
+
+    def of(self, account):
+        return self[self.account == account]
+
+    @classmethod
+    def concat(cls, portfolios):
+        portfolios = list(portfolios)
+        return cls(
+            **{
+                name: np.concatenate(
+                    [getattr(p, name) for p in portfolios] or [np.empty(0, dtype=dtype)]
+                )
+                for name, dtype in COLUMNS.items()
+            }
+        )
+
+
+def decode_assets(assets, account=0):
+    """`PortfolioAsset` tuples (currencyId, maturity, assetType, notional, ...), as
+    returned by getAccountPortfolio and decodeToAssets"""
+    if len(assets) == 0:
+        return Portfolio()
+    currency_id, maturity, asset_type, notional = zip(*(a[:4] for a in assets))
+    return Portfolio(
+        account=np.full(len(assets), account),
+        currency_id=currency_id,
+        maturity=maturity,
+        asset_type=asset_type,
+        notional=notional,
+    )
+
+
+def decode_ids(ids, amounts, account=0):
+    """ERC1155 ids and amounts, ids packed by encodeToId as
+    uint16 currencyId | uint40 maturity | uint8 assetType"""
+    ids = np.asarray([int(i) for i in ids], dtype=np.uint64)
+    return Portfolio(
+        account=np.full(len(ids), account),
+        currency_id=ids >> np.uint64(48),
+        maturity=(ids >> np.uint64(8)) & np.uint64(2 ** 40 - 1),
+        asset_type=ids & np.uint64(0xFF),
+        notional=[int(a) for a in amounts],
+    )
+
+
+def bitmap_maturities(bitmap, next_settle_time):
+    """Maturities of the bits set in a bitmap portfolio, relative to the account's
+    next settle time"""
+    bits = np.unpackbits(np.frombuffer(_bytes32(bitmap), dtype=np.uint8))
+    bit_num = np.flatnonzero(bits).astype(np.int64) + 1
+    time = next_settle_time - next_settle_time % DAY
+    # the first maturity of each chunk, backed up to a multiple of its period
+    week = time + MAX_DAY_OFFSET - time % WEEK
+    month = time + MAX_WEEK_OFFSET - time % MONTH
+    quarter = time + MAX_MONTH_OFFSET - time % QUARTER
+    return np.select(
+        [
+            bit_num <= WEEK_BIT_OFFSET,
+            bit_num <= MONTH_BIT_OFFSET,
+            bit_num <= QUARTER_BIT_OFFSET,
+        ],
+        [
+            time + bit_num * DAY,
+            week + (bit_num - WEEK_BIT_OFFSET) * WEEK,
+            month + (bit_num - MONTH_BIT_OFFSET) * MONTH,
+        ],
+        quarter + (bit_num - QUARTER_BIT_OFFSET) * QUARTER,
+    )
+
+
+def decode_bitmap(bitmap, next_settle_time, currency_id, notionals, account=0):
+    """A bitmap portfolio, `notionals` are the fCash of its maturities in order"""
+    maturity = bitmap_maturities(bitmap, next_settle_time)
+    return Portfolio(
+        account=np.full(len(maturity), account),
+        currency_id=np.full(len(maturity), currency_id),
+        maturity=maturity,
+        asset_type=np.full(len(maturity), FCASH_ASSET_TYPE),
+        notional=notionals,
+    )
+
+
+def read_batch(n_proxy, accounts, block=None):
+    """Portfolios of `accounts` at `block`, the account column indexes `accounts`"""
+    with brownie.multicall(block_identifier=block):
+        contexts = [n_proxy.getAccountContext(account) for account in accounts]
+    contexts = [_resolve(context) for context in contexts]
+
+    # bitmap accounts have their currency set, the others keep an asset array
+    with brownie.multicall(block_identifier=block):
+        reads = [
+            n_proxy.getAssetsBitmap(account, context[3])
+            if context[3] != 0
+            else n_proxy.getAccountPortfolio(account)
+            for account, context in zip(accounts, contexts)
+        ]
+    reads = [_resolve(read) for read in reads]
+
+    maturities = {
+        i: bitmap_maturities(reads[i], contexts[i][0])
+        for i, context in enumerate(contexts)
+        if context[3] != 0
+    }
+    notionals = {}
+    if maturities:
+        with brownie.multicall(block_identifier=block):
+            notionals = {
+                i: [
+                    n_proxy.getfCashNotional(accounts[i], contexts[i][3], int(maturity))
+                    for maturity in maturity_column
+                ]
+                for i, maturity_column in maturities.items()
+            }
+
+    portfolios = []
+    for i, (context, read) in enumerate(zip(contexts, reads)):
+        if i in maturities:
+            portfolio = decode_bitmap(
+                read,
+                context[0],
+                context[3],
+                [int(_resolve(n)) for n in notionals[i]],
+                account=i,
+            )
+        else:
+            portfolio = decode_assets(read, account=i)
+        portfolios.append(portfolio)
+    return Portfolio.concat(portfolios)
+
+
+def stream(n_proxy, accounts, block=None, batch=BATCH):
+    """Yields (accounts, Portfolio) for every `batch` accounts, all read at `block`"""
+    block = web3.eth.block_number if block is None else block
+    accounts = list(accounts)
+    for i in range(0, len(accounts), batch):
+        batch_accounts = accounts[i : i + batch]
+        yield batch_accounts, read_batch(n_proxy, batch_accounts, block)
+
+
+def _bytes32(value):
+    if isinstance(value, str):
+        value = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return bytes(value).rjust(32, b"\0")
+
+
+def _resolve(value):
+    # multicall results are lazy proxies until the batch is flushed
+    return getattr(value, "__wrapped__", value)
+
+
+def main(*accounts):
+    print(f"You are using the '{network.show_active()}' network")
+    n_proxy = interface.NotionalProxy(NOTIONAL_PROXY)
+    for batch_accounts, portfolio in stream(n_proxy, accounts):
+        for i, account in enumerate(batch_accounts):
+            assets = portfolio.of(i)
+            print(f"{account}: {len(assets)} assets")
+            for currency_id, maturity, notional in zip(
+                assets.currency_id, assets.maturity, assets.notional
+            ):
+                print(f"  currency {currency_id} maturity {maturity}: {notional}")
@@ -0,0 +1,361 @@
+from typing import NamedTuple
+
+import numpy as np
+
+# Vectorized model of Notional's fCash markets (Market.sol) to backtest the strategy
+# without a mainnet fork. Every function works on arrays, one element per scenario,
+# and rates are annualized fractions (Notional's RATE_PRECISION 1e9 == 1.0).
+
+DAY = 86_400
+QUARTER = 90 * DAY
+YEAR = 360 * DAY
+BASIS_POINT = 1e-4
+# terms of Notional's market indexes 1 to 7 (DateTime.getTradedMarket)
+MARKET_TERMS = np.array(
+    [0, QUARTER, 2 * QUARTER, YEAR, 2 * YEAR, 5 * YEAR, 10 * YEAR, 20 * YEAR]
+)
+
+# Mirrors MarketParameters, amounts in underlying
+class Market(NamedTuple):
+    maturity: np.ndarray
+    total_fcash: np.ndarray
+    total_cash: np.ndarray
+    last_implied_rate: np.ndarray
+    oracle_rate: np.ndarray
+    previous_trade_time: np.ndarray
+
+
+# Mirrors the CashGroupSettings fields the market math uses
+class CashGroup(NamedTuple):
+    rate_scalar: float = 21
+    total_fee_bps: float = 30
+    reserve_fee_share: float = 0.5
+    rate_oracle_time_window: float = 72 * 5 * 60
+
+
+def new_market(maturity, total_cash, implied_rate, proportion=0.5, block_time=0):
+    maturity, total_cash, implied_rate = np.broadcast_arrays(
+        *[np.asarray(x, dtype=float) for x in (maturity, total_cash, implied_rate)]
+    )
+    total_fcash = total_cash * proportion / (1 - proportion)
+    return Market(
+        maturity,
+        total_fcash,
+        total_cash,
+        implied_rate,
+        implied_rate.copy(),
+        np.full_like(maturity, block_time),
+    )
+
+
+def get_maturity(market_index, block_time):
+    block_time = np.asarray(block_time)
+    return block_time - block_time % QUARTER + MARKET_TERMS[market_index]
+
+
+def _time_to_maturity(market, block_time):
+    return np.maximum(market.maturity - block_time, 1)
+
+
+def _rate_scalar(cash_group, time_to_maturity):
+    return cash_group.rate_scalar * YEAR / time_to_maturity
+
+
+def _logit(total_fcash, fcash_to_account, total_cash):
+    proportion = (total_fcash - fcash_to_account) / (total_fcash + total_cash)
+    proportion = np.clip(proportion, 1e-12, 1 - 1e-12)
+    return np.log(proportion / (1 - proportion))
+
+
+def _rate_anchor(market, cash_group, time_to_maturity):
+    # anchor that keeps the current exchange rate at lastImpliedRate
+    last_exchange_rate = np.exp(market.last_implied_rate * time_to_maturity / YEAR)
+    logit = _logit(market.total_fcash, 0, market.total_cash)
+    return last_exchange_rate - logit / _rate_scalar(cash_group, time_to_maturity)
+
+
+def _exchange_rate(market, cash_group, fcash_to_account, time_to_maturity, anchor):
+    logit = _logit(market.total_fcash, fcash_to_account, market.total_cash)
+    return logit / _rate_scalar(cash_group, time_to_maturity) + anchor
+
+
+def _fee_rate(cash_group, time_to_maturity):
+    return np.exp(cash_group.total_fee_bps * BASIS_POINT * time_to_maturity / YEAR)
+
+
+def get_cash_given_fcash(market, cash_group, fcash_to_account, block_time):
+    """Net cash to the account (negative when lending) and pre fee exchange rate"""
+    fcash_to_account = np.asarray(fcash_to_account, dtype=float)
+    time_to_maturity = _time_to_maturity(market, block_time)
+    anchor = _rate_anchor(market, cash_group, time_to_maturity)
+    exchange_rate = _exchange_rate(
+        market, cash_group, fcash_to_account, time_to_maturity, anchor
+    )
+    fee_rate = _fee_rate(cash_group, time_to_maturity)
+    # lenders get a worse (lower) exchange rate, borrowers a higher one
+    post_fee_rate = np.where(
+        fcash_to_account > 0, exchange_rate / fee_rate, exchange_rate * fee_rate
+    )
+    return -fcash_to_account / np.maximum(post_fee_rate, 1), exchange_rate
+
+
+def get_fcash_given_cash(market, cash_group, cash_to_account, block_time, iterations=8):
+    """fCash to the account for a net cash amount (negative when lending)"""
+    cash_to_account = np.asarray(cash_to_account, dtype=float)
+    time_to_maturity = _time_to_maturity(market, block_time)
+    # Newton's method starting from the fCash at the last implied rate, as Notional does
+    fcash = -cash_to_account * np.exp(
+        market.last_implied_rate * time_to_maturity / YEAR
+    )
+    step = np.maximum(np.abs(fcash) * 1e-9, 1e-9)
+    for _ in range(iterations):
+        cash, _ = get_cash_given_fcash(market, cash_group, fcash, block_time)
+        slope = (
+            get_cash_given_fcash(market, cash_group, fcash + step, block_time)[0] - cash
+        ) / step
+        fcash = fcash - np.where(slope != 0, (cash - cash_to_account) / slope, 0)
+    return fcash
+
+
+def trade(market, cash_group, fcash_to_account, block_time):
+    """Executes a trade on every market, returns the new markets and the net cash"""
+    fcash_to_account = np.asarray(fcash_to_account, dtype=float)
+    cash_to_account, exchange_rate = get_cash_given_fcash(
+        market, cash_group, fcash_to_account, block_time
+    )
+    time_to_maturity = _time_to_maturity(market, block_time)
+    fee = np.abs(cash_to_account) * (_fee_rate(cash_group, time_to_maturity) - 1)
+    traded = fcash_to_account != 0
+    implied_rate = np.log(np.maximum(exchange_rate, 1)) * YEAR / time_to_maturity
+    new_market = Market(
+        market.maturity,
+        market.total_fcash - fcash_to_account,
+        market.total_cash - cash_to_account - fee * cash_group.reserve_fee_share,
+        np.where(traded, implied_rate, market.last_implied_rate),
+        np.where(
+            traded,
+            update_oracle_rate(market, cash_group, block_time),
+            market.oracle_rate,
+        ),
+        np.where(traded, block_time, market.previous_trade_time),
+    )
+    return new_market, cash_to_account
+
+
+def update_oracle_rate(market, cash_group, block_time):
+    # time weighted average of the previous oracle rate and the last implied rate
+    elapsed = np.asarray(block_time - market.previous_trade_time, dtype=float)
+    weight = np.clip(elapsed / cash_group.rate_oracle_time_window, 0, 1)
+    return market.last_implied_rate * weight + market.oracle_rate * (1 - weight)
+
+
+def synthetic_rates(n_scenarios, n_days, mean=0.05, volatility=0.01, seed=None):
+    """Mean reverting daily rate paths, shape (n_scenarios, n_days)"""
+    rng = np.random.default_rng(seed)
+    shocks = rng.normal(0, volatility * np.sqrt(1 / 360), (n_scenarios, n_days))
+    rates = np.empty((n_scenarios, n_days))
+    rates[:, 0] = mean
+    for day in range(1, n_days):
+        rates[:, day] = rates[:, day - 1] + 0.05 * (mean - rates[:, day - 1])
+        rates[:, day] += shocks[:, day]
+    return np.maximum(rates, 0.0001)
+
+
+def simulate(
+    rates,
+    deposit,
+    min_amount_want,
+    market_index,
+    harvest_every_days,
+    market_liquidity,
+    harvest_cost=0.0,
+    cash_group=CashGroup(),
+    start_time=0,
+    ladder_size=1,
+    withdraw_every_days=0,
+    withdraw_share=0.0,
+):
+    """
+    Backtests the strategy for every scenario. `rates` holds the daily market rate
+    (n_scenarios, n_days), every other parameter is broadcast to n_scenarios so
+    they can be swept in one run.
+
+    Harvests split idle want evenly over a ladder of `ladder_size` rungs, the
+    market terms from `market_index` up, each rung holding one maturity until it
+    matures into idle want at its notional. Every `withdraw_every_days` days (0
+    never) `withdraw_share` of the assets is withdrawn: idle want first, then fCash
+    sold from the shortest rung, pro rata when a rung is worth more than needed.
+    Markets are rebuilt every day from the day's rate and `market_liquidity`, so
+    the strategy's own trades don't move later prices, and nTokens, kept cash
+    balances and the rate slippage bound are not modelled.
+    """
+    n_scenarios, n_days = rates.shape
+    shape = (n_scenarios,)
+    deposit = np.broadcast_to(np.asarray(deposit, dtype=float), shape)
+    min_amount_want = np.broadcast_to(min_amount_want, shape)
+    market_index = np.broadcast_to(market_index, shape)
+    harvest_every_days = np.broadcast_to(harvest_every_days, shape)
+    harvest_cost = np.broadcast_to(harvest_cost, shape)
+    market_liquidity = np.broadcast_to(market_liquidity, shape)
+    ladder_size = np.broadcast_to(ladder_size, shape)
+    withdraw_every_days = np.broadcast_to(withdraw_every_days, shape)
+    withdraw_share = np.broadcast_to(np.asarray(withdraw_share, dtype=float), shape)
+
+    idle = deposit.copy()
+    # a position per rung and scenario, rung k lends in market_index + k
+    rungs = int(ladder_size.max())
+    position_maturity = np.zeros(shape + (rungs,))
+    position_fcash = np.zeros(shape + (rungs,))
+    harvests = np.zeros(shape)
+    gas_spent = np.zeros(shape)
+    withdrawn = np.zeros(shape)
+
+    for day in range(n_days):
+        block_time = start_time + day * DAY
+        rate = rates[:, day]
+
+        matured = (position_maturity > 0) & (position_maturity <= block_time)
+        idle = idle + np.where(matured, position_fcash, 0).sum(axis=1)
+        position_fcash = np.where(matured, 0, position_fcash)
+        position_maturity = np.where(matured, 0, position_maturity)
+
+        withdraw = (withdraw_every_days > 0) & (
+            day % np.maximum(withdraw_every_days, 1) == 0
+        )
+        if day > 0 and withdraw.any():
+            idle, position_fcash, raised = _withdraw(
+                np.where(withdraw, withdraw_share, 0),
+                idle,
+                position_maturity,
+                position_fcash,
+                rate,
+                market_liquidity,
+                cash_group,
+                block_time,
+            )
+            withdrawn += raised
+            position_maturity = np.where(position_fcash > 0, position_maturity, 0)
+
+        harvest = day % harvest_every_days == 0
+        harvests += harvest
+        gas_spent += np.where(harvest, harvest_cost, 0)
+        idle = idle - np.where(harvest, harvest_cost, 0)
+
+        lend = harvest & (idle >= min_amount_want)
+        if not lend.any():
+            continue
+        rung_cash = idle / ladder_size
+        for rung in range(rungs):
+            maturity = get_maturity(
+                np.minimum(market_index + rung, len(MARKET_TERMS) - 1), block_time
+            )
+            # can't lend into a different maturity while the rung is open
+            rung_lend = (
+                lend
+                & (rung < ladder_size)
+                & (market_index + rung < len(MARKET_TERMS))
+                & (
+                    (position_maturity[:, rung] == 0)
+                    | (position_maturity[:, rung] == maturity)
+                )
+            )
+            if not rung_lend.any():
+                continue
+            market = new_market(maturity, market_liquidity, rate, block_time=block_time)
+            cash = np.where(rung_lend, rung_cash, 0)
+            fcash = get_fcash_given_cash(market, cash_group, -cash, block_time)
+            position_fcash[:, rung] += np.where(rung_lend, fcash, 0)
+            position_maturity[:, rung] = np.where(
+                rung_lend, maturity, position_maturity[:, rung]
+            )
+            idle = idle - cash
+
+    end_time = start_time + n_days * DAY
+    final_rate = rates[:, -1:]
+    discount = np.exp(-final_rate * np.maximum(position_maturity - end_time, 0) / YEAR)
+    total_assets = idle + (position_fcash * discount).sum(axis=1)
+    years = n_days * DAY / YEAR
+    return {
+        "total_assets": total_assets,
+        # withdrawals count as paid out at their value, without their timing
+        "apr": ((total_assets + withdrawn) / deposit - 1) / years,
+        "harvests": harvests,
+        "gas_spent": gas_spent,
+        "idle": idle,
+        "withdrawn": withdrawn,
+    }
+
+
+def _withdraw(
+    share,
+    idle,
+    position_maturity,
+    position_fcash,
+    rate,
+    market_liquidity,
+    cash_group,
+    block_time,
+):
+    """Raises `share` of the assets, idle want first then fCash sold from the
+    shortest rung, returns the new idle want, positions and the amount raised"""
+    position_fcash = position_fcash.copy()
+    order = np.argsort(np.where(position_maturity > 0, position_maturity, np.inf))
+    rows = np.arange(len(idle))
+    # fCash valued at the day's rate, like estimatedTotalAssets at the oracle rate
+    time_to_maturity = np.maximum(position_maturity - block_time, 0)
+    value = (position_fcash * np.exp(-rate[:, None] * time_to_maturity / YEAR)).sum(
+        axis=1
+    )
+    needed = share * (idle + value)
+    raised = np.minimum(idle, needed)
+    idle = idle - raised
+    needed = needed - raised
+    for i in range(position_fcash.shape[1]):
+        rung = order[:, i]
+        fcash = position_fcash[rows, rung]
+        sell = (needed > 0) & (fcash > 0)
+        if not sell.any():
+            continue
+        market = new_market(
+            np.where(sell, position_maturity[rows, rung], block_time + DAY),
+            market_liquidity,
+            rate,
+            block_time=block_time,
+        )
+        cash, _ = get_cash_given_fcash(
+            market, cash_group, -np.where(sell, fcash, 0), block_time
+        )
+        # smaller sales move the rate less, so the pro rata fCash raises enough
+        sold = np.where(cash > needed, fcash * needed / np.maximum(cash, 1e-18), fcash)
+        sold = np.where(sell, sold, 0)
+        cash = np.where(cash > needed, needed, cash)
+        cash = np.where(sell, cash, 0)
+        position_fcash[rows, rung] = fcash - sold
+        raised = raised + cash
+        needed = needed - cash
+    return idle, position_fcash, raised
+
+
+def main():
+    # sweep term, harvest frequency and minAmountWant over two years of rates
+    terms = np.array([1, 2, 3])
+    frequencies = np.array([1, 7, 30])
+    min_amounts = np.array([0, 10_000, 100_000])
+    grid = np.array(np.meshgrid(terms, frequencies, min_amounts)).reshape(3, -1)
+    paths = 100
+    rates = np.repeat(synthetic_rates(paths, 720, seed=0), grid.shape[1], axis=0)
+    results = simulate(
+        rates,
+        deposit=1_000_000,
+        min_amount_want=np.tile(grid[2], paths),
+        market_index=np.tile(grid[0], paths),
+        harvest_every_days=np.tile(grid[1], paths),
+        market_liquidity=50_000_000,
+        harvest_cost=50,
+    )
+    apr = results["apr"].reshape(paths, -1).mean(axis=0)
+    for (term, frequency, min_amount), scenario_apr in zip(grid.T, apr):
+        print(
+            f"market {term} | harvest every {frequency:>2} days | "
+            f"minAmountWant {min_amount:>7} | APR {scenario_apr:.4%}"
+        )
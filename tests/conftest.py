@@ -1,50 +1,103 @@
 import pytest
-from brownie import config
+from brownie import config, network
 from brownie import Contract
 
+from utils.gas import GasBenchmark
+
+NOTIONAL_PROXY = "0x1344A36A1B56144C3Bc62E7757377D288fDE0369"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--update-gas-baseline",
+        action="store_true",
+        help="record gas benchmarks into tests/gas_baseline.json instead of checking them",
+    )
+    parser.addoption(
+        "--gas-threshold",
+        type=float,
+        default=0.05,
+        help="fraction a benchmarked path may exceed its gas baseline by",
+    )
+
+
+# Layered isolation: the vault, the strategy and the user's funds are set up
+# once per session (and token) and the chain is snapshotted right after, every
+# test then reverts to that snapshot. Each xdist worker runs its own session.
+@pytest.fixture(scope="session")
+def deployment(chain, vault, strategy, amount):
+    chain.snapshot()
+    yield
+
+
+# Overrides brownie's, which resets the chain at every module and would drop
+# the session deployments
+@pytest.fixture(scope="module")
+def module_isolation():
+    yield
+
+
+# Overrides brownie's so tests revert to the session snapshot (brownie only
+# allows xdist when tests use its isolation fixtures)
+@pytest.fixture
+def fn_isolation(chain, deployment):
+    yield
+    chain.revert()
+
+
 # Function scoped isolation fixture to enable xdist.
-# Snapshots the chain before each test and reverts after test completion.
+# Reverts the chain to the session snapshot after test completion.
 @pytest.fixture(scope="function", autouse=True)
 def shared_setup(fn_isolation):
     pass
 
 
-@pytest.fixture
-def gov(accounts):
-    yield accounts.at("0xFEB4acf3df3cDEA7399794D0869ef76A6EfAff52", force=True)
+# Local profile: `brownie test --network development` runs the suite offline
+# against the mocks in contracts/mocks instead of the mainnet fork
+@pytest.fixture(scope="session")
+def local_chain():
+    yield network.show_active() == "development"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def gov(accounts, local_chain):
+    gov = accounts.at("0xFEB4acf3df3cDEA7399794D0869ef76A6EfAff52", force=True)
+    if local_chain and gov.balance() == 0:
+        accounts[9].transfer(gov, "10 ether")
+    yield gov
+
+
+@pytest.fixture(scope="session")
 def strat_ms(accounts):
     yield accounts.at("0x16388463d60FFE0661Cf7F1f31a7D658aC790ff7", force=True)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def user(accounts):
     yield accounts[0]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def rewards(accounts):
     yield accounts[1]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def guardian(accounts):
     yield accounts[2]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def management(accounts):
     yield accounts[3]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def strategist(accounts):
     yield accounts[4]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def keeper(accounts):
     yield accounts[5]
 
@@ -59,22 +112,36 @@ token_addresses = {
     "USDC": "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48",  # USDC
 }
 
-# TODO: uncomment those tokens you want to test as want
+token_decimals = {
+    "WBTC": 8,
+    "USDT": 6,
+    "USDC": 6,
+}
+
+# Every want with a Notional currency, the strategy resolves its currency id from want
 @pytest.fixture(
     params=[
-        # 'WBTC', # WBTC
+        "WBTC",  # WBTC
         # "YFI",  # YFI
-        # "WETH",  # WETH
+        "WETH",  # WETH
         # 'LINK', # LINK
         # 'USDT', # USDT
-        # 'DAI', # DAI
-        # 'USDC', # USDC
+        "DAI",  # DAI
+        "USDC",  # USDC
     ],
     scope="session",
     autouse=True,
 )
-def token(request):
-    yield Contract(token_addresses[request.param])
+def token(request, local_chain, accounts, MockERC20, MockWETH):
+    symbol = request.param
+    if not local_chain:
+        yield Contract(token_addresses[symbol])
+    elif symbol == "WETH":
+        yield accounts[0].deploy(MockWETH)
+    else:
+        yield accounts[0].deploy(
+            MockERC20, symbol, symbol, token_decimals.get(symbol, 18)
+        )
 
 
 whale_addresses = {
@@ -104,11 +171,15 @@ token_prices = {
 }
 
 
-@pytest.fixture(autouse=True)
-def amount(token, token_whale, user):
+@pytest.fixture(scope="session", autouse=True)
+def amount(token, token_whale, user, local_chain):
     # this will get the number of tokens (around $1m worth of token)
-    amillion = round(1_000_000 / token_prices.symbol())
+    amillion = round(1_000_000 / token_prices[token.symbol()])
     amount = amillion * 10 ** token.decimals()
+    if local_chain:
+        token.mint(user, amount, {"from": user})
+        yield amount
+        return
     # In order to get some funds for the token you are about to use,
     # it impersonate a whale address
     if amount > token.balanceOf(token_whale):
@@ -118,7 +189,10 @@ def amount(token, token_whale, user):
 
 
 @pytest.fixture
-def weth():
+def weth(local_chain, accounts, MockWETH):
+    if local_chain:
+        yield accounts[0].deploy(MockWETH)
+        return
     token_address = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
     yield Contract(token_address)
 
@@ -130,7 +204,7 @@ def weth_amount(user, weth):
     yield weth_amount
 
 
-@pytest.fixture(scope="function", autouse=True)
+@pytest.fixture(scope="session", autouse=True)
 def vault(pm, gov, rewards, guardian, management, token):
     Vault = pm(config["dependencies"][0]).Vault
     vault = guardian.deploy(Vault)
@@ -150,25 +224,99 @@ def live_vault(registry, token):
     yield registry.latestVault(token)
 
 
-@pytest.fixture
-def strategy(strategist, keeper, vault, Strategy, gov):
-    strategy = strategist.deploy(Strategy, vault)
+@pytest.fixture(scope="session")
+def n_proxy(local_chain, accounts, token, MockNotional, MockAggregator):
+    if not local_chain:
+        yield Contract(NOTIONAL_PROXY)
+        return
+
+    deployer = accounts[0]
+    n_proxy = deployer.deploy(MockNotional)
+    symbol = token.symbol()
+    price = token_prices[symbol]
+    # want is listed as its own asset token, the mock WETH too since ETH only
+    # unwraps the mainnet WETH (test_eth.py lists ETH for a MockWETHStrategy).
+    # want/ETH feed with 18 decimals like Chainlink's
+    oracle = deployer.deploy(
+        MockAggregator, 18, price * 10 ** 18 // token_prices["WETH"]
+    )
+    n_proxy.listCurrency(token, oracle, 18, False, 3, {"from": deployer})
+    currency_id = n_proxy.maxCurrencyId()
+    # $50m of fCash in every market at 5%
+    n_proxy.setMarketDefaults(
+        currency_id, 50_000_000 * 10 ** 8 // price, 5 * 10 ** 7, {"from": deployer}
+    )
+    n_proxy.initializeMarkets(currency_id, True, {"from": deployer})
+    yield n_proxy
+
+
+# Notional's mainnet currency ids
+currency_ids = {
+    "WETH": 1,
+    "DAI": 2,
+    "USDC": 3,
+    "WBTC": 4,
+}
+
+
+@pytest.fixture(scope="session")
+def currency_id(local_chain, n_proxy, token):
+    symbol = token.symbol()
+    if local_chain:
+        yield n_proxy.getCurrencyId(token)
+    else:
+        yield currency_ids[symbol]
+
+
+@pytest.fixture(scope="session")
+def health_check(local_chain, accounts, MockHealthCheck):
+    if local_chain:
+        yield accounts[0].deploy(MockHealthCheck)
+    else:
+        yield Contract("health.ychad.eth")
+
+
+@pytest.fixture(scope="session")
+def strategy(
+    strategist,
+    keeper,
+    vault,
+    Strategy,
+    gov,
+    n_proxy,
+    health_check,
+    local_chain,
+):
+    strategy = strategist.deploy(Strategy, vault, n_proxy)
     strategy.setKeeper(keeper)
+    if local_chain:
+        strategy.setHealthCheck(health_check, {"from": gov})
     vault.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
     yield strategy
 
 
 @pytest.fixture
-def cloned_strategy(Strategy, vault, strategy, strategist, gov):
-    # TODO: customize clone method and arguments
-    # TODO: use correct contract name (i.e. replace Strategy)
-    cloned_strategy = strategy.cloneStrategy(
-        strategist, {"from": strategist}
-    ).return_value
-    cloned_strategy = Strategy.at(cloned_strategy)
-    vault.revokeStrategy(strategy)
+def cloned_strategy(
+    Strategy,
+    vault,
+    strategy,
+    strategist,
+    rewards,
+    keeper,
+    gov,
+    n_proxy,
+    health_check,
+    local_chain,
+):
+    tx = strategy.cloneStrategy(
+        vault, strategist, rewards, keeper, n_proxy, {"from": strategist}
+    )
+    cloned_strategy = Strategy.at(tx.return_value)
+    if local_chain:
+        cloned_strategy.setHealthCheck(health_check, {"from": gov})
+    vault.revokeStrategy(strategy, {"from": gov})
     vault.addStrategy(cloned_strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
-    yield
+    yield cloned_strategy
 
 
 @pytest.fixture(autouse=True)
@@ -186,3 +334,14 @@ def withdraw_no_losses(vault, token, amount, user):
 @pytest.fixture(scope="session", autouse=True)
 def RELATIVE_APPROX():
     yield 1e-5
+
+
+@pytest.fixture(scope="session")
+def gas_benchmark(request):
+    benchmark = GasBenchmark(
+        request.config.getoption("--gas-threshold"),
+        request.config.getoption("--update-gas-baseline"),
+    )
+    yield benchmark
+    if benchmark.update:
+        benchmark.save()
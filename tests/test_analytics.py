@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from scripts import analytics, indexer
+from utils import actions
+
+YEAR = analytics.YEAR
+
+
+def _trades(*rows):
+    return analytics.Trades(*(np.array(column) for column in zip(*rows)))
+
+
+def test_apr_per_maturity():
+    tracker = analytics.AprTracker()
+    # 1000 lent at 10% for half a year, then half of another 1000 lent at 8% is sold
+    # back at the same rate
+    tracker.update(
+        _trades(
+            (0, YEAR // 2, -1_000, 1_050),
+            (0, YEAR, -1_000, 1_080),
+            (YEAR // 4, YEAR, 509, -540),
+        )
+    )
+    report = tracker.report(YEAR // 2)
+    assert list(report.matured) == [True, False]
+    assert report.implied_rate == pytest.approx([0.10, 0.08])
+    # settled at the notional: 50 over 1000 for half a year
+    assert report.profit[0] == pytest.approx(50)
+    assert report.apr[0] == pytest.approx(0.10)
+    # marked at the lends' rate, simple interest over different terms drifts a bit
+    assert 0.075 < report.apr[1] < 0.08
+
+    # a higher oracle rate marks the open maturity down
+    marked = tracker.report(YEAR // 2, {YEAR: 0.2 * analytics.RATE_PRECISION})
+    assert marked.value[1] < report.value[1]
+
+
+def test_incremental_updates(tmp_path):
+    rng = np.random.default_rng(0)
+    maturity = rng.choice([YEAR // 4, YEAR // 2, YEAR], 100)
+    timestamp = rng.integers(0, YEAR // 4, 100)
+    cash = -rng.uniform(1, 100, 100)
+    trades = analytics.Trades(timestamp, maturity, cash, -cash * 1.05)
+
+    full = analytics.AprTracker()
+    full.update(trades)
+
+    incremental = analytics.AprTracker()
+    incremental.update(analytics.Trades(*(column[:60] for column in trades)), 60)
+    path = tmp_path / "apr.npz"
+    incremental.save(path)
+    incremental = analytics.AprTracker.load(path)
+    assert incremental.last_block == 60
+    incremental.update(analytics.Trades(*(column[60:] for column in trades)), 100)
+
+    for expected, actual in zip(full.report(YEAR // 3), incremental.report(YEAR // 3)):
+        assert actual == pytest.approx(expected)
+
+
+def test_update_from_chain(
+    chain, token, vault, strategy, n_proxy, user, strategist, amount, tmp_path
+):
+    actions.user_deposit(user, vault, token, amount)
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+
+    event_index = indexer.EventIndex(tmp_path / "events.sqlite")
+    tracker = analytics.update_from_chain(
+        analytics.AprTracker(), n_proxy, strategy, event_index=event_index
+    )
+    maturities, _, _ = strategy.getPositions()
+    assert sorted(tracker.maturity) == sorted(maturities)
+    assert tracker.last_block == chain.height
+
+    report = tracker.report(chain.time())
+    markets = {m[1]: m[5] for m in n_proxy.getActiveMarkets(strategy.currencyID())}
+    # the lends move the market to about their own rate, net of fees
+    for maturity, rate in zip(report.maturity, report.implied_rate):
+        assert rate == pytest.approx(markets[maturity] / 1e9, abs=5e-3)
@@ -0,0 +1,90 @@
+import pytest
+from utils import actions
+
+QUARTER = 90 * 86_400
+
+
+def _lend_and_roll_over(chain, strategy, n_proxy, currency_id, strategist):
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    chain.sleep(QUARTER - chain.time() % QUARTER + 86_400)
+    n_proxy.initializeMarkets(currency_id, False, {"from": strategist})
+    return strategy.harvest({"from": strategist})
+
+
+def test_keep_cash_balance(
+    chain,
+    token,
+    vault,
+    strategy,
+    n_proxy,
+    currency_id,
+    user,
+    strategist,
+    gov,
+    amount,
+    RELATIVE_APPROX,
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setKeepCashBalance(True, {"from": gov})
+    strategy.setLadder(1, 1, 10_000, {"from": gov})
+    tx = _lend_and_roll_over(chain, strategy, n_proxy, currency_id, strategist)
+
+    # only the profit is withdrawn, the cash the new lend doesn't use stays in Notional
+    assert tx.events["Harvested"]["profit"] > 0
+    assert n_proxy.getAccountBalance(currency_id, strategy)[0] > 0
+    total_debt = vault.strategies(strategy).dict()["totalDebt"]
+    assert (
+        pytest.approx(strategy.estimatedTotalAssets(), rel=RELATIVE_APPROX)
+        == total_debt
+    )
+
+    # the kept cash funds the next harvest
+    cash_balance = n_proxy.getAccountBalance(currency_id, strategy)[0]
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    assert n_proxy.getAccountBalance(currency_id, strategy)[0] < cash_balance
+
+    # and withdrawn with the positions when the strategy is emptied
+    vault.updateStrategyDebtRatio(strategy, 0, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    assert n_proxy.getAccountBalance(currency_id, strategy)[0] == 0
+
+
+def test_keep_cash_balance_migration(
+    chain,
+    token,
+    vault,
+    strategy,
+    Strategy,
+    n_proxy,
+    currency_id,
+    user,
+    strategist,
+    gov,
+    amount,
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setKeepCashBalance(True, {"from": gov})
+    _lend_and_roll_over(chain, strategy, n_proxy, currency_id, strategist)
+    assert n_proxy.getAccountBalance(currency_id, strategy)[0] > 0
+
+    new_strategy = strategist.deploy(Strategy, vault, n_proxy)
+    vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+    assert n_proxy.getAccountBalance(currency_id, strategy)[0] == 0
+    assert token.balanceOf(strategy) == 0
+
+
+def test_keep_cash_balance_withdraw_loss(
+    chain, token, vault, strategy, n_proxy, currency_id, user, strategist, gov, amount
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setKeepCashBalance(True, {"from": gov})
+    strategy.setLadder(1, 1, 10_000, {"from": gov})
+    _lend_and_roll_over(chain, strategy, n_proxy, currency_id, strategist)
+    assert n_proxy.getAccountBalance(currency_id, strategy)[0] > 0
+
+    # the kept cash withdrawn with the sold fCash doesn't hide its slippage
+    vault.withdraw(vault.balanceOf(user) // 2, user, 10_000, {"from": user})
+    assert vault.strategies(strategy).dict()["totalLoss"] > 0
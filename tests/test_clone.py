@@ -1,21 +1,41 @@
-# TODO: Uncomment if your strategy is clonable
+import brownie
+import pytest
+from utils import actions
 
-# from utils import actions
 
-# def test_clone(
-#     vault, strategy, token, amount, gov, user, RELATIVE_APPROX
-# ):
-#     # send strategy to steady state
-#     actions.first_deposit_and_harvest(vault, strategy, token, user, gov, amount, RELATIVE_APPROX)
+def test_clone(
+    chain, token, vault, strategy, cloned_strategy, user, strategist, amount
+):
+    assert strategy.isOriginal()
+    assert not cloned_strategy.isOriginal()
+    assert cloned_strategy.nProxy() == strategy.nProxy()
+    assert cloned_strategy.want() == strategy.want()
+    assert cloned_strategy.ladderSize() == strategy.ladderSize()
 
-#     # TODO: add clone logic
-#     cloned_strategy = strategy.clone(vault, {'from': gov})
+    # the clone takes all the debt and lends it
+    actions.user_deposit(user, vault, token, amount)
+    chain.sleep(1)
+    cloned_strategy.harvest({"from": strategist})
+    assert strategy.estimatedTotalAssets() == 0
+    assert pytest.approx(cloned_strategy.estimatedTotalAssets(), rel=1e-3) == amount
+    assert len(cloned_strategy.getPositions()[0]) == 1
 
-#     # free funds from old strategy
-#     vault.revokeStrategy(strategy, {'from': gov})
-#     strategy.harvest({'from': gov})
-#     assert strategy.estimatedTotalAssets() == 0
 
-#     # take funds to new strategy
-#     cloned_strategy.harvest({'from': gov})
-#     assert cloned_strategy.estimatedTotalAssets() > 0
+def test_clone_initialized_once(
+    vault, strategy, cloned_strategy, strategist, rewards, keeper, n_proxy
+):
+    args = (vault, strategist, rewards, keeper, n_proxy)
+    with brownie.reverts("Strategy already initialized"):
+        strategy.initialize(*args, {"from": strategist})
+    with brownie.reverts("Strategy already initialized"):
+        cloned_strategy.initialize(*args, {"from": strategist})
+    with brownie.reverts("!clone"):
+        cloned_strategy.cloneStrategy(*args, {"from": strategist})
+
+
+def test_clone_gas(vault, strategy, strategist, rewards, keeper, n_proxy):
+    tx = strategy.cloneStrategy(
+        vault, strategist, rewards, keeper, n_proxy, {"from": strategist}
+    )
+    # the clone only pays for initialization, not for the bytecode
+    assert tx.gas_used * 3 < strategy.tx.gas_used
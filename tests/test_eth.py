@@ -0,0 +1,56 @@
+import pytest
+from brownie import ZERO_ADDRESS
+from utils import actions
+
+
+@pytest.fixture
+def eth_n_proxy(local_chain, accounts, token, MockNotional, amount):
+    if not local_chain or token.symbol() != "WETH":
+        pytest.skip("the mock ETH currency is for WETH on the development network")
+    deployer = accounts[0]
+    n_proxy = deployer.deploy(MockNotional)
+    # ETH is listed like Notional's: no underlying token and no rate oracle
+    n_proxy.listCurrency(ZERO_ADDRESS, ZERO_ADDRESS, 18, False, 3, {"from": deployer})
+    currency_id = n_proxy.maxCurrencyId()
+    # 50 times the deposit of fCash in every market at 5%
+    n_proxy.setMarketDefaults(
+        currency_id, 50 * amount * 10 ** 8 // 10 ** 18, 5 * 10 ** 7, {"from": deployer}
+    )
+    n_proxy.initializeMarkets(currency_id, True, {"from": deployer})
+    yield n_proxy
+
+
+@pytest.fixture
+def eth_strategy(
+    strategist, keeper, vault, strategy, MockWETHStrategy, eth_n_proxy, gov
+):
+    eth_strategy = strategist.deploy(MockWETHStrategy, vault, eth_n_proxy)
+    eth_strategy.setKeeper(keeper)
+    vault.updateStrategyDebtRatio(strategy, 0, {"from": gov})
+    vault.addStrategy(eth_strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+    yield eth_strategy
+
+
+def test_eth_currency(
+    chain, token, vault, eth_strategy, eth_n_proxy, user, strategist, gov, amount
+):
+    assert eth_strategy.currencyID() == eth_n_proxy.maxCurrencyId()
+    actions.user_deposit(user, vault, token, amount)
+    chain.sleep(1)
+    eth_strategy.harvest({"from": strategist})
+
+    # want is unwrapped into the ETH Notional lends, none is left behind
+    assert eth_n_proxy.balance() > 0
+    assert eth_strategy.balance() == 0
+    assert len(eth_n_proxy.getAccountPortfolio(eth_strategy)) > 0
+
+    # the ETH Notional pays back is wrapped into want again
+    vault.updateStrategyDebtRatio(eth_strategy, 0, {"from": gov})
+    chain.sleep(1)
+    eth_strategy.harvest({"from": strategist})
+    assert eth_strategy.balance() == 0
+    assert len(eth_n_proxy.getAccountPortfolio(eth_strategy)) == 0
+    assert vault.strategies(eth_strategy).dict()["totalDebt"] == 0
+
+    vault.withdraw(vault.balanceOf(user), user, 10_000, {"from": user})
+    assert token.balanceOf(user) > 0
@@ -0,0 +1,108 @@
+import pytest
+from utils import actions
+
+# Gas snapshots, update them when a change is expected to move the cost
+LEND_TRADE_ENCODING_GAS = 23_000
+FIRST_HARVEST_GAS = 750_000
+PARTIAL_WITHDRAW_GAS = 900_000
+ROLLOVER_GAS = 1_000_000
+# unwinding every market, nTokens and a kept cash balance at once
+EMERGENCY_EXIT_GAS = 2_500_000
+BLOCK_GAS_LIMIT = 30_000_000
+MAX_LADDER_SIZE = 8
+MAX_MARKET_INDEX = 7
+QUARTER = 90 * 86_400
+
+
+def test_lend_trade_encoding_gas(strategy):
+    # includes the 21k of the transaction base cost
+    gas = strategy.getTradeFrom.estimate_gas(1, 1_000 * 10 ** 8, 0)
+    assert gas <= LEND_TRADE_ENCODING_GAS
+
+
+def test_first_harvest_gas(chain, token, vault, strategy, user, strategist, amount):
+    actions.user_deposit(user, vault, token, amount)
+
+    chain.sleep(1)
+    tx = strategy.harvest({"from": strategist})
+    assert tx.gas_used <= FIRST_HARVEST_GAS
+
+
+def test_valuation_gas(chain, token, vault, strategy, user, strategist, gov, amount):
+    actions.user_deposit(user, vault, token, amount)
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+
+    positions_gas = strategy.estimatedTotalAssets.estimate_gas()
+    positions_value = strategy.estimatedTotalAssets()
+
+    strategy.setPortfolioValuation(True, {"from": gov})
+    portfolio_gas = strategy.estimatedTotalAssets.estimate_gas()
+    portfolio_value = strategy.estimatedTotalAssets()
+
+    assert positions_gas < portfolio_gas
+    assert pytest.approx(positions_value, rel=1e-3) == portfolio_value
+
+
+def test_partial_withdraw_gas(
+    chain, token, vault, strategy, user, strategist, gov, amount
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setLadder(3, 3, 1, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+
+    to_withdraw = token.balanceOf(strategy) + amount // 10
+    tx = vault.withdraw(to_withdraw, user, 100, {"from": user})
+    assert tx.gas_used <= PARTIAL_WITHDRAW_GAS
+
+
+def test_rollover_gas(
+    chain, token, vault, strategy, n_proxy, currency_id, user, strategist, gov, amount
+):
+    actions.user_deposit(user, vault, token, amount)
+    # a single 3 month position so it matures at the next quarter
+    strategy.setLadder(1, 1, 10_000, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+
+    chain.sleep(QUARTER - chain.time() % QUARTER + 86_400)
+    # nobody else initializes the new quarter's markets on a fork
+    n_proxy.initializeMarkets(currency_id, False, {"from": strategist})
+    tx = strategy.harvest({"from": strategist})
+
+    # settling, withdrawing the profit and lending again happen in one batch
+    assert len(tx.events["LendBorrowTrade"]) == 1
+    maturities, _, _ = strategy.getPositions()
+    assert len(maturities) == 1 and maturities[0] > chain.time()
+    assert tx.gas_used <= ROLLOVER_GAS
+
+
+def test_emergency_exit_gas(
+    chain, token, vault, strategy, n_proxy, currency_id, user, strategist, gov, amount
+):
+    # worst case: a rung in every market, nTokens and kept cash, and a quarter
+    # later matured fCash to settle and fCash without a market left behind
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setLadder(MAX_LADDER_SIZE, MAX_MARKET_INDEX, 1, {"from": gov})
+    strategy.setNTokenShare(2_000, {"from": gov})
+    strategy.setKeepCashBalance(True, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    markets = n_proxy.getActiveMarkets(currency_id)
+    assert len(strategy.getPositions()[0]) == len(markets)
+
+    chain.sleep(QUARTER - chain.time() % QUARTER + 86_400)
+    n_proxy.initializeMarkets(currency_id, False, {"from": strategist})
+    strategy.setEmergencyExit({"from": gov})
+    tx = strategy.harvest({"from": strategist})
+
+    # everything is unwound in a single batch
+    assert tx.gas_used <= EMERGENCY_EXIT_GAS < BLOCK_GAS_LIMIT
+    assert n_proxy.getAccountBalance(currency_id, strategy)[:2] == (0, 0)
+    maturities = [market[1] for market in n_proxy.getActiveMarkets(currency_id)]
+    assert all(
+        maturity not in maturities and maturity > chain.time()
+        for maturity in strategy.getPositions()[0]
+    )
+    assert token.balanceOf(strategy) == 0
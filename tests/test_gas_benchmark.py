@@ -0,0 +1,119 @@
+import pytest
+from utils import actions
+
+# Gas benchmarks of the strategy lifecycle, checked against tests/gas_baseline.json.
+# Run with --update-gas-baseline to record a new baseline after an expected change.
+QUARTER = 90 * 86_400
+MARKETS = 3
+
+
+def _set_ladder(strategy, n_proxy, currency_id, gov, token, deposit, ladder_size):
+    # the smallest market share that still lends the whole deposit across the rungs
+    deposit = deposit * 10 ** 8 // 10 ** token.decimals()
+    liquidity = min(market[2] for market in n_proxy.getActiveMarkets(currency_id))
+    share_bps = min(10_000, -(-deposit * 10_000 // (ladder_size * liquidity)) + 1)
+    strategy.setLadder(ladder_size, MARKETS, share_bps, {"from": gov})
+
+
+@pytest.mark.parametrize("ladder_size", [1, 3])
+@pytest.mark.parametrize("tvl_share", [0.01, 0.1, 1])
+def test_lifecycle_gas(
+    chain,
+    token,
+    vault,
+    strategy,
+    n_proxy,
+    currency_id,
+    Strategy,
+    user,
+    strategist,
+    gov,
+    amount,
+    gas_benchmark,
+    tvl_share,
+    ladder_size,
+):
+    symbol = token.symbol()
+    params = f"[tvl={tvl_share},ladder={ladder_size}]"
+    deposit = int(amount * tvl_share)
+    actions.user_deposit(user, vault, token, deposit)
+    _set_ladder(strategy, n_proxy, currency_id, gov, token, deposit, ladder_size)
+
+    chain.sleep(1)
+    tx = strategy.harvest({"from": strategist})
+    gas_benchmark.record(symbol, f"harvest_first{params}", tx)
+
+    chain.sleep(86_400)
+    tx = strategy.harvest({"from": strategist})
+    gas_benchmark.record(symbol, f"harvest_steady{params}", tx)
+
+    # more than the idle want, so positions are sold through liquidatePosition
+    to_withdraw = token.balanceOf(strategy) + deposit // 10
+    tx = vault.withdraw(to_withdraw, user, 100, {"from": user})
+    gas_benchmark.record(symbol, f"withdraw_partial{params}", tx)
+
+    chain.sleep(QUARTER - chain.time() % QUARTER + 86_400)
+    n_proxy.initializeMarkets(currency_id, False, {"from": strategist})
+    tx = strategy.harvest({"from": strategist})
+    gas_benchmark.record(symbol, f"harvest_rollover{params}", tx)
+
+    new_strategy = strategist.deploy(Strategy, vault, n_proxy)
+    tx = vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+    gas_benchmark.record(symbol, f"migrate{params}", tx)
+
+
+@pytest.mark.parametrize("keep_cash", [False, True])
+def test_rollover_cash_gas(
+    chain,
+    token,
+    vault,
+    strategy,
+    n_proxy,
+    currency_id,
+    user,
+    strategist,
+    gov,
+    amount,
+    gas_benchmark,
+    keep_cash,
+):
+    # keeping the cash in Notional skips redeeming it and depositing it back
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setKeepCashBalance(keep_cash, {"from": gov})
+    _set_ladder(strategy, n_proxy, currency_id, gov, token, amount, 1)
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+
+    for rollover in range(2):
+        chain.sleep(QUARTER - chain.time() % QUARTER + 86_400)
+        n_proxy.initializeMarkets(currency_id, False, {"from": strategist})
+        tx = strategy.harvest({"from": strategist})
+        gas_benchmark.record(
+            token.symbol(), f"rollover_{rollover}[keep_cash={keep_cash}]", tx
+        )
+
+
+@pytest.mark.parametrize("ladder_size", [1, 3])
+def test_liquidate_all_gas(
+    chain,
+    token,
+    vault,
+    strategy,
+    n_proxy,
+    currency_id,
+    user,
+    strategist,
+    gov,
+    amount,
+    gas_benchmark,
+    ladder_size,
+):
+    actions.user_deposit(user, vault, token, amount)
+    _set_ladder(strategy, n_proxy, currency_id, gov, token, amount, ladder_size)
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+
+    # an emergency exit harvest frees everything through liquidateAllPositions
+    strategy.setEmergencyExit({"from": gov})
+    tx = strategy.harvest({"from": strategist})
+    gas_benchmark.record(token.symbol(), f"liquidate_all[ladder={ladder_size}]", tx)
@@ -1,14 +1,15 @@
 from utils import actions
 import brownie
-from brownie import Contract
 
 
-def test_healthcheck(user, vault, token, amount, strategy, chain, strategist, gov):
+def test_healthcheck(
+    user, vault, token, amount, strategy, chain, strategist, gov, health_check
+):
     # Deposit to the vault
     actions.user_deposit(user, vault, token, amount)
 
     assert strategy.doHealthCheck()
-    assert strategy.healthCheck() == Contract("health.ychad.eth")
+    assert strategy.healthCheck() == health_check
 
     chain.sleep(1)
     strategy.harvest({"from": strategist})
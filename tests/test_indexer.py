@@ -0,0 +1,49 @@
+from brownie import web3
+
+from scripts import indexer
+from utils import actions
+
+
+def test_index_strategy_events(
+    chain, token, vault, strategy, user, strategist, amount, n_proxy, tmp_path
+):
+    start = chain.height
+    actions.user_deposit(user, vault, token, amount)
+    chain.sleep(1)
+    first = strategy.harvest({"from": strategist})
+    chain.sleep(86_400)
+    second = strategy.harvest({"from": strategist})
+
+    # a node that refuses ranges over 2 blocks
+    def get_logs(log_filter):
+        if log_filter["toBlock"] - log_filter["fromBlock"] >= 2:
+            raise ValueError("query returned more than 10000 results")
+        return web3.eth.get_logs(log_filter)
+
+    strategies = {strategy.address: vault.address}
+    event_index = indexer.EventIndex(tmp_path / "events.sqlite")
+    indexer.index(
+        event_index,
+        strategies,
+        start_block=start,
+        n_proxy=n_proxy.address,
+        get_logs=get_logs,
+    )
+    assert event_index.last_block(strategy.address) == chain.height
+
+    harvests = event_index.harvests(strategy.address)
+    assert [h[2] for h in harvests] == [first.txid, second.txid]
+    assert harvests[1][4]["profit"] == second.events["Harvested"]["profit"]
+
+    reports = event_index.events(strategy.address, "StrategyReported")
+    assert reports[-1][4]["totalDebt"] == vault.strategies(strategy).dict()["totalDebt"]
+    trades = event_index.events(strategy.address, "LendBorrowTrade")
+    assert len(trades) == len(first.events["LendBorrowTrade"]) + len(
+        second.events["LendBorrowTrade"]
+    )
+
+    # a second run only reads the new blocks and stores nothing twice
+    chain.mine(3)
+    indexer.index(event_index, strategies, n_proxy=n_proxy.address)
+    assert event_index.last_block(strategy.address) == chain.height
+    assert len(event_index.harvests(strategy.address)) == 2
@@ -0,0 +1,81 @@
+import asyncio
+
+from brownie import web3
+from scripts.keeper import Keeper, NonceManager
+from utils import actions
+
+QUARTER = 90 * 86_400
+
+
+def test_keeper_harvests_fleet(
+    chain,
+    token,
+    vault,
+    strategy,
+    Strategy,
+    n_proxy,
+    strategist,
+    keeper,
+    gov,
+    user,
+    amount,
+):
+    # a second strategy sharing the vault's debt
+    vault.updateStrategyDebtRatio(strategy, 5_000, {"from": gov})
+    other = strategist.deploy(Strategy, vault, n_proxy)
+    other.setKeeper(keeper, {"from": strategist})
+    vault.addStrategy(other, 5_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+    actions.user_deposit(user, vault, token, amount)
+    chain.sleep(1)
+    chain.mine()
+
+    bot = Keeper.from_addresses([strategy.address, other.address], keeper, workers=2)
+    asyncio.get_event_loop().run_until_complete(bot.run(blocks=1))
+
+    # both due harvests were sent concurrently with consecutive nonces
+    assert sorted(job.deployment.strategy.address for job, _ in bot.sent) == sorted(
+        [strategy.address, other.address]
+    )
+    assert all(job.action == "harvest" and tx.status == 1 for job, tx in bot.sent)
+    nonces = sorted(tx.nonce for _, tx in bot.sent)
+    assert nonces[1] == nonces[0] + 1
+    assert vault.strategies(strategy).dict()["totalDebt"] > 0
+    assert vault.strategies(other).dict()["totalDebt"] > 0
+
+
+def test_keeper_waits_for_markets(chain, token, vault, strategy, keeper, user, amount):
+    actions.user_deposit(user, vault, token, amount)
+    bot = Keeper.from_addresses([strategy.address], keeper)
+    assert [job.action for job in bot.due_jobs(bot.read(chain.height))] == ["harvest"]
+
+    # the new quarter's markets are not initialized yet
+    chain.sleep(QUARTER - chain.time() % QUARTER + 86_400)
+    chain.mine()
+    assert bot.due_jobs(bot.read(chain.height)) == []
+
+
+def test_nonce_manager_failed_send(keeper):
+    nonces = NonceManager(keeper)
+    first = web3.eth.get_transaction_count(keeper.address, "pending")
+    sent = []
+
+    async def fail(nonce):
+        raise ValueError("rejected")
+
+    async def broadcast(nonce):
+        await asyncio.sleep(0)
+        sent.append(nonce)
+
+    async def send_all():
+        return await asyncio.gather(
+            nonces.send(fail),
+            nonces.send(broadcast),
+            nonces.send(broadcast),
+            return_exceptions=True,
+        )
+
+    results = asyncio.get_event_loop().run_until_complete(send_all())
+
+    # the failed send's nonce is reused, none is handed out twice
+    assert isinstance(results[0], ValueError)
+    assert sent == [first, first + 1]
@@ -0,0 +1,38 @@
+import pytest
+from utils import actions
+
+FIRST_HARVEST_GAS = 750_000
+# Extra gas a harvest may spend for every additional rung of the ladder
+GAS_PER_RUNG = 150_000
+
+
+def test_ladder_harvest(chain, token, vault, strategy, user, strategist, gov, amount):
+    actions.user_deposit(user, vault, token, amount)
+    # a tiny market share forces the deposit to be split across every market
+    strategy.setLadder(3, 3, 1, {"from": gov})
+
+    chain.sleep(1)
+    tx = strategy.harvest({"from": strategist})
+
+    # all the rungs are lent in a single batch
+    assert len(tx.events["LendBorrowTrade"]) == 3
+    maturities, _, fcash_amounts = strategy.getPositions()
+    assert len(set(maturities)) == 3
+    assert all(fcash_amount > 0 for fcash_amount in fcash_amounts)
+
+    # what the markets could not take stays idle until the next harvest
+    assert token.balanceOf(strategy) > 0
+    assert pytest.approx(strategy.estimatedTotalAssets(), rel=1e-3) == amount
+
+
+@pytest.mark.parametrize("ladder_size", [1, 2, 3])
+def test_ladder_gas(
+    chain, token, vault, strategy, user, strategist, gov, amount, ladder_size
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setLadder(ladder_size, 3, 1, {"from": gov})
+
+    chain.sleep(1)
+    tx = strategy.harvest({"from": strategist})
+    assert len(tx.events["LendBorrowTrade"]) == ladder_size
+    assert tx.gas_used <= FIRST_HARVEST_GAS + (ladder_size - 1) * GAS_PER_RUNG
@@ -0,0 +1,54 @@
+import numpy as np
+
+from scripts import market_data
+
+
+def test_ingest_resumes(chain, n_proxy, currency_id, tmp_path):
+    start = chain.height
+    chain.mine(4)
+    store = market_data.ingest(
+        n_proxy,
+        start,
+        chain.height,
+        step=2,
+        currency_ids=(currency_id,),
+        store=market_data.MarketStore(tmp_path),
+        workers=2,
+    )
+    markets = n_proxy.getActiveMarkets(currency_id)
+    assert store.rows == 3 * len(markets)
+
+    # a second run only reads the blocks mined since
+    chain.mine(4)
+    store = market_data.ingest(
+        n_proxy,
+        start,
+        chain.height,
+        step=2,
+        currency_ids=(currency_id,),
+        store=market_data.MarketStore(tmp_path),
+        workers=2,
+    )
+    assert store.rows == 5 * len(markets)
+
+    # and the data is read back from disk
+    columns = market_data.MarketStore(tmp_path).read()
+    assert list(np.unique(columns["block"])) == list(range(start, chain.height + 1, 2))
+    assert np.all(np.diff(columns["block"]) >= 0)
+    last = store.between(store.last_block, store.last_block)
+    assert list(last["maturity"]) == [market[1] for market in markets]
+    assert list(last["total_fcash"]) == [market[2] for market in markets]
+
+
+def test_store_drops_uncommitted_rows(tmp_path):
+    store = market_data.MarketStore(tmp_path)
+    rows = {name: [1, 2] for name in market_data.COLUMNS}
+    store.append(rows, 2)
+
+    # a crash between the column writes and the header leaves extra rows behind
+    with open(tmp_path / "block.bin", "ab") as f:
+        f.write(np.array([3], dtype=np.int64).tobytes())
+
+    store = market_data.MarketStore(tmp_path)
+    assert store.rows == 2 and store.last_block == 2
+    assert list(store.read()["block"]) == [1, 2]
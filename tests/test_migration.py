@@ -2,6 +2,7 @@
 #       Use another copy of the strategy to simulate the migration
 #       Show that nothing is lost!
 
+import brownie
 import pytest
 from utils import actions
 
@@ -13,6 +14,7 @@ def test_migration(
     strategy,
     amount,
     Strategy,
+    n_proxy,
     strategist,
     gov,
     user,
@@ -27,18 +29,67 @@ def test_migration(
 
     # TODO: add other tokens balance
     pre_want_balance = token.balanceOf(strategy)
+    pre_total_assets = strategy.estimatedTotalAssets()
+    maturities, implied_rates, fcash_amounts = strategy.getPositions()
 
     # migrate to a new strategy
-    new_strategy = strategist.deploy(Strategy, vault)
+    new_strategy = strategist.deploy(Strategy, vault, n_proxy)
     vault.migrateStrategy(strategy, new_strategy, {"from": gov})
     assert (
         pytest.approx(new_strategy.estimatedTotalAssets(), rel=RELATIVE_APPROX)
         == amount
     )
 
+    # the fCash moved as is, with the rates it was lent at
+    assert new_strategy.estimatedTotalAssets() == pytest.approx(pre_total_assets)
+    assert strategy.estimatedTotalAssets() == 0
+    assert len(n_proxy.getAccountPortfolio(strategy)) == 0
+    new_maturities, new_implied_rates, new_fcash_amounts = new_strategy.getPositions()
+    assert new_maturities == maturities
+    assert new_fcash_amounts == fcash_amounts
+    assert new_implied_rates == pytest.approx(implied_rates, rel=1e-6)
+
     # TODO: check that balances match previous balances
     # TODO: add more tokens that the strategy holds
     assert pre_want_balance == token.balanceOf(new_strategy)
 
     # check that harvest work as expected
     new_strategy.harvest({"from": gov})
+
+
+@pytest.mark.parametrize("ladder_size", [1, 3])
+def test_migration_gas(
+    chain,
+    token,
+    vault,
+    strategy,
+    amount,
+    Strategy,
+    n_proxy,
+    strategist,
+    gov,
+    user,
+    gas_benchmark,
+    ladder_size,
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setLadder(ladder_size, 3, 1, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+    positions = len(strategy.getPositions()[0])
+    assert positions == ladder_size
+
+    # every position goes in a single ERC1155 batch transfer
+    new_strategy = strategist.deploy(Strategy, vault, n_proxy)
+    tx = vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+    assert len(tx.events["TransferBatch"]) == 1
+    assert "LendBorrowTrade" not in tx.events
+    assert len(new_strategy.getPositions()[0]) == positions
+    # checked against tests/gas_baseline.json like the lifecycle benchmarks
+    gas_benchmark.record(token.symbol(), f"migrate_positions[ladder={ladder_size}]", tx)
+
+
+def test_migration_rejects_others(strategy, n_proxy, user):
+    # only Notional, for a strategy of the same vault, can hand positions over
+    with brownie.reverts("!migration"):
+        strategy.onERC1155BatchReceived(user, user, [], [], b"", {"from": user})
@@ -0,0 +1,93 @@
+import pytest
+from brownie import Contract
+from utils import actions
+
+YEAR = 360 * 86_400
+
+
+def test_ntoken_share(
+    chain,
+    token,
+    vault,
+    strategy,
+    n_proxy,
+    currency_id,
+    user,
+    strategist,
+    gov,
+    amount,
+    RELATIVE_APPROX,
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setNTokenShare(5_000, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+
+    # half the assets mint nTokens, the rest is lent
+    n_tokens = n_proxy.getAccountBalance(currency_id, strategy)[1]
+    assert n_tokens > 0
+    assert len(n_proxy.getAccountPortfolio(strategy)) > 0
+    assert pytest.approx(strategy.estimatedTotalAssets(), rel=RELATIVE_APPROX) == amount
+
+    # withdrawals redeem nTokens before selling fCash
+    vault.withdraw(amount // 4, user, 10_000, {"from": user})
+    assert n_proxy.getAccountBalance(currency_id, strategy)[1] < n_tokens
+
+    vault.updateStrategyDebtRatio(strategy, 0, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    assert n_proxy.getAccountBalance(currency_id, strategy)[1] == 0
+
+
+def test_ntoken_withdraw_loss(
+    chain, token, vault, strategy, n_proxy, currency_id, user, strategist, gov, amount
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setNTokenShare(5_000, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+
+    # the redeemed nTokens don't hide the slippage of the fCash sold with them
+    vault.withdraw(amount * 3 // 4, user, 10_000, {"from": user})
+    assert n_proxy.getAccountBalance(currency_id, strategy)[1] == 0
+    assert vault.strategies(strategy).dict()["totalLoss"] > 0
+
+
+def test_ntoken_incentives(
+    chain,
+    token,
+    vault,
+    strategy,
+    n_proxy,
+    currency_id,
+    user,
+    strategist,
+    gov,
+    amount,
+    Strategy,
+    local_chain,
+):
+    if not local_chain:
+        pytest.skip("incentives are only simulated by the mock")
+    note = Contract.from_abi("NOTE", n_proxy.getNoteToken(), token.abi)
+    n_proxy.setIncentiveRate(10 ** 7, {"from": gov})
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setNTokenShare(10_000, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    assert n_proxy.getAccountBalance(currency_id, strategy)[1] > 0
+
+    # NOTE accrued since the mint is claimed on harvest
+    chain.sleep(YEAR // 4)
+    chain.mine(1)
+    assert n_proxy.nTokenGetClaimableIncentives(strategy, chain.time()) > 0
+    strategy.harvest({"from": strategist})
+    balance = note.balanceOf(strategy)
+    assert balance > 0
+
+    # and handed to the new strategy with the redeemed nTokens on migration
+    new_strategy = strategist.deploy(Strategy, vault, n_proxy)
+    vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+    assert n_proxy.getAccountBalance(currency_id, strategy)[1] == 0
+    assert note.balanceOf(strategy) == 0
+    assert note.balanceOf(new_strategy) >= balance
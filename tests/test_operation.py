@@ -41,6 +41,11 @@ def test_emergency_exit(
     strategy.harvest({"from": strategist})
     assert strategy.estimatedTotalAssets() < amount
 
+    # every position is sold back and the want returned to the vault
+    assert len(strategy.getPositions()[0]) == 0
+    assert strategy.estimatedTotalAssets() == 0
+    assert pytest.approx(token.balanceOf(vault), rel=1e-2) == amount
+
 
 def test_increase_debt_ratio(
     chain, gov, token, vault, strategy, user, strategist, amount, RELATIVE_APPROX
@@ -112,3 +117,37 @@ def test_triggers(chain, gov, vault, strategy, token, amount, user, strategist):
 
     strategy.harvestTrigger(0)
     strategy.tendTrigger(0)
+
+
+def test_positions(chain, token, vault, strategy, user, strategist, amount):
+    actions.user_deposit(user, vault, token, amount)
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+
+    maturities, implied_rates, fcash_amounts = strategy.getPositions()
+    assert len(maturities) == 1
+    assert maturities[0] > chain.time()
+    assert implied_rates[0] > 0
+    # lent fCash is worth more than the cash it cost at maturity
+    assert fcash_amounts[0] * 10 ** token.decimals() > amount * 10 ** 8
+
+
+def test_partial_withdraw(
+    chain, gov, token, vault, strategy, user, strategist, amount, RELATIVE_APPROX
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setLadder(3, 3, 1, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    idle = token.balanceOf(strategy)
+    _, _, fcash_before = strategy.getPositions()
+
+    # more than what is idle so fCash has to be sold, accepting the slippage
+    to_withdraw = idle + (amount - idle) // 4
+    tx = vault.withdraw(to_withdraw, user, 100, {"from": user})
+
+    # sales from every market went through a single batch
+    assert 0 < len(tx.events["LendBorrowTrade"]) <= 3
+    assert pytest.approx(token.balanceOf(user), rel=1e-2) == to_withdraw
+    _, _, fcash_after = strategy.getPositions()
+    assert sum(fcash_after) < sum(fcash_before)
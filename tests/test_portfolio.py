@@ -0,0 +1,68 @@
+import numpy as np
+
+from scripts import portfolio
+from utils import actions
+
+DAY = portfolio.DAY
+
+
+def _bitmap(*bit_nums):
+    value = sum(1 << (256 - bit_num) for bit_num in bit_nums)
+    return value.to_bytes(32, "big")
+
+
+def test_bitmap_maturities():
+    # 900 days, a multiple of every chunk's period, plus some time in the day
+    next_settle_time = 900 * DAY + 500
+    time = 900 * DAY
+    maturities = portfolio.bitmap_maturities(
+        _bitmap(1, 90, 91, 136, 196), next_settle_time
+    )
+    assert list(maturities) == [
+        time + DAY,
+        time + 90 * DAY,
+        time + 90 * DAY + portfolio.WEEK,
+        time + 360 * DAY + portfolio.MONTH,
+        time + 2160 * DAY + portfolio.QUARTER,
+    ]
+    assert len(portfolio.bitmap_maturities(bytes(32), next_settle_time)) == 0
+
+
+def test_decode_ids():
+    ids = [(2 << 48) | (1_700_000_000 << 8) | 1, (3 << 48) | (1_800_000_000 << 8) | 1]
+    decoded = portfolio.decode_ids(ids, [5 * 10 ** 8, 7 * 10 ** 8])
+    assert list(decoded.currency_id) == [2, 3]
+    assert list(decoded.maturity) == [1_700_000_000, 1_800_000_000]
+    assert list(decoded.asset_type) == [1, 1]
+    assert list(decoded.notional) == [5 * 10 ** 8, 7 * 10 ** 8]
+
+
+def test_decode_columns():
+    assets = [(2, 1_700_000_000, 1, 100, 0, 0), (2, 1_800_000_000, 1, 200, 0, 0)]
+    decoded = portfolio.Portfolio.concat(
+        [
+            portfolio.decode_assets(assets, account=0),
+            portfolio.decode_bitmap(_bitmap(1), DAY, 3, [300], account=1),
+        ]
+    )
+    assert len(decoded) == 3
+    assert decoded.maturity.dtype == np.int64
+    assert list(decoded.of(0).notional) == [100, 200]
+    assert list(decoded.of(1).maturity) == [2 * DAY]
+    assert list(decoded.of(1).currency_id) == [3]
+
+
+def test_stream(chain, token, vault, strategy, n_proxy, user, strategist, amount):
+    actions.user_deposit(user, vault, token, amount)
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+
+    accounts = [strategy.address, user.address, vault.address]
+    batches = list(portfolio.stream(n_proxy, accounts, batch=2))
+    assert [len(batch_accounts) for batch_accounts, _ in batches] == [2, 1]
+
+    decoded = batches[0][1]
+    assets = n_proxy.getAccountPortfolio(strategy)
+    assert list(decoded.of(0).maturity) == [asset[1] for asset in assets]
+    assert list(decoded.of(0).notional) == [asset[3] for asset in assets]
+    assert len(decoded.of(1)) == 0 and len(batches[1][1]) == 0
@@ -0,0 +1,22 @@
+from utils.quotes import QuoteCache
+
+
+def test_quote_cache(chain, n_proxy, currency_id):
+    quotes = QuoteCache(n_proxy)
+    block = chain.height
+    cash_amount = 1_000 * 10 ** 8
+
+    fcash_amount = quotes.fcash_given_cash(currency_id, 1, cash_amount, block)
+    assert fcash_amount > cash_amount
+    cached = quotes.fcash_given_cash(currency_id, 1, cash_amount, block)
+    assert cached == fcash_amount
+    assert (quotes.hits, quotes.misses) == (1, 1)
+
+    cash_back = quotes.cash_given_fcash(currency_id, 1, fcash_amount, block)
+    assert cash_back <= cash_amount
+    assert quotes.misses == 2
+
+    # a new block means a new quote
+    chain.mine(1)
+    quotes.fcash_given_cash(currency_id, 1, cash_amount)
+    assert quotes.misses == 3
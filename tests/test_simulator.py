@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+from scripts import simulator
+
+
+@pytest.fixture
+def markets():
+    maturity = simulator.get_maturity(1, 0)
+    yield simulator.new_market(maturity, [1e6, 1e6, 1e7], 0.05)
+
+
+def test_lend_round_trip(markets):
+    cash_group = simulator.CashGroup()
+    cash = np.array([-1_000, -100_000, -100_000])
+    fcash = simulator.get_fcash_given_cash(markets, cash_group, cash, 0)
+    assert (fcash > -cash).all()
+
+    quoted, _ = simulator.get_cash_given_fcash(markets, cash_group, fcash, 0)
+    assert quoted == pytest.approx(cash)
+
+    # bigger lends move the rate further, deeper markets less
+    new_markets, _ = simulator.trade(markets, cash_group, fcash, 0)
+    assert (new_markets.last_implied_rate < 0.05).all()
+    moves = 0.05 - new_markets.last_implied_rate
+    assert moves[0] < moves[1]
+    assert moves[2] < moves[1]
+
+    # selling right away costs the fees
+    sold, _ = simulator.get_cash_given_fcash(markets, cash_group, -fcash, 0)
+    assert (sold < -cash).all()
+
+
+def test_simulate_sweep():
+    rates = simulator.synthetic_rates(4, 360, seed=1)
+    results = simulator.simulate(
+        np.repeat(rates, 2, axis=0),
+        deposit=1_000_000,
+        min_amount_want=0,
+        market_index=1,
+        harvest_every_days=np.tile([1, 30], 4),
+        market_liquidity=50_000_000,
+        harvest_cost=50,
+    )
+    apr = results["apr"].reshape(4, 2)
+    assert (apr > 0).all()
+    # daily harvests pay for more gas than monthly ones
+    assert (apr[:, 0] < apr[:, 1]).all()
+    assert (results["harvests"].reshape(4, 2) == [360, 12]).all()
+
+
+def test_long_terms():
+    maturities = simulator.get_maturity(np.array([6, 7]), 0)
+    assert (maturities == [10 * simulator.YEAR, 20 * simulator.YEAR]).all()
+
+
+def test_simulate_ladder_withdraw():
+    rates = simulator.synthetic_rates(2, 360, seed=2)
+    results = simulator.simulate(
+        np.repeat(rates, 3, axis=0),
+        deposit=1_000_000,
+        min_amount_want=0,
+        market_index=1,
+        harvest_every_days=7,
+        market_liquidity=50_000_000,
+        ladder_size=np.tile([1, 3, 3], 2),
+        withdraw_every_days=np.tile([0, 0, 30], 2),
+        withdraw_share=0.05,
+    )
+    withdrawn = results["withdrawn"].reshape(2, 3)
+    assert (withdrawn[:, :2] == 0).all()
+    # 5% of the assets eleven times, fCash sold once the idle want runs out
+    assert (withdrawn[:, 2] > 1_000_000 * (1 - 0.95 ** 11) * 0.99).all()
+    total_assets = results["total_assets"].reshape(2, 3)
+    assert (total_assets[:, 2] < total_assets[:, 1] - withdrawn[:, 2] * 0.9).all()
+    assert (results["apr"] > 0).all()
+
+
+def _post_trade_rate(cash, fcash, pre_trade_rate, time_to_maturity):
+    # Strategy._getPostTradeRate: the simple fill rate made continuously compounded
+    # (r - r^2 t / 2) then extrapolated geometrically to fill rate^2 / pre trade rate
+    rate = (fcash - cash) / cash * simulator.YEAR / time_to_maturity
+    rate = np.maximum(rate - rate ** 2 * time_to_maturity / simulator.YEAR / 2, 0)
+    return rate ** 2 / pre_trade_rate
+
+
+def test_post_trade_rate_estimate():
+    # the strategy's estimate never exceeds the rate Notional's logit curve leaves
+    # the market at, so a lend it lets through passes Notional's minImpliedRate
+    days, rate, proportion, size = [
+        x.ravel()
+        for x in np.meshgrid(
+            [7, 30, 90, 180, 360, 720, 1_800, 3_600, 7_200],
+            [0.005, 0.02, 0.05, 0.1, 0.15],
+            [0.3, 0.5, 0.7],
+            [1e-4, 1e-3, 1e-2, 0.05, 0.1],
+        )
+    ]
+    time_to_maturity = days * simulator.DAY
+    liquidity = 1e8
+    for total_fee_bps in [0, 10, 30, 50, 100]:
+        for rate_scalar in [10, 21, 50]:
+            cash_group = simulator.CashGroup(
+                rate_scalar=rate_scalar, total_fee_bps=total_fee_bps
+            )
+            markets = simulator.new_market(
+                time_to_maturity, liquidity, rate, proportion=proportion
+            )
+            cash = liquidity * size
+            fcash = simulator.get_fcash_given_cash(markets, cash_group, -cash, 0)
+            new_markets, _ = simulator.trade(markets, cash_group, fcash, 0)
+            estimate = _post_trade_rate(cash, fcash, rate, time_to_maturity)
+            assert (estimate <= new_markets.last_implied_rate + 1e-12).all()
@@ -0,0 +1,87 @@
+import brownie
+import pytest
+from utils import actions
+
+RATE_PRECISION = 10 ** 9
+MAX_BPS = 10_000
+MAX_CHUNKS = 4
+
+
+def _min_implied_rate(n_proxy, currency_id, tolerance_bps):
+    # the single market the tests lend into
+    oracle_rate = n_proxy.getActiveMarkets(currency_id)[0][6]
+    return oracle_rate - RATE_PRECISION * tolerance_bps // MAX_BPS
+
+
+def test_lends_within_rate_bound(
+    chain, token, vault, strategy, n_proxy, currency_id, user, strategist, gov, amount
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setLadder(1, 1, 10_000, {"from": gov})
+    # tight enough for the deposit to move the rate past it in one trade
+    strategy.setMaxRateSlippage(15, {"from": gov})
+    min_implied_rate = _min_implied_rate(n_proxy, currency_id, 15)
+
+    chain.sleep(1)
+    tx = strategy.harvest({"from": strategist})
+
+    # the rung is split into chunks in the same batch, those that would leave the
+    # market under the bound are not lent and their want stays idle
+    assert 0 < len(tx.events["LendBorrowTrade"]) < MAX_CHUNKS
+    assert token.balanceOf(strategy) > 0
+    _, implied_rates, _ = strategy.getPositions()
+    assert implied_rates[0] >= min_implied_rate
+    # the bound holds for the rate the market is left at, not only the fill rate
+    assert n_proxy.getActiveMarkets(currency_id)[0][5] >= min_implied_rate
+
+
+def test_no_rate_bound(
+    chain, token, vault, strategy, n_proxy, currency_id, user, strategist, gov, amount
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setLadder(1, 1, 10_000, {"from": gov})
+    strategy.setMaxRateSlippage(0, {"from": gov})
+    min_implied_rate = _min_implied_rate(n_proxy, currency_id, 5)
+
+    chain.sleep(1)
+    tx = strategy.harvest({"from": strategist})
+
+    # a single trade whatever the rate it moves the market to
+    assert len(tx.events["LendBorrowTrade"]) == 1
+    _, implied_rates, _ = strategy.getPositions()
+    assert implied_rates[0] < min_implied_rate
+
+
+def test_set_max_rate_slippage(strategy, gov, user):
+    assert strategy.maxRateSlippageBPS() == 50
+    with brownie.reverts("!maxRateSlippageBPS"):
+        strategy.setMaxRateSlippage(MAX_BPS + 1, {"from": gov})
+    with brownie.reverts("!authorized"):
+        strategy.setMaxRateSlippage(10, {"from": user})
+
+
+def test_lends_near_rate_bound_fork(
+    chain,
+    token,
+    vault,
+    strategy,
+    n_proxy,
+    currency_id,
+    user,
+    strategist,
+    gov,
+    amount,
+    local_chain,
+):
+    if local_chain:
+        pytest.skip("checks the estimate against Notional's own rate limit")
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setLadder(1, 1, 10_000, {"from": gov})
+    # a bound the deposit comes close to, every lend sent carries it as its
+    # minImpliedRate and Notional reverts the batch if the market ends under it
+    strategy.setMaxRateSlippage(1, {"from": gov})
+    min_implied_rate = _min_implied_rate(n_proxy, currency_id, 1)
+
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    assert n_proxy.getActiveMarkets(currency_id)[0][5] >= min_implied_rate
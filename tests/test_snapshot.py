@@ -0,0 +1,21 @@
+from utils import actions, snapshot
+
+
+def test_snapshot(chain, token, vault, strategy, n_proxy, user, strategist, amount):
+    actions.user_deposit(user, vault, token, amount)
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+
+    state = snapshot.take(vault, strategy, n_proxy)
+    assert state.block == chain.height
+    assert state.vault.total_assets == vault.totalAssets()
+    assert state.vault.decimals == token.decimals()
+    assert state.strategy.total_debt == vault.strategies(strategy).dict()["totalDebt"]
+    assert state.strategy.estimated_total_assets == strategy.estimatedTotalAssets()
+    assert len(state.notional.portfolio) == len(strategy.getPositions()[0])
+    assert len(state.notional.active_markets) > 0
+
+    # reads are pinned to the block, later state doesn't leak in
+    block = chain.height
+    strategy.harvest({"from": strategist})
+    assert snapshot.take(vault, strategy, block=block).strategy == state.strategy
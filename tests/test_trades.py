@@ -0,0 +1,39 @@
+import brownie
+import pytest
+from utils import trades
+
+
+@pytest.mark.parametrize(
+    "market_index,fcash_amount,min_implied_rate",
+    [
+        (1, 0, 0),
+        (1, 1_000 * 10 ** 8, 0),
+        (2, 123_456_789, 45_000_000),
+        (7, trades.MAX_UINT88, trades.MAX_UINT32),
+    ],
+)
+def test_lend_trade_encoding(strategy, market_index, fcash_amount, min_implied_rate):
+    trade = trades.encode_lend_trade(market_index, fcash_amount, min_implied_rate)
+    assert strategy.getTradeFrom(market_index, fcash_amount, min_implied_rate) == trade
+
+    decoded = trades.decode_trade(trade)
+    assert decoded.action_type == trades.TradeActionType.Lend
+    assert decoded.market_index == market_index
+    assert decoded.fcash_amount == fcash_amount
+    assert decoded.implied_rate_limit == min_implied_rate
+
+
+def test_borrow_trade_encoding():
+    trade = trades.encode_borrow_trade(3, 5 * 10 ** 8, 60_000_000)
+    assert trade.startswith("0x0103")
+    assert trades.decode_trade(trade) == (
+        trades.TradeActionType.Borrow,
+        3,
+        5 * 10 ** 8,
+        60_000_000,
+    )
+
+
+def test_lend_trade_fcash_overflow(strategy):
+    with brownie.reverts("!fCashAmount"):
+        strategy.getTradeFrom(1, trades.MAX_UINT88 + 1, 0)
@@ -0,0 +1,89 @@
+import pytest
+from utils import actions
+
+QUARTER = 90 * 86_400
+YEAR = 360 * 86_400
+
+
+def test_tend_trigger_idle_want(
+    chain, token, vault, strategy, user, strategist, gov, amount
+):
+    actions.user_deposit(user, vault, token, amount)
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    assert not strategy.tendTrigger(0)
+
+    # let the rate oracle catch up with the rate our own lend left behind
+    chain.sleep(2 * 3_600)
+    chain.mine()
+    # idle want earns nothing, lending it is worth a cheap call
+    token.transfer(strategy, amount // 10, {"from": user})
+    assert strategy.tendTrigger(0)
+    # but not one that costs more than the interest
+    assert not strategy.tendTrigger(amount)
+
+    strategy.setMinAmountWant(amount, {"from": gov})
+    assert not strategy.tendTrigger(0)
+
+
+def test_harvest_trigger_matured(
+    chain, token, vault, strategy, n_proxy, currency_id, user, strategist, gov, amount
+):
+    actions.user_deposit(user, vault, token, amount)
+    strategy.setLadder(1, 1, 10_000, {"from": gov})
+    # only the matured cash may trigger: no report delay and no profit to take
+    strategy.setMaxReportDelay(2 ** 64, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    maturity = strategy.getPositions()[0][0]
+    chain.sleep(maturity - chain.time() - 3_600)
+    strategy.harvest({"from": strategist})
+
+    chain.sleep(QUARTER - chain.time() % QUARTER + 86_400)
+    n_proxy.initializeMarkets(currency_id, False, {"from": strategist})
+
+    # BaseStrategy's reasons: profit since the last report and credit
+    params = vault.strategies(strategy).dict()
+    base_profit = max(0, strategy.estimatedTotalAssets() - params["totalDebt"])
+    base_profit += vault.creditAvailable(strategy)
+    # interest the matured cash earns lent again, as _expectedLendingProfit prices it
+    maturities, _, fcash_amounts = strategy.getPositions()
+    matured = sum(
+        fcash_amount
+        for maturity, fcash_amount in zip(maturities, fcash_amounts)
+        if maturity <= chain.time()
+    )
+    matured = matured * 10 ** token.decimals() // 10 ** 8
+    markets = n_proxy.getActiveMarkets(currency_id)[: strategy.maxMarketIndex()]
+    best = max(markets, key=lambda market: market[5])
+    lending_profit = matured * best[5] * (best[1] - chain.time()) // YEAR // 10 ** 9
+    assert lending_profit > base_profit
+
+    # call costs in wei worth, times profitFactor, `want_amount` of want
+    profit_factor = strategy.profitFactor()
+    wei_per_want = 10 ** 18 / strategy.ethToWant(10 ** 18)
+
+    def call_cost(want_amount):
+        return int(want_amount * wei_per_want / profit_factor)
+
+    assert strategy.harvestTrigger(call_cost((base_profit + lending_profit) // 2))
+    assert not strategy.harvestTrigger(call_cost(lending_profit * 2))
+
+    # BaseStrategy's minimum delay between reports applies first
+    strategy.setMinReportDelay(2 ** 32, {"from": gov})
+    assert not strategy.harvestTrigger(0)
+    strategy.setMinReportDelay(0, {"from": gov})
+
+    strategy.harvest({"from": strategist})
+    maturities, _, _ = strategy.getPositions()
+    assert all(maturity > chain.time() for maturity in maturities)
+
+
+def test_eth_to_want(token, strategy, n_proxy, currency_id):
+    # Notional's ETHRate is already inverted, want/ETH with rateDecimals precision
+    (_, _, eth_rate, _) = n_proxy.getCurrencyAndRates(currency_id)
+    rate_decimals, rate = eth_rate[0], eth_rate[1]
+    expected = 10 ** 18 * rate_decimals // rate * 10 ** token.decimals() // 10 ** 18
+
+    assert pytest.approx(strategy.ethToWant(10 ** 18), rel=1e-6) == expected
+    assert strategy.ethToWant(0) == 0
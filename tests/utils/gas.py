@@ -0,0 +1,60 @@
+import fcntl
+import json
+import os
+from pathlib import Path
+
+import pytest
+from brownie import network
+
+BASELINE_PATH = Path(__file__).parent.parent / "gas_baseline.json"
+
+
+# Records gas_used per lifecycle path and checks it against a JSON baseline of
+# {network: {token symbol: {path: gas}}}, as the mock Notional of the development
+# network and a mainnet fork cost different gas. A path missing from the baseline
+# skips its test, so an unrecorded network can't pass unchecked.
+class GasBenchmark:
+    def __init__(self, threshold, update, path=BASELINE_PATH, network_name=None):
+        self.threshold = threshold
+        self.update = update
+        self.path = Path(path)
+        self.network = network_name or network.show_active()
+        self.baseline = _load(self.path).get(self.network, {})
+        self.results = {}
+
+    def record(self, symbol, name, tx):
+        gas_used = tx.gas_used
+        self.results.setdefault(symbol, {})[name] = gas_used
+        if self.update:
+            return
+        baseline = self.baseline.get(symbol, {}).get(name)
+        if baseline is None:
+            pytest.skip(
+                f"no {self.network} gas baseline for {symbol} {name}, "
+                "record one with --update-gas-baseline"
+            )
+        assert gas_used <= baseline * (1 + self.threshold), (
+            f"{self.network} {symbol} {name} used {gas_used} gas, "
+            f"baseline {baseline} (+{self.threshold:.0%})"
+        )
+
+    def save(self):
+        # xdist workers each save their own results, merge them under a lock
+        with open(f"{self.path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            baseline = _load(self.path)
+            network_baseline = baseline.setdefault(self.network, {})
+            for symbol, results in self.results.items():
+                network_baseline.setdefault(symbol, {}).update(results)
+            tmp_path = f"{self.path}.{os.getpid()}"
+            with open(tmp_path, "w") as f:
+                json.dump(baseline, f, indent=2, sort_keys=True)
+                f.write("\n")
+            os.replace(tmp_path, self.path)
+
+
+def _load(path):
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+
+from brownie import chain
+
+
+# Cache of Notional quotes for off-chain sizing: quotes are memoized per
+# (currency_id, market_index, block) so simulations only hit the node once
+# for every amount they size within a block.
+class QuoteCache:
+    def __init__(self, n_proxy, max_blocks=16):
+        self.n_proxy = n_proxy
+        self.max_blocks = max_blocks
+        self.hits = 0
+        self.misses = 0
+        self._quotes = OrderedDict()
+        self._block_times = OrderedDict()
+
+    def fcash_given_cash(self, currency_id, market_index, cash_amount, block=None):
+        block = self._block(block)
+        quotes = self._quotes_at(currency_id, market_index, block)
+        key = ("fcash", cash_amount)
+        if key not in quotes:
+            # lending takes cash from the account (negative net cash)
+            quotes[key] = self.n_proxy.getfCashAmountGivenCashAmount(
+                currency_id,
+                -cash_amount,
+                market_index,
+                self._block_time(block),
+                block_identifier=block,
+            )
+            self.misses += 1
+        else:
+            self.hits += 1
+        return quotes[key]
+
+    def cash_given_fcash(self, currency_id, market_index, fcash_amount, block=None):
+        block = self._block(block)
+        quotes = self._quotes_at(currency_id, market_index, block)
+        key = ("cash", fcash_amount)
+        if key not in quotes:
+            # selling fCash, returns the underlying cash amount
+            _, quotes[key] = self.n_proxy.getCashAmountGivenfCashAmount(
+                currency_id,
+                -fcash_amount,
+                market_index,
+                self._block_time(block),
+                block_identifier=block,
+            )
+            self.misses += 1
+        else:
+            self.hits += 1
+        return quotes[key]
+
+    def clear(self):
+        self._quotes.clear()
+        self._block_times.clear()
+
+    def _block(self, block):
+        return chain.height if block is None else block
+
+    def _block_time(self, block):
+        if block not in self._block_times:
+            self._block_times[block] = chain[block].timestamp
+            _evict(self._block_times, self.max_blocks)
+        return self._block_times[block]
+
+    def _quotes_at(self, currency_id, market_index, block):
+        key = (currency_id, market_index, block)
+        if key not in self._quotes:
+            self._quotes[key] = {}
+            _evict(self._quotes, self.max_blocks)
+        return self._quotes[key]
+
+
+def _evict(cache, max_size):
+    while len(cache) > max_size:
+        cache.popitem(last=False)
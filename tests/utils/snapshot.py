@@ -0,0 +1,116 @@
+from typing import NamedTuple, Optional, Tuple
+
+import brownie
+from brownie import chain
+
+
+# Immutable records of the state we monitor. Every field of a Snapshot is read
+# at the same block in a single aggregated multicall, instead of one RPC per field.
+class VaultState(NamedTuple):
+    address: str
+    name: str
+    api_version: str
+    decimals: int
+    total_assets: int
+    total_supply: int
+    price_per_share: int
+
+
+class StrategyState(NamedTuple):
+    address: str
+    name: str
+    performance_fee: int
+    debt_ratio: int
+    total_debt: int
+    total_gain: int
+    total_loss: int
+    estimated_total_assets: int
+
+
+class NotionalState(NamedTuple):
+    account_context: tuple
+    account_balances: tuple
+    portfolio: tuple
+    active_markets: tuple
+    free_collateral: int
+
+
+class Snapshot(NamedTuple):
+    block: int
+    vault: VaultState
+    strategy: Optional[StrategyState]
+    notional: Optional[NotionalState]
+
+
+def take(vault, strategy=None, n_proxy=None, currency_id=None, block=None):
+    """Reads vault, strategy and Notional account state in one multicall,
+    markets default to the strategy's currency"""
+    block = chain.height if block is None else block
+    if n_proxy is not None and currency_id is None:
+        if strategy is None:
+            raise ValueError("currency_id is required without a strategy")
+        currency_id = strategy.currencyID()
+    with brownie.multicall(block_identifier=block):
+        vault_calls = (
+            vault.name(),
+            vault.apiVersion(),
+            vault.decimals(),
+            vault.totalAssets(),
+            vault.totalSupply(),
+            vault.pricePerShare(),
+        )
+        if strategy is not None:
+            strategy_calls = (
+                strategy.name(),
+                vault.strategies(strategy),
+                strategy.estimatedTotalAssets(),
+            )
+        if n_proxy is not None:
+            account = strategy if strategy is not None else vault
+            notional_calls = (
+                n_proxy.getAccount(account),
+                n_proxy.getActiveMarkets(currency_id),
+                n_proxy.getFreeCollateral(account),
+            )
+
+    vault_state = VaultState(vault.address, *map(_resolve, vault_calls))
+
+    strategy_state = None
+    if strategy is not None:
+        name, params, estimated_total_assets = map(_resolve, strategy_calls)
+        params = params.dict()
+        strategy_state = StrategyState(
+            strategy.address,
+            name,
+            params["performanceFee"],
+            params["debtRatio"],
+            params["totalDebt"],
+            params["totalGain"],
+            params["totalLoss"],
+            estimated_total_assets,
+        )
+
+    notional_state = None
+    if n_proxy is not None:
+        account, markets, free_collateral = map(_resolve, notional_calls)
+        context, balances, portfolio = account
+        notional_state = NotionalState(
+            _freeze(context),
+            _freeze(balances),
+            _freeze(portfolio),
+            _freeze(markets),
+            free_collateral[0],
+        )
+
+    return Snapshot(block, vault_state, strategy_state, notional_state)
+
+
+def _resolve(value):
+    # multicall results are lazy proxies until the batch is flushed
+    return getattr(value, "__wrapped__", value)
+
+
+def _freeze(value) -> Tuple:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
@@ -0,0 +1,68 @@
+from collections import namedtuple
+from enum import IntEnum
+
+# Mirrors the packed trade layouts in interfaces/notional/Types.sol
+class TradeActionType(IntEnum):
+    Lend = 0
+    Borrow = 1
+    AddLiquidity = 2
+    RemoveLiquidity = 3
+    PurchaseNTokenResidual = 4
+    SettleCashDebt = 5
+
+
+# Lend and Borrow share the layout, the rate is the min (Lend) or max (Borrow) implied rate
+Trade = namedtuple(
+    "Trade", ["action_type", "market_index", "fcash_amount", "implied_rate_limit"]
+)
+
+MAX_UINT8 = 2 ** 8 - 1
+MAX_UINT32 = 2 ** 32 - 1
+MAX_UINT88 = 2 ** 88 - 1
+
+
+# (uint8 TradeActionType, uint8 MarketIndex, uint88 fCashAmount, uint32 minImpliedRate, uint120 unused)
+def encode_lend_trade(market_index, fcash_amount, min_implied_rate=0):
+    return encode_trade(
+        TradeActionType.Lend, market_index, fcash_amount, min_implied_rate
+    )
+
+
+# (uint8 TradeActionType, uint8 MarketIndex, uint88 fCashAmount, uint32 maxImpliedRate, uint128 unused)
+def encode_borrow_trade(market_index, fcash_amount, max_implied_rate=0):
+    return encode_trade(
+        TradeActionType.Borrow, market_index, fcash_amount, max_implied_rate
+    )
+
+
+def encode_trade(action_type, market_index, fcash_amount, implied_rate_limit):
+    assert action_type in (TradeActionType.Lend, TradeActionType.Borrow)
+    assert 0 <= market_index <= MAX_UINT8
+    assert 0 <= fcash_amount <= MAX_UINT88
+    assert 0 <= implied_rate_limit <= MAX_UINT32
+    packed = (
+        (action_type << 248)
+        | (market_index << 240)
+        | (fcash_amount << 152)
+        | (implied_rate_limit << 120)
+    )
+    return to_bytes32(packed)
+
+
+def decode_trade(trade):
+    packed = int(to_bytes32(trade), 16)
+    return Trade(
+        TradeActionType((packed >> 248) & MAX_UINT8),
+        (packed >> 240) & MAX_UINT8,
+        (packed >> 152) & MAX_UINT88,
+        (packed >> 120) & MAX_UINT32,
+    )
+
+
+def to_bytes32(value):
+    if isinstance(value, int):
+        value = value.to_bytes(32, "big")
+    elif isinstance(value, str):
+        value = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    assert len(value) == 32
+    return "0x" + value.hex()
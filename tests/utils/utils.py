@@ -1,23 +1,31 @@
 import brownie
 from brownie import interface, chain
 
+from utils import snapshot
+
 
 def vault_status(vault):
-    print(f"--- Vault {vault.name()} ---")
-    print(f"API: {vault.apiVersion()}")
-    print(f"TotalAssets: {to_units(vault, vault.totalAssets())}")
-    print(f"PricePerShare: {to_units(vault, vault.pricePerShare())}")
-    print(f"TotalSupply: {to_units(vault, vault.totalSupply())}")
+    vault_state = snapshot.take(vault).vault
+    print(f"--- Vault {vault_state.name} ---")
+    print(f"API: {vault_state.api_version}")
+    print(f"TotalAssets: {_units(vault_state, vault_state.total_assets)}")
+    print(f"PricePerShare: {_units(vault_state, vault_state.price_per_share)}")
+    print(f"TotalSupply: {_units(vault_state, vault_state.total_supply)}")
 
 
 def strategy_status(vault, strategy):
-    status = vault.strategies(strategy).dict()
-    print(f"--- Strategy {strategy.name()} ---")
-    print(f"Performance fee {status['performanceFee']}")
-    print(f"Debt Ratio {status['debtRatio']}")
-    print(f"Total Debt {to_units(vault, status['totalDebt'])}")
-    print(f"Total Gain {to_units(vault, status['totalGain'])}")
-    print(f"Total Loss {to_units(vault, status['totalLoss'])}")
+    state = snapshot.take(vault, strategy)
+    status = state.strategy
+    print(f"--- Strategy {status.name} ---")
+    print(f"Performance fee {status.performance_fee}")
+    print(f"Debt Ratio {status.debt_ratio}")
+    print(f"Total Debt {_units(state.vault, status.total_debt)}")
+    print(f"Total Gain {_units(state.vault, status.total_gain)}")
+    print(f"Total Loss {_units(state.vault, status.total_loss)}")
+
+
+def _units(vault_state, amount):
+    return amount / (10 ** vault_state.decimals)
 
 
 def to_units(token, amount):